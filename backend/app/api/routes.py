@@ -14,26 +14,53 @@ Responsabilidades:
     3. Aplicar controle de taxa (Rate Limiting) global.
     4. Converter formato de mensagens (Frontend -> LangChain).
     5. Executar o Grafo de IA em modo Streaming (SSE).
-    6. Enviar atualizações de status ("Pesquisando...", "Pensando...") em tempo real.
+    6. Enviar atualizações de status ("Pesquisando...", "Pensando...") em tempo real,
+       com a duração de cada nó e o tempo acumulado (e o breakdown completo no `result`).
+    7. Transmitir a resposta final token a token (evento `token`) enquanto a LLM gera.
+    8. Manter sessões server-side (`session_id`) com o estado persistido no checkpointer.
+    9. Agrupar requisições idênticas simultâneas em uma única execução do grafo (Single-Flight).
+    10. Limitar execuções simultâneas por worker, com fila (evento `queue`) e 503 quando lotado.
+    11. Cancelar a execução do grafo quando o cliente desconecta (e contabilizar em `metrics`).
+    12. Avaliação em lote (/chat/batch) para regressões, protegida por token.
 
 Comunicação:
     - Invoca `agent_app` (workflow.py) para processar a IA.
+    - Invoca `get_session_app` (workflow.py) quando a conversa tem `session_id`.
     - Consulta `limiter` (rate_limit.py) para aprovar requisições.
+    - Usa `coalescer` (coalescing.py) para compartilhar execuções idênticas em andamento.
+    - Usa `admission` (admission.py) para limitar a concorrência de execuções do grafo.
+    - Registra contadores em `metrics` (metrics.py), expostos em `/metrics`.
+    - Delega o lote para `batch_service` (services/batch_service.py).
 """
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Header, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
+import secrets
+import asyncio
 import json
-from langchain_core.messages import HumanMessage, AIMessage
+import re
 
-from app.graph.workflow import agent_app
+from app.graph.workflow import agent_app, get_session_app, touch_session
+from app.graph.streaming import build_initial_state, stream_agent_events, format_server_timing
+from app.core.coalescing import coalescer
+from app.core.admission import admission
+from app.core.metrics import metrics
 from app.core.rate_limit import limiter
+from app.core.llm_scheduler import get_llm_scheduler
+from app.core.config import settings
+from app.services.batch_service import BatchConversation, run_batch
 from app.core.logger import logger
 
 router = APIRouter()
 
+# Formato aceito para `session_id` (ex: UUID gerado pelo frontend).
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,128}$")
+
+# Intervalo (segundos) entre verificações de desconexão do cliente enquanto não há eventos.
+DISCONNECT_POLL_INTERVAL = 1.0
+
 # --------------------------------------------------
 # Modelos de Dados (DTOs)
 # --------------------------------------------------
@@ -44,11 +71,20 @@ class ChatRequest(BaseModel):
     message: str # A nova mensagem do usuário
     history: Optional[List[dict]] = [] # Histórico da conversa [{"role": "user", "content": "..."}]
     language: Optional[str] = "pt-br" # Idioma da interface (para status messages)
+    session_id: Optional[str] = None # Sessão server-side: se informado, `history` é ignorado
 
 class ChatResponse(BaseModel):
     response: str
     usage: dict # Estatísticas de uso da quota diária
 
+class BatchRequest(BaseModel):
+    """
+    Payload do endpoint de avaliação em lote.
+    """
+    conversations: List[BatchConversation]
+    concurrency: Optional[int] = 4 # Limitado por `settings.BATCH_MAX_CONCURRENCY`
+    format: Literal["json", "ndjson"] = "json" # ndjson: um resultado por linha, assim que termina
+
 # --------------------------------------------------
 # Endpoint de Status
 # --------------------------------------------------
@@ -61,6 +97,33 @@ async def get_status(request: Request):
     status = limiter.get_status()
     return status
 
+# --------------------------------------------------
+# Endpoint de Métricas
+# --------------------------------------------------
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Contadores de execução do worker que atendeu a requisição
+    (concluídas, canceladas por desconexão, com falha), taxa de acerto dos caches,
+    ocupação da fila e uso do último minuto por modelo (RPM/TPM, somando todos os workers).
+    """
+    counters = metrics.snapshot()
+    scheduler = get_llm_scheduler()
+    return {
+        "counters": counters,
+        "hit_rates": {
+            cache: _hit_rate(counters, cache) for cache in ("llm_cache", "embedding_cache")
+        },
+        "admission": admission.get_status(),
+        "llm_usage": await asyncio.to_thread(scheduler.utilization) if scheduler else {}
+    }
+
+def _hit_rate(counters: dict, prefix: str) -> Optional[float]:
+    """Taxa de acerto (memória + disco) de um cache, ou None se ainda não foi consultado."""
+    hits = counters.get(f"{prefix}_hits_memory", 0) + counters.get(f"{prefix}_hits_disk", 0)
+    total = hits + counters.get(f"{prefix}_misses", 0)
+    return round(hits / total, 4) if total else None
+
 # --------------------------------------------------
 # Endpoint Principal de Chat (Streaming)
 # --------------------------------------------------
@@ -70,54 +133,123 @@ async def chat_endpoint(request: ChatRequest, fast_api_request: Request):
     Processa uma nova mensagem de chat e retorna uma resposta via Server-Sent Events (SSE).
     
     Fluxo:
-    1. Verifica Rate Limit.
-    2. Reconstrói o histórico de mensagens no formato LangChain.
-    3. Inicia o grafo (agent_app) em modo assíncrono.
-    4. Intercepta cada passo do grafo para enviar feedbacks de progresso ao usuário.
-    5. Envia a resposta final.
+    1. Reconstrói o histórico de mensagens no formato LangChain
+       (ou, com `session_id`, usa o estado salvo no servidor e envia só a mensagem nova).
+    2. Reserva uma vaga de execução (503 se a fila estiver cheia).
+    3. Verifica Rate Limit.
+    4. Inicia o grafo (agent_app) em modo assíncrono, após aguardar a vez na fila.
+    5. Intercepta cada passo do grafo para enviar feedbacks de progresso ao usuário.
+    6. Envia a resposta final.
     """
     client_ip = fast_api_request.client.host
     logger.info(f"Incoming chat request from IP: {client_ip}\nMessage: {request.message}")
     
-    # 1. Validação de Rate Limit (Segurança)
+    if request.session_id is not None and not SESSION_ID_PATTERN.match(request.session_id):
+        raise HTTPException(status_code=400, detail="session_id inválido.")
+
+    # 1. Conversão de Histórico (JSON -> Objetos LangChain)
+    # Com sessão, o checkpointer já tem o histórico (e o resumo): o cliente manda só a mensagem nova.
+    history = request.history if request.session_id is None else []
+
+    # Estado inicial do grafo
+    initial_state = build_initial_state(request.message, history, request.language)
+
+    # Seleção do grafo e da chave de coalescência (Single-Flight):
+    # - Stateless (histórico do cliente): execução compartilhável entre requisições idênticas.
+    # - Sessão nova (sem estado salvo): mesma execução stateless; o resultado é gravado
+    #   na sessão de cada cliente ao final.
+    # - Sessão existente: roda no grafo com checkpointer (`add_messages` anexa a mensagem nova
+    #   ao estado salvo) e nunca é compartilhada.
+    #   `durability="exit"` grava o checkpoint uma única vez, ao fim da execução.
+    session_app = None
+    session_config = None
+    persist_into_session = False
+    if request.session_id is not None:
+        session_app = await get_session_app()
+        await touch_session(request.session_id)
+        session_config = {"configurable": {"thread_id": request.session_id}}
+        snapshot = await session_app.aget_state(session_config)
+        persist_into_session = not snapshot.values
+
+    if request.session_id is not None and not persist_into_session:
+        graph = session_app
+        stream_kwargs = {"config": session_config, "durability": "exit"}
+        flight_key = None
+    else:
+        graph = agent_app
+        stream_kwargs = {}
+        flight_key = coalescer.make_key(request.message, request.language, history)
+
+    # 2. Controle de Admissão (Concorrência + Fila)
+    # Só reserva vaga quem vai iniciar uma execução nova: quem entra numa execução
+    # idêntica em andamento não adiciona carga aos provedores.
+    # Checado ANTES do Rate Limit para que um 503 não consuma a quota diária.
+    ticket = None
+    if not coalescer.is_running(flight_key):
+        ticket = admission.try_reserve()
+        if ticket is None:
+            logger.warning(f"Admission queue full ({admission.get_status()}). IP: {client_ip} rejected.")
+            raise HTTPException(
+                status_code=503,
+                detail="Servidor ocupado no momento. Tente novamente em alguns segundos.",
+                headers={"Retry-After": "5"}
+            )
+
+    # 3. Validação de Rate Limit (Segurança)
     if not limiter.check_request():
+        if ticket is not None:
+            ticket.release()
         logger.warning(f"Rate limit exceeded. IP: {client_ip} tried to request.")
         raise HTTPException(
             status_code=429, 
             detail="Limite diário global do projeto atingido (APIs gratuitas). Volte amanhã!"
         )
 
-    # 2. Conversão de Histórico (JSON -> Objetos LangChain)
-    langchain_messages = []
-    for msg in request.history:
-        if msg.get("role") == "user":
-            langchain_messages.append(HumanMessage(content=msg.get("content", "")))
-        elif msg.get("role") == "assistant":
-            langchain_messages.append(AIMessage(content=msg.get("content", "")))
-    
-    # Adiciona a mensagem atual
-    langchain_messages.append(HumanMessage(content=request.message))
-    
-    # Estado inicial do grafo
-    initial_state = {
-        "messages": langchain_messages,
-        "language": request.language or "pt-br"
-    }
+    # Helper para definir idioma das mensagens de status
+    is_pt = request.language != 'en' 
+
+    async def run_graph():
+        # Líder da execução: aguarda a vaga (emitindo a posição na fila) e só então roda o grafo.
+        # Uma requisição que não reservou (a execução idêntica terminou antes dela se inscrever
+        # e ela virou líder) reserva agora.
+        run_ticket = ticket if ticket is not None and not ticket.claimed else admission.try_reserve()
+        if run_ticket is None:
+            yield "error", {"detail": "Servidor ocupado no momento. Tente novamente em alguns segundos."}
+            return
+        run_ticket.claimed = True
 
-    # 3. Gerador de Eventos SSE (Server-Sent Events)
+        try:
+            async for position in run_ticket.wait_turn():
+                yield "queue", {
+                    "position": position,
+                    "message": f"Na fila (posição {position})..." if is_pt else f"Queued (position {position})..."
+                }
+
+            async for event in stream_agent_events(graph, initial_state, is_pt=is_pt, **stream_kwargs):
+                yield event
+        except asyncio.CancelledError:
+            # Todos os clientes desconectaram: a chamada de LLM em andamento é abortada.
+            metrics.increment("runs_cancelled")
+            logger.warning(f"Graph run cancelled (client disconnected). IP: {client_ip}")
+            raise
+        except Exception:
+            metrics.increment("runs_failed")
+            raise
+        else:
+            metrics.increment("runs_completed")
+        finally:
+            run_ticket.release()
+
+    # 4. Gerador de Eventos SSE (Server-Sent Events)
     # Permite enviar dados parciais sem fechar a conexão HTTP.
     async def event_generator():
-        try:
-            
-            # Helper para definir idioma das mensagens de status
-            is_pt = request.language != 'en' 
-            
-            # Formata evento no padrão SSE:
-            # event: nome_do_evento
-            # data: json_string
-            def format_event(event_type, data):
-                return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+        # Formata evento no padrão SSE:
+        # event: nome_do_evento
+        # data: json_string
+        def format_event(event_type, data):
+            return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
 
+        try:
             # Envia status inicial
             # PADDING PARA NGINX/COOLIFY: Envia comentário vazio para forçar flush do buffer
             # Alguns proxies (Cloudflare, Nginx) seguram os primeiros bytes.
@@ -125,66 +257,62 @@ async def chat_endpoint(request: ChatRequest, fast_api_request: Request):
             
             yield format_event("status", {"message": "Iniciando..." if is_pt else "Starting..."})
 
-            final_response_content = ""
-            
-            # 4. Loop de Execução do Grafo
-            # agent_app.astream(stream_mode="updates") retorna um dict a cada nó finalizado.
-            async for chunk in agent_app.astream(initial_state, stream_mode="updates"):
-                node_name = list(chunk.keys())[0]
-                node_output = chunk[node_name]
-
-                # Mapeamento: Nó -> Mensagem de Status para o Usuário
-                status_msg = ""
-                if node_name == "detect_language":
-                    status_msg = "Lendo histórico..." if is_pt else "Reading history..."
-                elif node_name == "summarize_conversation":
-                    status_msg = "Entendendo contexto..." if is_pt else "Understanding context..."
-                elif node_name == "contextualize_input":
-                    status_msg = "Analisando intenção..." if is_pt else "Analyzing intent..."
-                elif node_name == "router_node":
-                    # Se o router decidiu que é técnico, avisa que vai pesquisar.
-                    classification = node_output.get("classification", "technical")
-                    
-                    if classification == "technical":
-                        status_msg = "Pesquisando nas memórias..." if is_pt else "Searching memories..."
-                    else:
-                        status_msg = "Pensando..." if is_pt else "Thinking..."
-                elif node_name == "retrieve":
-                    status_msg = "Estudando informações..." if is_pt else "Reading data..."
-                elif node_name == "answerability_guard":
-                    status_msg = "Validando resposta..." if is_pt else "Validating answer..."
-                elif node_name == "fallback_responder":
-                    status_msg = "Formulando explicação..." if is_pt else "Formulating explanation..."
-                elif node_name == "generate_rag" or node_name == "generate_casual":
-                     status_msg = "Finalizando..." if is_pt else "Finalizing..."
-                elif node_name == "translator_node":
-                    status_msg = "Traduzindo resposta..." if is_pt else "Translating response..."
-                
-                # Se houve mudança de status, envia evento ao frontend
-                if status_msg:
-                    yield format_event("status", {"message": status_msg})
-
-                # Captura a resposta final (AIMessage) quando ela aparecer
-                if node_output and "messages" in node_output:
-                    msgs = node_output["messages"]
-                    # Verifica se é uma resposta da IA e não um comando de sistema
-                    if msgs and isinstance(msgs[-1], AIMessage):
-                        final_response_content = msgs[-1].content
-
-            # 5. Envio da Resposta Final
-            if final_response_content:
-                # Recupera stats atualizados após o processamento
-                stats = limiter.get_status()
-                yield format_event("result", {
-                    "response": final_response_content,
-                    "usage": stats
-                })
-            else:
-                 yield format_event("error", {"detail": "No response generated."})
+            # Uma execução idêntica começou depois da reserva: esta requisição só vai ouvir,
+            # então devolve a vaga já (sem await entre a checagem e a inscrição).
+            if ticket is not None and coalescer.is_running(flight_key):
+                ticket.release()
+
+            # 5. Loop de Execução do Grafo
+            # Eventos (status/token/final) vêm de `stream_agent_events`, possivelmente
+            # compartilhados com outras requisições idênticas em andamento.
+            # Se o cliente desconectar (aba fechada), a inscrição termina e, sem ouvintes,
+            # a execução do grafo é cancelada.
+            events = coalescer.subscribe(
+                flight_key,
+                run_graph,
+                is_disconnected=fast_api_request.is_disconnected,
+                poll_interval=DISCONNECT_POLL_INTERVAL
+            )
+            async for event_type, data in events:
+                if event_type != "final":
+                    yield format_event(event_type, data)
+                    continue
+
+                final_response_content = data["response"]
+
+                # Sessão nova que reaproveitou uma execução stateless: grava o estado final
+                # nela como se o último nó executado tivesse produzido esse estado.
+                if persist_into_session and final_response_content:
+                    await session_app.aupdate_state(
+                        session_config, data["values"], as_node=data["last_node"]
+                    )
+
+                # 6. Envio da Resposta Final
+                # Mantido mesmo após os tokens: é a versão canônica (e compatível) da resposta.
+                if final_response_content:
+                    # Recupera stats atualizados após o processamento
+                    stats = limiter.get_status()
+                    timings = data["timings"]
+                    logger.info(f"Graph timings (ms): {timings}")
+                    yield format_event("result", {
+                        "response": final_response_content,
+                        "usage": stats,
+                        "session_id": request.session_id,
+                        # Breakdown por nó. O header `Server-Timing` não pode ser enviado
+                        # depois que o stream começou, então o resumo vai no próprio evento.
+                        "timings": timings,
+                        "server_timing": format_server_timing(timings)
+                    })
+                else:
+                     yield format_event("error", {"detail": "No response generated."})
 
         except Exception as e:
             logger.error(f"Stream Error: {e}")
             yield format_event("error", {"detail": str(e)})
+        finally:
+            # Vaga reservada e não usada (requisição anexada a uma execução idêntica).
+            if ticket is not None and not ticket.claimed:
+                ticket.release()
 
     return StreamingResponse(
         event_generator(), 
@@ -195,3 +323,38 @@ async def chat_endpoint(request: ChatRequest, fast_api_request: Request):
             "Connection": "keep-alive"
         }
     )
+
+# --------------------------------------------------
+# Endpoint de Avaliação em Lote (Regressão)
+# --------------------------------------------------
+@router.post("/chat/batch")
+async def chat_batch_endpoint(request: BatchRequest, x_batch_token: Optional[str] = Header(default=None)):
+    """
+    Executa várias conversas no grafo em paralelo e retorna respostas + tempos por nó.
+
+    - `format="json"`: um único JSON com os resultados na ordem da entrada.
+    - `format="ndjson"`: uma linha por conversa, na ordem em que terminam.
+
+    Uso interno (regressões): exige `X-Batch-Token` e não consome a quota diária.
+    """
+    if not settings.BATCH_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_batch_token or not secrets.compare_digest(x_batch_token, settings.BATCH_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Token de batch inválido.")
+
+    concurrency = min(request.concurrency or 1, settings.BATCH_MAX_CONCURRENCY)
+    logger.info(f"Batch request: {len(request.conversations)} conversations (concurrency={concurrency}).")
+
+    if request.format == "ndjson":
+        async def ndjson_generator():
+            async for result in run_batch(request.conversations, concurrency):
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(ndjson_generator(), media_type="application/x-ndjson")
+
+    results = [result async for result in run_batch(request.conversations, concurrency)]
+    results.sort(key=lambda r: r["index"])
+    return {
+        "results": results,
+        "errors": sum(1 for r in results if r["error"])
+    }
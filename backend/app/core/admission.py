@@ -0,0 +1,142 @@
+"""
+CONTROLE DE ADMISSÃO (Concorrência Limitada + Fila)
+--------------------------------------------------
+Objetivo:
+    Limitar quantas execuções do grafo rodam ao mesmo tempo em cada worker.
+    Sem isso, um pico de acessos dispara dezenas de pipelines em paralelo contra os
+    provedores de LLM, gerando 429 e piorando a latência de TODO mundo.
+
+Atuação no Sistema:
+    - Backend / Core: Intercepta a execução do grafo nas rotas de chat (após o Rate Limit diário).
+
+Responsabilidades:
+    1. Permitir no máximo N execuções simultâneas por processo.
+    2. Manter uma fila FIFO limitada para quem chega quando todas as vagas estão ocupadas.
+    3. Recusar imediatamente (503) quando a fila também está cheia.
+    4. Informar a posição na fila enquanto o cliente aguarda.
+
+Comunicação:
+    - Usado por `app.api.routes` (reserva no endpoint, espera/liberação dentro do gerador SSE).
+    - Configurado por `settings.MAX_CONCURRENT_RUNS` e `settings.MAX_QUEUED_RUNS`.
+"""
+
+import asyncio
+from collections import deque
+from typing import Deque, Optional
+from app.core.config import settings
+
+
+class AdmissionTicket:
+    """
+    Reserva de uma vaga (imediata ou na fila) para uma execução do grafo.
+    """
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._granted: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._released = False
+        # Marcado quando a execução realmente começou a usar o ticket.
+        # Tickets não usados (ex: requisição que entrou numa execução já em andamento)
+        # são devolvidos por quem reservou.
+        self.claimed = False
+
+    @property
+    def position(self) -> int:
+        """Posição na fila (1 = próximo a executar). 0 se a vaga já foi concedida."""
+        return self._controller._position(self)
+
+    async def wait_turn(self):
+        """
+        Aguarda a vaga, produzindo a posição na fila sempre que ela mudar.
+        Não produz nada se a vaga foi concedida imediatamente.
+        """
+        last_position = None
+        while not self._granted.done():
+            position = self.position
+            if position != last_position:
+                yield position
+                last_position = position
+
+            changed = asyncio.ensure_future(self._controller._changed.wait())
+            try:
+                await asyncio.wait({self._granted, changed}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                changed.cancel()
+
+    def release(self):
+        """Devolve a vaga (ou sai da fila). Idempotente."""
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self)
+
+
+class AdmissionController:
+    """
+    Semáforo com fila limitada e visível (posição de cada cliente).
+    Estado local ao processo: cada worker do Uvicorn tem seus próprios limites.
+    """
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._active = 0
+        self._waiters: Deque[AdmissionTicket] = deque()
+        self._changed = asyncio.Event()
+
+    def try_reserve(self) -> Optional[AdmissionTicket]:
+        """
+        Reserva uma vaga sem bloquear.
+
+        Returns:
+            Ticket concedido (vaga livre) ou na fila; `None` se a fila estiver cheia.
+        """
+        if self._active < self.max_concurrent and not self._waiters:
+            ticket = AdmissionTicket(self)
+            self._active += 1
+            ticket._granted.set_result(True)
+            return ticket
+
+        if len(self._waiters) >= self.max_queue:
+            return None
+
+        ticket = AdmissionTicket(self)
+        self._waiters.append(ticket)
+        return ticket
+
+    def get_status(self) -> dict:
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue
+        }
+
+    def _position(self, ticket: AdmissionTicket) -> int:
+        try:
+            return self._waiters.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    def _release(self, ticket: AdmissionTicket):
+        if ticket._granted.done():
+            self._active -= 1
+        else:
+            # Desistiu enquanto esperava (ex: cliente desconectou)
+            self._waiters.remove(ticket)
+            ticket._granted.cancel()
+
+        # Passa a vaga livre para o próximo da fila (FIFO)
+        while self._waiters and self._active < self.max_concurrent:
+            next_ticket = self._waiters.popleft()
+            self._active += 1
+            next_ticket._granted.set_result(True)
+
+        # Acorda quem está na fila para recalcular a posição
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+# Singleton: instância global (por processo/worker)
+admission = AdmissionController(
+    max_concurrent=settings.MAX_CONCURRENT_RUNS,
+    max_queue=settings.MAX_QUEUED_RUNS
+)
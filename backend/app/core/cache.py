@@ -0,0 +1,270 @@
+"""
+CACHE DE RESPOSTAS DE LLM (Exact-Match, Duas Camadas)
+--------------------------------------------------
+Objetivo:
+    Evitar chamar a LLM de novo para um prompt idêntico quando a saída é determinística
+    (temperatura 0): detecção de idioma, gateway, guard, resumo e tradução repetem os
+    mesmos prompts com muita frequência (perguntas populares do portfólio).
+
+Atuação no Sistema:
+    - Backend / Core: Plugado nas instâncias de LLM via parâmetro `cache` do LangChain
+      (ver `get_llm` em `app.core.llm`).
+
+Responsabilidades:
+    1. Camada 1 (memória): LRU por processo, com TTL. Acerto sem I/O.
+    2. Camada 2 (disco): SQLite em modo WAL compartilhado entre os workers do Uvicorn,
+       com TTL e limite de tamanho (remove as entradas mais antigas).
+    3. Chave: hash do prompt renderizado (mensagens) + configuração da LLM
+       (provider/classe, modelo, temperatura e demais parâmetros de invocação).
+    4. Contabilizar acertos (memória/disco) e falhas em `metrics`.
+
+Comunicação:
+    - Usado por `app.core.llm`.
+    - Configurado por `settings.LLM_CACHE_*`.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from typing import Any, Optional
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+# `loads` do LangChain é marcado como beta; o formato é o mesmo dos caches oficiais (SQLAlchemyCache).
+warnings.filterwarnings("ignore", message="The function `loads` is in beta")
+
+
+def make_cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Chave estável para (prompt, configuração da LLM).
+    O `llm_string` do LangChain já serializa provider, modelo, temperatura, stop, etc.
+    """
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Cache em memória com política LRU e expiração por TTL (thread-safe).
+    """
+    def __init__(self, max_items: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict() # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCacheStore:
+    """
+    Armazenamento chave -> texto em SQLite, compartilhado entre processos.
+
+    - WAL: leitores não bloqueiam o escritor (4 workers lendo/escrevendo ao mesmo tempo).
+    - TTL: entradas vencidas são ignoradas na leitura e removidas na limpeza.
+    - Tamanho: acima de `max_entries`, as entradas mais antigas são removidas.
+    A conexão é aberta sob demanda (o módulo pode ser importado sem tocar no disco).
+    """
+    # Limpeza (TTL + tamanho) a cada N escritas, para não pagar um DELETE por escrita.
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None, max_entries: int = 20000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_created_at ON cache(created_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl_seconds and created_at + self.ttl_seconds < time.time():
+            return None
+        return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(conn)
+            conn.commit()
+
+    def _prune(self, conn: sqlite3.Connection):
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            "SELECT key FROM cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class TieredLLMCache(BaseCache):
+    """
+    Cache do LangChain (`BaseCache`) com camada em memória na frente do SQLite.
+    Falhas do disco nunca quebram a chamada: viram cache miss (a LLM é chamada normalmente).
+    """
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCacheStore] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = make_cache_key(prompt, llm_string)
+        value = self.memory.get(key)
+        if value is not None:
+            metrics.increment("llm_cache_hits_memory")
+            return value
+
+        value = self._disk_get(key)
+        if value is not None:
+            metrics.increment("llm_cache_hits_disk")
+            self.memory.set(key, value)
+            return value
+
+        metrics.increment("llm_cache_misses")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = make_cache_key(prompt, llm_string)
+        self.memory.set(key, return_val)
+        self._disk_set(key, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.memory.clear()
+        if self.disk:
+            self.disk.clear()
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        # Acerto em memória não precisa sair do event loop; o disco vai para uma thread.
+        key = make_cache_key(prompt, llm_string)
+        value = self.memory.get(key)
+        if value is not None:
+            metrics.increment("llm_cache_hits_memory")
+            return value
+        return await asyncio.to_thread(self.lookup, prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = make_cache_key(prompt, llm_string)
+        self.memory.set(key, return_val)
+        await asyncio.to_thread(self._disk_set, key, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        await asyncio.to_thread(self.clear, **kwargs)
+
+    def _disk_get(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        if not self.disk:
+            return None
+        try:
+            raw = self.disk.get(key)
+            return [loads(item) for item in json.loads(raw)] if raw is not None else None
+        except Exception as e:
+            logger.warning(f"LLM cache (disk) read failed: {e}")
+            return None
+
+    def _disk_set(self, key: str, return_val: RETURN_VAL_TYPE):
+        if not self.disk:
+            return
+        try:
+            # Cada geração vira o JSON serializável do LangChain (preserva o tipo da mensagem)
+            self.disk.set(key, json.dumps([dumps(gen) for gen in return_val]))
+        except Exception as e:
+            logger.warning(f"LLM cache (disk) write failed: {e}")
+
+
+_llm_cache: Optional[TieredLLMCache] = None
+
+def get_llm_cache() -> Optional[TieredLLMCache]:
+    """
+    Cache compartilhado pelas instâncias de LLM determinísticas (criado sob demanda).
+    Retorna `None` se o cache estiver desativado nas configurações.
+    """
+    global _llm_cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _llm_cache is None:
+        disk = None
+        if settings.LLM_CACHE_DB_PATH:
+            disk = SQLiteCacheStore(
+                settings.LLM_CACHE_DB_PATH,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                max_entries=settings.LLM_CACHE_MAX_DISK_ENTRIES
+            )
+        _llm_cache = TieredLLMCache(
+            memory=LRUCache(
+                max_items=settings.LLM_CACHE_MAX_MEMORY_ITEMS,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+            ),
+            disk=disk
+        )
+    return _llm_cache
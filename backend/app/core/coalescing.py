@@ -0,0 +1,168 @@
+"""
+COALESCÊNCIA DE REQUISIÇÕES (Single-Flight)
+--------------------------------------------------
+Objetivo:
+    Evitar que rajadas da MESMA pergunta (ex: link do portfólio compartilhado e vários
+    visitantes perguntando "Quais as skills do Marcos?") executem o pipeline completo
+    do agente várias vezes em paralelo.
+
+Atuação no Sistema:
+    - Backend / Core: Fica na frente do `agent_app.astream` nas rotas de chat.
+
+Responsabilidades:
+    1. Gerar uma chave estável para a requisição (mensagem normalizada + idioma + hash do histórico).
+    2. Executar o grafo uma única vez por chave enquanto houver execução em andamento.
+    3. Distribuir (fan-out) os eventos para todos os clientes que aguardam a mesma resposta,
+       incluindo o replay dos eventos já emitidos para quem chegou atrasado.
+    4. Cancelar a execução quando o último cliente desconectar.
+
+Limitações:
+    - O escopo é o processo (cada worker do Uvicorn tem seu próprio registro).
+    - Só agrupa execuções simultâneas: quando a execução termina a chave é liberada.
+
+Comunicação:
+    - Usado por `app.api.routes`.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from app.core.logger import logger
+
+# Sentinela que sinaliza aos assinantes o fim da execução.
+_DONE = object()
+
+
+class Flight:
+    """
+    Uma execução do grafo em andamento, compartilhada por N requisições idênticas.
+    """
+    def __init__(self, key: Optional[str]):
+        self.key = key
+        self.events: List[tuple] = [] # Eventos já emitidos (replay para quem entra atrasado)
+        self.subscribers: List[asyncio.Queue] = []
+        self.finished = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """
+    Registro de execuções em andamento, indexado pela chave da requisição.
+    """
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+
+    @staticmethod
+    def make_key(message: str, language: str, history: List[dict]) -> str:
+        """
+        Chave de coalescência: mensagem normalizada + idioma + hash do histórico.
+
+        A normalização (casefold + espaços colapsados) faz "Quais as skills?" e
+        "quais  as skills?" caírem na mesma execução.
+        """
+        normalized_message = " ".join(message.casefold().split())
+        history_blob = json.dumps(
+            [[m.get("role"), m.get("content")] for m in history],
+            ensure_ascii=False
+        )
+        history_hash = hashlib.sha256(history_blob.encode("utf-8")).hexdigest()
+        raw_key = f"{(language or '').lower()}|{normalized_message}|{history_hash}"
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def is_running(self, key: Optional[str]) -> bool:
+        """Indica se já existe execução em andamento para a chave."""
+        return bool(key) and key in self._flights
+
+    async def subscribe(
+        self,
+        key: Optional[str],
+        producer_factory: Callable[[], AsyncIterator[tuple]],
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        poll_interval: float = 1.0
+    ):
+        """
+        Entra na execução da chave (ou inicia uma nova) e produz seus eventos.
+
+        Quando o último cliente sai (desconectou ou parou de consumir), a execução
+        é cancelada: ninguém vai ler a resposta, então não faz sentido gastar tokens.
+
+        Args:
+            key: Chave de coalescência. `None` desativa o compartilhamento
+                 (ex: sessões com estado próprio no servidor).
+            producer_factory: Cria o gerador de eventos do grafo. Só é chamado
+                 quando esta requisição é a primeira da chave (líder).
+            is_disconnected: Verifica se o cliente HTTP ainda está conectado
+                 (ex: `Request.is_disconnected`). Consultado a cada `poll_interval`
+                 segundos sem eventos.
+        """
+        flight = self._flights.get(key) if key else None
+
+        if flight is None:
+            flight = Flight(key)
+            if key:
+                self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(flight, producer_factory))
+        else:
+            logger.info(
+                f"Coalescing: requisição anexada à execução {key[:8]} "
+                f"({len(flight.subscribers) + 1} clientes aguardando)."
+            )
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in flight.events:
+            queue.put_nowait(event)
+        if flight.finished:
+            queue.put_nowait(_DONE)
+        flight.subscribers.append(queue)
+
+        try:
+            while True:
+                if is_disconnected is None:
+                    event = await queue.get()
+                else:
+                    try:
+                        event = await asyncio.wait_for(queue.get(), timeout=poll_interval)
+                    except asyncio.TimeoutError:
+                        if await is_disconnected():
+                            logger.info(f"Coalescing: cliente desconectou da execução {(key or '')[:8]}.")
+                            return
+                        continue
+
+                if event is _DONE:
+                    return
+                yield event
+        finally:
+            flight.subscribers.remove(queue)
+            if not flight.subscribers and not flight.finished and flight.task:
+                flight.task.cancel()
+
+    def _publish(self, flight: Flight, event: tuple):
+        flight.events.append(event)
+        for queue in flight.subscribers:
+            queue.put_nowait(event)
+
+    async def _run(self, flight: Flight, producer_factory: Callable[[], AsyncIterator[tuple]]):
+        """
+        Executa o produtor (grafo) uma única vez e distribui cada evento.
+        """
+        try:
+            async for event in producer_factory():
+                self._publish(flight, event)
+        except asyncio.CancelledError:
+            # Todos os clientes saíram: a chave já não tem quem ouvir.
+            logger.info(f"Coalescing: execução {(flight.key or '')[:8]} cancelada (sem clientes).")
+        except Exception as e:
+            logger.error(f"Stream Error: {e}")
+            self._publish(flight, ("error", {"detail": str(e)}))
+        finally:
+            flight.finished = True
+            # Libera a chave: próximas requisições iguais disparam uma nova execução.
+            if flight.key and self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            for queue in flight.subscribers:
+                queue.put_nowait(_DONE)
+
+
+# Singleton: instância global (por processo/worker)
+coalescer = SingleFlight()
@@ -26,10 +26,13 @@ Comunicação:
 import os
 from pathlib import Path
 from enum import Enum
-from typing import List
+from typing import Dict, List
 from pydantic import field_validator, ValidationInfo
 from pydantic_settings import BaseSettings
 
+# Backends de busca vetorial suportados (`VECTOR_BACKEND`).
+VECTOR_BACKENDS = ("chroma", "numpy")
+
 # Base Directory: Points to the 'backend' folder (parent of 'app')
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -41,6 +44,7 @@ class LLMProvider(str, Enum):
     OPENAI = "openai"
     GROQ = "groq"
     GEMINI = "gemini"
+    MOCK = "mock"  # Offline: latência simulada e respostas roteirizadas (app.core.mock_llm)
 
 class ModelTier(str, Enum):
     """
@@ -77,6 +81,26 @@ MODEL_REGISTRY = {
     (LLMProvider.GEMINI, ModelTier.FAST): "gemini-1.5-flash",
     (LLMProvider.GEMINI, ModelTier.MEDIUM): "gemini-1.5-pro",
     (LLMProvider.GEMINI, ModelTier.STRONG): "gemini-1.5-pro",
+
+    (LLMProvider.MOCK, ModelTier.FAST): "mock-fast",
+    (LLMProvider.MOCK, ModelTier.MEDIUM): "mock-medium",
+    (LLMProvider.MOCK, ModelTier.STRONG): "mock-strong",
+}
+
+# Limites por minuto de cada modelo: (RPM, TPM). Valores dos planos gratuitos
+# (OpenAI: Tier 1). Podem ser sobrescritos por `settings.LLM_RATE_LIMITS`.
+# Usados pelo agendador de chamadas (`app.core.llm_scheduler`).
+PROVIDER_RATE_LIMITS = {
+    (LLMProvider.OPENAI, "gpt-4.1-nano"): (500, 200_000),
+    (LLMProvider.OPENAI, "gpt-4.1-mini"): (500, 200_000),
+    (LLMProvider.OPENAI, "gpt-5-nano"): (500, 200_000),
+
+    (LLMProvider.GROQ, "llama-3.1-8b-instant"): (30, 6_000),
+    (LLMProvider.GROQ, "llama-3.1-70b-versatile"): (30, 6_000),
+    (LLMProvider.GROQ, "llama-3.3-70b-versatile"): (30, 12_000),
+
+    (LLMProvider.GEMINI, "gemini-1.5-flash"): (15, 1_000_000),
+    (LLMProvider.GEMINI, "gemini-1.5-pro"): (2, 32_000),
 }
 
 class Settings(BaseSettings):
@@ -98,15 +122,164 @@ class Settings(BaseSettings):
     # Usa path absoluto baseado no BASE_DIR
     CHROMA_DB_DIR: str = os.path.join(str(BASE_DIR), "chroma_db")
     COLLECTION_NAME: str = "marocos_portfolio"
-    
+
+    # Backend de busca: "chroma" (cliente persistente + HNSW) ou "numpy"
+    # (matriz float32 exportada na ingestão, busca exata; ideal para poucas centenas de chunks).
+    # Qualquer outro valor impede a inicialização (ver `validate_vector_backend`).
+    VECTOR_BACKEND: str = "chroma"
+
+    # Busca híbrida: BM25 (termos exatos: nomes de projetos, libs, siglas) + vetorial,
+    # combinadas por Reciprocal Rank Fusion. CANDIDATES = tamanho de cada lista antes da fusão.
+    HYBRID_SEARCH_ENABLED: bool = True
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+
+    # Corte por relevância (similaridade de cosseno com a pergunta):
+    # até MAX_K chunks, ao menos MIN_K; os demais só entram com score >= MIN_SCORE e
+    # a no máximo SCORE_MARGIN abaixo do melhor. Menos chunks fracos = prompts menores.
+    RETRIEVAL_MAX_K: int = 4
+    RETRIEVAL_MIN_K: int = 1
+    RETRIEVAL_MIN_SCORE: float = 0.5
+    RETRIEVAL_SCORE_MARGIN: float = 0.15
+
+    # Orçamento do CONTEXTO (guard + gerador), estimado em ~4 caracteres por token.
+    # Chunks vizinhos são mesclados (sem repetir a sobreposição do splitter) antes do corte.
+    CONTEXT_TOKEN_BUDGET: int = 1500
+
+    # --- Ingestão (Embeddings em lote) ---
+    # Chunks por requisição de embedding (a API do Google aceita até 100 por chamada).
+    # Taxa em chunks/segundo: começa em INITIAL, sobe a cada lote bem-sucedido até MAX
+    # e cai pela metade a cada 429 (nunca abaixo de MIN).
+    INGEST_BATCH_SIZE: int = 50
+    INGEST_INITIAL_RATE: float = 1.0
+    INGEST_MIN_RATE: float = 0.1
+    INGEST_MAX_RATE: float = 20.0
+    INGEST_MAX_RETRIES: int = 6
+    # Só erros transitórios (429, 5xx, timeout, conexão) são repetidos. Chave inválida ou
+    # erro de configuração interrompe a ingestão na hora (chunks vão para a dead-letter).
+    # Teto de espera somando todos os backoffs: passado, o restante vai para a dead-letter
+    # (o boot roda a ingestão antes do servidor e não pode ficar preso nela).
+    INGEST_MAX_RETRY_SECONDS: float = 300.0
+
+    # --- Sessões de Conversa (Checkpointer do LangGraph) ---
+    # Arquivo SQLite onde o estado do grafo (mensagens + resumo) é persistido por `session_id`.
+    # Compartilhado entre os workers do Uvicorn (SQLite em modo WAL).
+    SESSIONS_DB_PATH: str = os.path.join(str(BASE_DIR), "sessions.sqlite")
+    # Retenção: sessões sem turnos há mais de TTL dias são apagadas (checkpoints + writes).
+    # A limpeza roda ao abrir o banco (startup de cada worker) e, depois, no máximo a cada
+    # INTERVAL segundos, aproveitando um turno de sessão. 0 em TTL desativa a limpeza.
+    SESSIONS_TTL_DAYS: float = 30.0
+    SESSIONS_CLEANUP_INTERVAL_SECONDS: int = 3600
+
+    # --- Controle de Admissão (por worker) ---
+    # Quantas execuções do grafo rodam ao mesmo tempo e quantas podem aguardar na fila.
+    # Com a fila cheia, novas requisições recebem 503 imediatamente.
+    # Impacto: o total efetivo é multiplicado pelo número de workers do Uvicorn.
+    MAX_CONCURRENT_RUNS: int = 4
+    MAX_QUEUED_RUNS: int = 16
+
+    # --- Avaliação em Lote (/api/chat/batch) ---
+    # Endpoint interno para regressões: exige o header `X-Batch-Token` com este valor.
+    # Sem token configurado o endpoint fica desativado (404).
+    # Não consome a quota diária do Rate Limit, mas disputa as vagas do Controle de Admissão
+    # (MAX_CONCURRENT_RUNS) com os chats ao vivo: BATCH_MAX_CONCURRENCY só limita quantas
+    # conversas do lote ocupam vaga ou fila ao mesmo tempo.
+    BATCH_API_TOKEN: str | None = None
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # --- Cache de Respostas da LLM (chamadas com temperatura 0) ---
+    # Camada em memória (por worker) + SQLite compartilhado entre os workers.
+    # LLM_CACHE_DB_PATH vazio desativa apenas a camada em disco.
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_DB_PATH: str = os.path.join(str(BASE_DIR), "llm_cache.sqlite")
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_MEMORY_ITEMS: int = 1024
+    LLM_CACHE_MAX_DISK_ENTRIES: int = 50000
+
+    # --- Cache de Embeddings de Consulta ---
+    # Evita vetorizar de novo (chamada de rede) perguntas já vistas.
+    # Chave inclui o EMBEDDING_MODEL: trocar de modelo não reaproveita vetores antigos.
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DB_PATH: str = os.path.join(str(BASE_DIR), "embedding_cache.sqlite")
+    EMBEDDING_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    EMBEDDING_CACHE_MAX_MEMORY_ITEMS: int = 2048
+    EMBEDDING_CACHE_MAX_DISK_ENTRIES: int = 20000
+
+    # --- Store de Embeddings de Documentos (Ingestão) ---
+    # Vetores dos chunks endereçados por hash(modelo + texto), sem TTL.
+    # Fica FORA do CHROMA_DB_DIR: FORCE_REINGEST / `ingest.py --full` apagam o índice,
+    # mas só chamam a API para textos realmente novos. Vazio desativa o store.
+    EMBEDDING_STORE_PATH: str = os.path.join(str(BASE_DIR), "embedding_store", "documents.sqlite")
+    EMBEDDING_STORE_MAX_ENTRIES: int = 100000
+
+    # --- Cache Semântico de Respostas ---
+    # Perguntas equivalentes (cosseno >= limiar, mesmo idioma e classificação) reaproveitam
+    # a resposta final. Só vale para a primeira pergunta da conversa (sem histórico).
+    # Invalidado automaticamente quando o índice vetorial é reconstruído.
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 500
+    SEMANTIC_CACHE_TTL_SECONDS: int = 24 * 3600
+
+    # --- Conexões HTTP com os Provedores (LLM + Embeddings) ---
+    # Um pool por provedor e por worker, compartilhado por todos os tiers e pelos embeddings:
+    # as chamadas de um turno reaproveitam a conexão (sem novo handshake TLS).
+    # HTTP/2 exige o pacote `h2`; sem ele, cai para HTTP/1.1 com keep-alive.
+    HTTP_SHARED_POOL_ENABLED: bool = True
+    HTTP2_ENABLED: bool = True
+    HTTP_POOL_MAX_CONNECTIONS: int = 20
+    HTTP_POOL_MAX_KEEPALIVE: int = 10
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 120.0
+    HTTP_TIMEOUT_SECONDS: float = 60.0
+
     # --- Configurações de Seleção de IA ---
     # Define qual provedor será utilizado como padrão caso não seja especificado outro.
     LLM_PROVIDER: str = "gemini" 
     
+    # --- Roteamento entre Provedores (Failover + Hedging) ---
+    # Provedores alternativos para as instâncias padrão (mesmo tier no MODEL_REGISTRY),
+    # em ordem de preferência. Ex: "groq,openai". Vazio = só o LLM_PROVIDER.
+    # Alternativos sem chave de API configurada são ignorados.
+    LLM_FALLBACK_PROVIDERS: str = ""
+    # Hedge: sem resposta (primeiro token) do principal até o p95 recente, dispara uma
+    # segunda requisição ao alternativo. O atraso fica entre MIN e MAX; sem amostras
+    # suficientes (MIN_SAMPLES), usa MAX.
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_QUANTILE: float = 0.95
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 0.5
+    LLM_HEDGE_MAX_DELAY_SECONDS: float = 5.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_LATENCY_WINDOW: int = 200
+
+    # --- Agendador de Chamadas (RPM/TPM por modelo, compartilhado entre os workers) ---
+    # Cada chamada reserva 1 requisição + tokens estimados numa janela deslizante de 1 minuto
+    # (SQLite). Sem espaço, a chamada espera (até MAX_WAIT) em vez de receber 429 do provedor.
+    # HEADROOM: fração do limite oficial usada (margem para janelas desalinhadas).
+    # LLM_RATE_LIMITS sobrescreve PROVIDER_RATE_LIMITS. Ex: {"groq:llama-3.1-8b-instant": [30, 6000]}
+    LLM_SCHEDULER_ENABLED: bool = True
+    LLM_SCHEDULER_DB_PATH: str = os.path.join(str(BASE_DIR), "llm_usage.sqlite")
+    LLM_SCHEDULER_HEADROOM: float = 0.9
+    LLM_SCHEDULER_MAX_WAIT_SECONDS: float = 10.0
+    LLM_SCHEDULER_DEFAULT_TOKENS: int = 1000
+    LLM_RATE_LIMITS: Dict[str, List[int]] = {}
+
     # Modelo de Embeddings
     # Responsável por converter texto em vetores.
     # Deve ser compatível com os dados já indexados no ChromaDB.
+    # EMBEDDING_PROVIDER: "gemini" ou "mock" (hash das palavras, offline; exige um índice
+    # construído com ele, ex: CHROMA_DB_DIR separado).
+    EMBEDDING_PROVIDER: str = "gemini"
     EMBEDDING_MODEL: str = "models/gemini-embedding-001"
+    MOCK_EMBEDDING_DIM: int = 768
+
+    # --- Provedor Mock (LLM_PROVIDER=mock) ---
+    # Simula o provedor sem rede: espera LATENCY_MS até o primeiro token e depois
+    # TOKENS_PER_SECOND (0 = instantâneo). OUTPUT_TOKENS = tamanho das respostas livres.
+    # MOCK_LLM_RESPONSES sobrescreve respostas: {"trecho do prompt": "resposta"}.
+    MOCK_LLM_LATENCY_MS: float = 0.0
+    MOCK_LLM_TOKENS_PER_SECOND: float = 0.0
+    MOCK_LLM_OUTPUT_TOKENS: int = 60
+    MOCK_LLM_RESPONSES: Dict[str, str] = {}
 
     # --- CORS (Cross-Origin Resource Sharing) ---
     # Lista de origens permitidas (frontend)
@@ -118,6 +291,18 @@ class Settings(BaseSettings):
         "https://www.marocos.dev"
     ]
 
+    @field_validator("VECTOR_BACKEND")
+    @classmethod
+    def validate_vector_backend(cls, v: str):
+        """
+        Aceita apenas os backends implementados no `RagService`.
+        Um erro de digitação (ex: "numpi") abriria o Chroma sem aviso.
+        """
+        backend = v.lower()
+        if backend not in VECTOR_BACKENDS:
+            raise ValueError(f"VECTOR_BACKEND '{v}' inválido. Use um de: {', '.join(VECTOR_BACKENDS)}.")
+        return backend
+
     @field_validator("LLM_PROVIDER")
     @classmethod
     def validate_provider_key(cls, v: str, info: ValidationInfo):
@@ -134,6 +319,7 @@ class Settings(BaseSettings):
             raise ValueError("Provider 'groq' selected but GROQ_API_KEY is missing.")
         if provider == "gemini" and not values.get("GOOGLE_API_KEY"):
             raise ValueError("Provider 'gemini' selected but GOOGLE_API_KEY is missing.")
+        # "mock" roda offline: não exige chave
             
         return v
 
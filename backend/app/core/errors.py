@@ -0,0 +1,80 @@
+"""
+CLASSIFICAÇÃO DE ERROS DOS PROVEDORES (Transitório x Permanente)
+--------------------------------------------------
+Objetivo:
+    Decidir, num único lugar, se um erro de um provedor (LLM ou Embeddings) vale uma nova
+    tentativa. Os SDKs (OpenAI, Groq, Google) usam classes diferentes e o LangChain ainda
+    os envolve nas suas próprias exceções.
+
+Atuação no Sistema:
+    - Backend / Core: Funções puras, sem dependências do restante da aplicação.
+
+Responsabilidades:
+    1. `is_rate_limit_error`: limite de taxa/cota (HTTP 429, `ResourceExhausted`).
+    2. `is_transient_error`: qualquer erro transitório (429, 5xx, timeout, falha de conexão).
+    3. Percorrer a cadeia de causas (`__cause__` / `__context__`) até o erro original.
+
+Comunicação:
+    - Usado por `app.core.llm_router` (failover/hedging) e
+      `app.services.embedding_pipeline` (retentativas da ingestão).
+"""
+
+import asyncio
+from typing import Iterator, Optional
+import httpx
+
+RATE_LIMIT_ERROR_NAMES = ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+TRANSIENT_ERROR_NAMES = RATE_LIMIT_ERROR_NAMES + (
+    "InternalServerError", "ServiceUnavailable", "ServerError",
+    "APITimeoutError", "APIConnectionError", "DeadlineExceeded",
+)
+
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    """O erro e suas causas (o SDK original costuma estar no fim da cadeia)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _status(error: BaseException) -> Optional[int]:
+    for attribute in ("status_code", "code"):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Erro de cota/limite de taxa (HTTP 429).
+    Alguns wrappers só preservam a mensagem, então ela também é inspecionada.
+    """
+    for cause in _error_chain(error):
+        if type(cause).__name__ in RATE_LIMIT_ERROR_NAMES or _status(cause) == 429:
+            return True
+        message = str(cause)
+        if "429" in message or "RESOURCE_EXHAUSTED" in message or "rate limit" in message.lower():
+            return True
+    return False
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Erro transitório do provedor (vale tentar de novo ou outro provedor):
+    429, 5xx, timeout ou falha de conexão.
+    """
+    if is_rate_limit_error(error):
+        return True
+    for cause in _error_chain(error):
+        if isinstance(cause, (asyncio.TimeoutError, httpx.TimeoutException, httpx.TransportError)):
+            return True
+        if type(cause).__name__ in TRANSIENT_ERROR_NAMES:
+            return True
+        status = _status(cause)
+        if status is not None and 500 <= status < 600:
+            return True
+    return False
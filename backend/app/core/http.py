@@ -0,0 +1,116 @@
+"""
+CLIENTES HTTP COMPARTILHADOS (Pool de Conexões)
+--------------------------------------------------
+Objetivo:
+    Reaproveitar conexões TCP/TLS com os provedores de IA. Um turno de conversa faz de 3 a 5
+    chamadas HTTPS seguidas ao mesmo provedor (idioma, gateway, guard, geração, embeddings);
+    com um pool por cliente de SDK, cada tier abria (e pagava o handshake TLS de) sua própria
+    conexão.
+
+Atuação no Sistema:
+    - Backend / Core: Injetado pela `app.core.llm.get_llm` e pelo `RagService` nos SDKs.
+
+Responsabilidades:
+    1. Um `httpx.Client` e um `httpx.AsyncClient` por provedor e por processo, compartilhados
+       por todos os tiers (fast/medium/strong) e, no Google, também pelos embeddings.
+    2. Keep-alive e tamanho do pool configuráveis (`settings.HTTP_*`).
+    3. HTTP/2 quando o pacote `h2` estiver instalado (multiplexa as chamadas concorrentes
+       numa única conexão); sem ele, HTTP/1.1 com keep-alive.
+    4. Fechar os clientes no shutdown do servidor.
+
+Limitações:
+    - O `AsyncClient` fica preso ao event loop onde abriu as conexões: pensado para o
+      servidor (um loop por worker). Scripts que chamam `asyncio.run` várias vezes devem
+      usar os clientes síncronos.
+    - O `ChatGoogleGenerativeAI`/`GoogleGenerativeAIEmbeddings` não aceitam um cliente httpx
+      no construtor: o cliente do SDK `google-genai` é recriado com as mesmas opções + o pool
+      compartilhado (`share_google_client`).
+
+Comunicação:
+    - Configurado por `settings.HTTP_*`.
+    - Fechado por `main.lifespan` (`close_http_clients`).
+"""
+
+import importlib.util
+import threading
+from typing import Dict
+import httpx
+from app.core.config import settings
+from app.core.logger import logger
+
+_sync_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_lock = threading.Lock()
+
+
+def _http2_enabled() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2_ENABLED=true, mas o pacote 'h2' não está instalado. Usando HTTP/1.1.")
+        return False
+    return True
+
+
+def _client_options() -> dict:
+    return {
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        "timeout": httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS, connect=10.0),
+    }
+
+
+def get_http_client(provider: str) -> httpx.Client:
+    """Cliente síncrono compartilhado do provedor (criado no primeiro uso)."""
+    with _lock:
+        if provider not in _sync_clients:
+            _sync_clients[provider] = httpx.Client(**_client_options())
+        return _sync_clients[provider]
+
+
+def get_async_http_client(provider: str) -> httpx.AsyncClient:
+    """Cliente assíncrono compartilhado do provedor (criado no primeiro uso)."""
+    with _lock:
+        if provider not in _async_clients:
+            _async_clients[provider] = httpx.AsyncClient(**_client_options())
+        return _async_clients[provider]
+
+
+def share_google_client(model, provider: str = "gemini"):
+    """
+    Troca o cliente `google-genai` de um modelo/embedding do LangChain por um equivalente
+    que usa o pool compartilhado. Mantém URL, cabeçalhos e credenciais do original.
+    Em caso de incompatibilidade (mudança interna do SDK), mantém o cliente original.
+    """
+    if not settings.HTTP_SHARED_POOL_ENABLED:
+        return model
+    try:
+        from google.genai import Client
+
+        api_client = model.client._api_client
+        http_options = api_client._http_options.model_copy(update={
+            "httpx_client": get_http_client(provider),
+            "httpx_async_client": get_async_http_client(provider),
+        })
+        model.client = Client(api_key=api_client.api_key, http_options=http_options)
+    except Exception as e:
+        logger.warning(f"Pool HTTP compartilhado indisponível para {type(model).__name__}: {e}")
+    return model
+
+
+async def close_http_clients():
+    """Fecha todos os clientes compartilhados (shutdown do servidor)."""
+    with _lock:
+        sync_clients = list(_sync_clients.values())
+        async_clients = list(_async_clients.values())
+        _sync_clients.clear()
+        _async_clients.clear()
+
+    for client in sync_clients:
+        client.close()
+    for client in async_clients:
+        await client.aclose()
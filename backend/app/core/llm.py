@@ -3,7 +3,7 @@ FACTORY DE MODELOS DE LINGUAGEM (LLM)
 --------------------------------------------------
 Objetivo:
     Centralizar a lógica de criação e configuração de instâncias de modelos de linguagem (LLMs).
-    Implementa o padrão "Factory" para permitir a troca dinâmica entre provedores (OpenAI, Groq, Gemini)
+    Implementa o padrão "Factory" para permitir a troca dinâmica entre provedores (OpenAI, Groq, Gemini, Mock offline)
     e níveis de capacidade (Fast, Medium, Strong) sem alterar o código dos agentes.
 
 Atuação no Sistema:
@@ -15,18 +15,40 @@ Responsabilidades:
     2. Resolver o nome técnico do modelo usando o registro de configuração.
     3. Instanciar a classe correta do LangChain com as credenciais apropriadas.
     4. Fornecer instâncias padrão (Precise, RAG, Creative) para uso rápido.
+    5. Plugar o cache de respostas nas chamadas determinísticas (temperatura 0).
+    6. Conectar todos os modelos de um provedor ao mesmo pool HTTP (`app.core.http`).
+    7. Montar o roteamento com failover/hedging entre provedores (`app.core.llm_router`)
+       quando `LLM_FALLBACK_PROVIDERS` estiver configurado.
+    8. Agendar as chamadas dentro dos limites RPM/TPM de cada modelo (`app.core.llm_scheduler`).
+
+Carregamento Preguiçoso (Lazy):
+    - O SDK de cada provedor (langchain_openai, langchain_groq, langchain_google_genai) só é
+      importado quando um modelo daquele provedor é criado. Importar os três custava ~1s+
+      por processo (4 workers + scripts), mesmo usando um só.
+    - As instâncias padrão (`llm_fast`, `llm_medium`, ...) são criadas no primeiro acesso
+      ao nome (PEP 562), então uma instância que nenhum nó importa nunca é construída.
+    - Medição: `python benchmarks/import_time.py`.
 
 Comunicação:
     - Importa configurações de `app.core.config`.
     - É importado por `nodes.py` e outros módulos que necessitam de processamento de IA.
 """
 
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
+import threading
+from langchain_core.caches import BaseCache
 from app.core.config import settings, LLMProvider, ModelTier, MODEL_REGISTRY
+from app.core.cache import get_llm_cache
+from app.core.llm_scheduler import get_llm_scheduler
+from app.core.logger import logger
+from app.core.http import get_http_client, get_async_http_client, share_google_client
 
-def get_llm(provider: LLMProvider | str, tier: ModelTier | str, temperature: float = 0.5, **kwargs):
+def get_llm(
+    provider: LLMProvider | str,
+    tier: ModelTier | str,
+    temperature: float = 0.5,
+    cache: BaseCache | bool | None = None,
+    **kwargs
+):
     """
     Cria e retorna uma instância de modelo de linguagem configurada (Factory Method).
     
@@ -40,9 +62,12 @@ def get_llm(provider: LLMProvider | str, tier: ModelTier | str, temperature: flo
         - Dinamicamente, se algum agente precisar de um modelo específico sob demanda.
 
     Args:
-        provider: O fornecedor da IA ('openai', 'groq', 'gemini'). Aceita Enum ou string.
+        provider: O fornecedor da IA ('openai', 'groq', 'gemini', 'mock'). Aceita Enum ou string.
         tier: O nível de capacidade desejado ('fast', 'medium', 'strong'). Aceita Enum ou string.
         temperature: Nível de criatividade (0.0 = determinístico, 1.0 = criativo). Padrão 0.5.
+        cache: Cache de respostas (exact-match). `None` = automático: usa o cache compartilhado
+               (memória + SQLite) apenas quando `temperature == 0`, pois só aí a saída é função
+               do prompt. `False` desativa; uma instância de `BaseCache` é usada diretamente.
         **kwargs: Parâmetros adicionais suportados pelos modelos (ex: max_tokens, timeout).
 
     Returns:
@@ -81,12 +106,44 @@ def get_llm(provider: LLMProvider | str, tier: ModelTier | str, temperature: flo
         # Interrompe a execução para evitar chamadas de API inválidas.
         raise ValueError(f"Model configuration not found for Provider: {provider} and Tier: {tier}.")
 
+    # --------------------------------------------------
+    # Cache de Respostas
+    # --------------------------------------------------
+    # O LangChain consulta o cache antes de chamar a API (inclusive em streaming).
+    # A chave inclui provider/classe, modelo, temperatura e as mensagens renderizadas.
+    if cache is None:
+        cache = get_llm_cache() if temperature == 0 else None
+    if cache is not None:
+        kwargs["cache"] = cache
+
+    # --------------------------------------------------
+    # Agendador RPM/TPM
+    # --------------------------------------------------
+    # Só é consultado quando o cache erra (chamada real à API). O callback lê o consumo
+    # real de tokens da resposta e corrige a estimativa reservada.
+    scheduler = get_llm_scheduler()
+    limiter = scheduler.get_limiter(provider.value, model_name) if scheduler else None
+    if limiter is not None:
+        kwargs.setdefault("rate_limiter", limiter)
+        kwargs["callbacks"] = [*(kwargs.get("callbacks") or []), limiter.usage_callback]
+
+    # --------------------------------------------------
+    # Pool HTTP Compartilhado
+    # --------------------------------------------------
+    # Todos os tiers do provedor usam as mesmas conexões (keep-alive / HTTP/2).
+    # Um `http_client` passado explicitamente pelo chamador tem prioridade.
+    if settings.HTTP_SHARED_POOL_ENABLED and provider in (LLMProvider.OPENAI, LLMProvider.GROQ):
+        kwargs.setdefault("http_client", get_http_client(provider.value))
+        kwargs.setdefault("http_async_client", get_async_http_client(provider.value))
+
     # --------------------------------------------------
     # Instanciação Condicional (Factory Logic)
     # --------------------------------------------------
     # Seleciona a classe correta do LangChain e injeta as credenciais apropriadas.
     
+    # Import do SDK dentro do ramo: só o provedor em uso é carregado.
     if provider == LLMProvider.OPENAI:
+        from langchain_openai import ChatOpenAI
         return ChatOpenAI(
             model=model_name,
             temperature=temperature,
@@ -95,49 +152,159 @@ def get_llm(provider: LLMProvider | str, tier: ModelTier | str, temperature: flo
         )
     
     elif provider == LLMProvider.GEMINI:
-        return ChatGoogleGenerativeAI(
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        # Não aceita cliente httpx no construtor: o pool é plugado depois (share_google_client)
+        return share_google_client(ChatGoogleGenerativeAI(
             model=model_name,
             temperature=temperature,
             google_api_key=settings.GOOGLE_API_KEY,
             convert_system_message_to_human=True, # Ajuste necessário para compatibilidade de papéis no Gemini
             **kwargs
-        )
+        ))
     
     elif provider == LLMProvider.GROQ:
+        from langchain_groq import ChatGroq
         return ChatGroq(
             model=model_name,
             temperature=temperature,
             api_key=settings.GROQ_API_KEY,
             **kwargs
         )
+
+    elif provider == LLMProvider.MOCK:
+        # Offline (benchmarks/CI): sem credenciais nem rede
+        from app.core.mock_llm import MockChatModel
+        return MockChatModel(
+            model=model_name,
+            temperature=temperature,
+            latency_ms=settings.MOCK_LLM_LATENCY_MS,
+            tokens_per_second=settings.MOCK_LLM_TOKENS_PER_SECOND,
+            output_tokens=settings.MOCK_LLM_OUTPUT_TOKENS,
+            responses=settings.MOCK_LLM_RESPONSES,
+            **kwargs
+        )
     
     else:
         # Caso um novo Enum seja adicionado mas não tratado aqui
         raise ValueError(f"Provider {provider} not supported.")
 
+PROVIDER_API_KEYS = {
+    LLMProvider.OPENAI: "OPENAI_API_KEY",
+    LLMProvider.GROQ: "GROQ_API_KEY",
+    LLMProvider.GEMINI: "GOOGLE_API_KEY",
+    LLMProvider.MOCK: None,  # Não exige chave
+}
+
+
+def get_routed_llm(
+    tier: ModelTier | str,
+    temperature: float = 0.5,
+    providers: list | None = None,
+    cache: BaseCache | bool | None = None,
+    **kwargs
+):
+    """
+    Cria o modelo do `tier` no provedor padrão com failover/hedging para os alternativos.
+
+    Args:
+        tier: Nível de capacidade (o mesmo em todos os provedores).
+        temperature: Temperatura de todos os modelos da rota.
+        providers: Provedores em ordem de preferência. `None` = `LLM_PROVIDER` seguido de
+                   `LLM_FALLBACK_PROVIDERS`.
+        cache: Mesma regra da `get_llm`, mas aplicada ao roteador (os modelos internos não
+               usam cache: em streaming ele não seria consultado).
+        **kwargs: Repassados a cada `get_llm`.
+
+    Returns:
+        `RoutedChatModel`, ou o modelo do provedor padrão se não houver alternativo utilizável.
+    """
+    if providers is None:
+        providers = [settings.LLM_PROVIDER] + [
+            name.strip() for name in settings.LLM_FALLBACK_PROVIDERS.split(",") if name.strip()
+        ]
+
+    # Normaliza, remove repetidos e alternativos sem credencial ou sem modelo no tier
+    tier = ModelTier(tier.lower()) if isinstance(tier, str) else tier
+    route = []
+    for name in providers:
+        provider = LLMProvider(name.lower()) if isinstance(name, str) else name
+        if provider in route:
+            continue
+        key_name = PROVIDER_API_KEYS[provider]
+        if route and ((key_name and not getattr(settings, key_name)) or (provider, tier) not in MODEL_REGISTRY):
+            logger.warning(f"⚠️ [LLM] Provedor alternativo '{provider.value}' ignorado (sem chave de API ou modelo para o tier '{tier.value}').")
+            continue
+        route.append(provider)
+
+    if len(route) == 1:
+        return get_llm(provider=route[0], tier=tier, temperature=temperature, cache=cache, **kwargs)
+
+    from app.core.llm_router import RoutedChatModel
+
+    if cache is None:
+        cache = get_llm_cache() if temperature == 0 else None
+    return RoutedChatModel(
+        models=[
+            get_llm(provider=provider, tier=tier, temperature=temperature, cache=False, **kwargs)
+            for provider in route
+        ],
+        cache=cache,
+        hedge_enabled=settings.LLM_HEDGE_ENABLED,
+        hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+        hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+        hedge_max_delay=settings.LLM_HEDGE_MAX_DELAY_SECONDS,
+        latency_window=settings.LLM_LATENCY_WINDOW,
+        min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+    )
+
 # --------------------------------------------------
-# Instâncias Padrão (Singletons)
+# Instâncias Padrão (Singletons, criadas sob demanda)
 # --------------------------------------------------
-# Criamos aqui as instâncias globais usadas pela maioria dos nós do grafo.
+# Instâncias globais usadas pela maioria dos nós do grafo.
 # Isso evita recriar conexões a cada requisição e centraliza o perfil de uso.
+# Cada uma é construída no primeiro acesso (ex: `from app.core.llm import llm_fast`)
+# com o provider padrão definido no .env (e os alternativos de LLM_FALLBACK_PROVIDERS).
+DEFAULT_LLM_PROFILES = {
+    # 1. Modelo Fast (Router/Classificação/Tasks Simples)
+    # Foco: Velocidade e eficiência. Temperatura 0 para garantir consistência lógica e decisões rápidas.
+    # Uso: RouterNode, Detector de Idioma, Summarize.
+    "llm_fast": (ModelTier.FAST, 0.0),
+
+    # 2. Modelo Medium (RAG/Equilibrado)
+    # Foco: Capacidade de contexto e raciocínio moderado.
+    # Temperatura baixa (0.2) para evitar alucinações no RAG, mas permitir fluidez.
+    # Uso: GenerateRAGNode.
+    "llm_medium": (ModelTier.MEDIUM, 0.1),
+    "llm_medium_no_temp": (ModelTier.MEDIUM, 0.0),
+
+    # 3. Modelo Strong (Complexidade/Criatividade Controlada)
+    # Foco: Profundidade e melhor raciocínio.
+    # Pode ser usado para traduções mais nuançadas ou tarefas que exijam "inteligência" superior.
+    # Nenhum nó usa hoje: com o carregamento preguiçoso, não custa nada até ser importado.
+    "llm_strong": (ModelTier.STRONG, 0.5),
+}
+
+_default_llms = {}
+_default_llms_lock = threading.Lock()
+
+
+def get_default_llm(name: str):
+    """
+    Retorna (criando na primeira chamada) a instância padrão `name` de `DEFAULT_LLM_PROFILES`.
+    """
+    llm = _default_llms.get(name)
+    if llm is not None:
+        return llm
+
+    with _default_llms_lock:
+        if name not in _default_llms:
+            tier, temperature = DEFAULT_LLM_PROFILES[name]
+            _default_llms[name] = get_routed_llm(tier=tier, temperature=temperature)
+        return _default_llms[name]
+
 
-# Lê o provider padrão definido no 
-default_provider = settings.LLM_PROVIDER
-
-# 1. Modelo Fast (Router/Classificação/Tasks Simples)
-# Foco: Velocidade e eficiência. Temperatura 0 para garantir consistência lógica e decisões rápidas.
-# Uso: RouterNode, Detector de Idioma, Summarize.
-llm_fast = get_llm(provider=default_provider, tier=ModelTier.FAST, temperature=0.0)
-
-# 2. Modelo Medium (RAG/Equilibrado)
-# Foco: Capacidade de contexto e raciocínio moderado.
-# Temperatura baixa (0.2) para evitar alucinações no RAG, mas permitir fluidez.
-# Uso: GenerateRAGNode.
-llm_medium = get_llm(provider=default_provider, tier=ModelTier.MEDIUM, temperature=0.1)
-llm_medium_no_temp = get_llm(provider=default_provider, tier=ModelTier.MEDIUM, temperature=0.0)
-
-# 3. Modelo Strong (Complexidade/Criatividade Controlada)
-# Foco: Profundidade e melhor raciocínio.
-# Pode ser usado para traduções mais nuançadas ou tarefas que exijam "inteligência" superior.
-# Uso: TranslatorNode, GenerateCasual (embora casual seja simples, o strong pode dar melhores nuances se necessário, ou usamos fast com high temp).
-llm_strong = get_llm(provider=default_provider, tier=ModelTier.STRONG, temperature=0.5)
\ No newline at end of file
+def __getattr__(name: str):
+    # PEP 562: `llm_fast`, `llm_medium`... continuam importáveis como atributos do módulo.
+    if name in DEFAULT_LLM_PROFILES:
+        return get_default_llm(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,261 @@
+"""
+ROTEAMENTO ENTRE PROVEDORES DE LLM (Failover + Hedging)
+--------------------------------------------------
+Objetivo:
+    Evitar que um provedor lento ou com limite de taxa estourado trave todos os nós do grafo.
+    Cada tier (fast/medium/strong) passa a ter um modelo principal e alternativos (o mesmo
+    tier de outros provedores do `MODEL_REGISTRY`).
+
+Atuação no Sistema:
+    - Backend / Core: Criado por `app.core.llm.get_routed_llm` para as instâncias padrão.
+      Para os nós é um `BaseChatModel` comum (`prompt | llm_fast`).
+
+Responsabilidades:
+    1. Failover: erro transitório (429, 5xx, timeout, falha de conexão) passa a chamada para
+       o próximo modelo da lista. Erros de requisição (400, 401...) sobem direto.
+    2. Hedging: se o principal não responder até o p95 da sua própria latência recente,
+       dispara uma segunda requisição ao alternativo. A primeira resposta vence e a outra é
+       cancelada. No streaming, "responder" = primeiro token (TTFT).
+    3. Cache de respostas no próprio roteador (a chave inclui a lista de modelos), pois o
+       streaming dos modelos internos não consulta o cache.
+
+Limitações:
+    - Depois do primeiro token de um stream não há failover (o cliente já recebeu parte da
+      resposta).
+    - Só as respostas do principal (quando ele vence) alimentam o p95. Enquanto não houver
+      amostras suficientes, o hedge usa `LLM_HEDGE_MAX_DELAY_SECONDS`.
+    - O hedge pode dobrar o custo das chamadas mais lentas (~5% com o quantil 0.95).
+
+Comunicação:
+    - Configurado por `settings.LLM_FALLBACK_PROVIDERS` e `settings.LLM_HEDGE_*`.
+    - Erros transitórios classificados por `app.core.errors`.
+    - Contadores `llm_hedges`, `llm_hedge_wins` e `llm_failovers` em `app.core.metrics`.
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, List, Optional, Tuple
+from pydantic import ConfigDict, PrivateAttr
+from langchain_core.callbacks import (
+    AsyncCallbackManager,
+    AsyncCallbackManagerForLLMRun,
+    CallbackManager,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from app.core.errors import is_transient_error
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+# Tag que o LangGraph usa para não repassar tokens de um modelo ao stream "messages".
+# As chamadas internas recebem a tag: só os tokens do roteador (do vencedor) chegam ao cliente.
+NOSTREAM_TAG = "nostream"
+
+class LatencyTracker:
+    """
+    Janela deslizante das latências recentes (segundos) de um modelo.
+    """
+    def __init__(self, window: int, min_samples: int):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantil `q` das amostras (None enquanto houver menos que `min_samples`)."""
+        with self._lock:
+            if len(self._samples) < self._min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class RoutedChatModel(BaseChatModel):
+    """
+    Chat model que distribui cada chamada entre `models` (principal primeiro).
+    """
+    models: List[BaseChatModel]
+    hedge_enabled: bool = True
+    hedge_quantile: float = 0.95
+    hedge_min_delay: float = 0.5
+    hedge_max_delay: float = 5.0
+    latency_window: int = 200
+    min_samples: int = 20
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    _latency: dict = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any):
+        # Chamadas em streaming medem o primeiro token; as demais, a resposta inteira.
+        self._latency = {
+            mode: LatencyTracker(self.latency_window, self.min_samples)
+            for mode in ("invoke", "stream")
+        }
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict:
+        # Entra na chave do cache: trocar a lista de modelos não reaproveita respostas antigas.
+        return {"models": [model._get_llm_string() for model in self.models]}
+
+    def hedge_delay(self, mode: str) -> float:
+        """Espera antes do hedge: p95 recente do principal, limitado a [min, max]."""
+        observed = self._latency[mode].quantile(self.hedge_quantile)
+        if observed is None:
+            return self.hedge_max_delay
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, observed))
+
+    def _child_config(self, run_manager) -> dict:
+        """Config das chamadas internas: aninhadas na execução do roteador, sem repassar tokens."""
+        callbacks = None
+        if run_manager is not None:
+            # Mesmo procedimento do `get_child` das execuções de chain (LLM runs não têm)
+            manager_cls = AsyncCallbackManager if isinstance(run_manager, AsyncCallbackManagerForLLMRun) else CallbackManager
+            callbacks = manager_cls(handlers=[], parent_run_id=run_manager.run_id)
+            callbacks.set_handlers(run_manager.inheritable_handlers)
+            callbacks.add_tags(run_manager.inheritable_tags)
+            callbacks.add_metadata(run_manager.inheritable_metadata)
+        return {"callbacks": callbacks, "tags": [NOSTREAM_TAG]}
+
+    # --------------------------------------------------
+    # Corrida entre os modelos
+    # --------------------------------------------------
+    async def _race(self, mode: str, start: Callable[[int], Awaitable[Any]], discard: Optional[Callable[[Any], Awaitable[None]]] = None) -> Tuple[Any, int]:
+        """
+        Executa `start(i)` no principal e, conforme necessário, nos alternativos.
+
+        - Hedge: uma única requisição extra, disparada quando o principal passa do atraso.
+        - Failover: a cada erro transitório sem outra tentativa em andamento, o próximo modelo.
+
+        Returns:
+            (resultado do vencedor, índice do modelo vencedor)
+        """
+        loop = asyncio.get_running_loop()
+        pending = {}
+        next_index = 0
+        hedged = not self.hedge_enabled or len(self.models) < 2
+        hedge_index = None
+        started_at = loop.time()
+        hedge_at = started_at + self.hedge_delay(mode)
+
+        def launch():
+            nonlocal next_index
+            task = asyncio.ensure_future(start(next_index))
+            pending[task] = (next_index, loop.time())
+            next_index += 1
+
+        launch()
+        try:
+            while True:
+                timeout = None
+                if not hedged and next_index < len(self.models):
+                    timeout = max(0.0, hedge_at - loop.time())
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    hedge_index = next_index
+                    metrics.increment("llm_hedges")
+                    logger.info(f"⏱️ [LLM ROUTER] Sem resposta em {hedge_at - started_at:.2f}s. Hedge para {self._name(next_index)}.")
+                    launch()
+                    continue
+
+                for task in done:
+                    index, launched_at = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if index == 0:
+                            self._latency[mode].record(loop.time() - launched_at)
+                        elif index == hedge_index:
+                            metrics.increment("llm_hedge_wins")
+                        # Os demais (em andamento ou terminados junto) são descartados no `finally`
+                        return task.result(), index
+
+                    if pending:
+                        # Outra tentativa ainda em andamento: ela decide
+                        continue
+                    if not is_transient_error(error) or next_index >= len(self.models):
+                        raise error
+                    metrics.increment("llm_failovers")
+                    logger.warning(f"⚠️ [LLM ROUTER] {self._name(index)} falhou ({type(error).__name__}). Failover para {self._name(next_index)}.")
+                    hedged = True  # O failover já é a segunda tentativa
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            results = await asyncio.gather(*pending, return_exceptions=True)
+            if discard:
+                for result in results:
+                    if not isinstance(result, BaseException):
+                        await discard(result)
+
+    def _name(self, index: int) -> str:
+        model = self.models[index]
+        return getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__
+
+    # --------------------------------------------------
+    # Interface do BaseChatModel
+    # --------------------------------------------------
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        config = self._child_config(run_manager)
+
+        async def start(index: int):
+            return await self.models[index].ainvoke(messages, config=config, stop=stop, **kwargs)
+
+        message, _ = await self._race("invoke", start)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        config = self._child_config(run_manager)
+
+        async def start(index: int):
+            # A corrida termina no primeiro token; o stream vencedor continua daqui
+            stream = self.models[index].astream(messages, config=config, stop=stop, **kwargs)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        async def discard(result):
+            await result[0].aclose()
+
+        (stream, first), _ = await self._race("stream", start, discard)
+        try:
+            if first is None:
+                return
+            yield ChatGenerationChunk(message=first)
+            async for chunk in stream:
+                yield ChatGenerationChunk(message=chunk)
+        finally:
+            await stream.aclose()
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        # Caminho síncrono (scripts): só failover sequencial, sem hedge.
+        config = self._child_config(run_manager)
+        for index, model in enumerate(self.models):
+            started_at = time.perf_counter()
+            try:
+                message = model.invoke(messages, config=config, stop=stop, **kwargs)
+            except Exception as e:
+                if not is_transient_error(e) or index == len(self.models) - 1:
+                    raise
+                metrics.increment("llm_failovers")
+                logger.warning(f"⚠️ [LLM ROUTER] {self._name(index)} falhou ({type(e).__name__}). Failover para {self._name(index + 1)}.")
+                continue
+            if index == 0:
+                self._latency["invoke"].record(time.perf_counter() - started_at)
+            return ChatResult(generations=[ChatGeneration(message=message)])
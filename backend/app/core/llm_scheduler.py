@@ -0,0 +1,410 @@
+"""
+AGENDADOR DE CHAMADAS ÀS LLMs (RPM/TPM por Modelo)
+--------------------------------------------------
+Objetivo:
+    Respeitar os limites por minuto (requisições e tokens) dos provedores do lado do cliente.
+    Os 4 workers do Uvicorn chamavam as APIs sem coordenação e só descobriam o limite pelo
+    429 no meio da conversa. Agora uma rajada é suavizada: a chamada espera alguns
+    instantes pela sua vez em vez de falhar.
+
+Atuação no Sistema:
+    - Backend / Core: Plugado em cada modelo pela `app.core.llm.get_llm`, via parâmetro
+      `rate_limiter` do LangChain (consultado só quando o cache de respostas erra) e um
+      callback que lê o consumo real de tokens.
+
+Responsabilidades:
+    1. Contabilizar requisições e tokens por `provedor:modelo` num SQLite (WAL) compartilhado
+       entre os workers, em janelas de 1 minuto (contador de janela deslizante: janela atual
+       + anterior ponderada pelo tempo que falta).
+    2. Reservar 1 requisição + tokens estimados antes de cada chamada. A estimativa é a média
+       móvel do consumo real do modelo neste processo; o callback corrige a reserva com o
+       `usage_metadata` da resposta. Só respostas que passaram pelo limiter (com reserva em
+       aberto) corrigem a janela e a média: acertos do cache de respostas também disparam o
+       callback (com `total_tokens` preservado), mas não consumiram cota.
+    3. Sem espaço na janela: esperar o tempo calculado e tentar de novo. Passado
+       `LLM_SCHEDULER_MAX_WAIT_SECONDS`, a chamada segue (o provedor decide).
+    4. Expor a utilização atual (`GET /api/metrics`).
+
+Limitações:
+    - Limites vêm da configuração (`PROVIDER_RATE_LIMITS` / `LLM_RATE_LIMITS`), não dos
+      cabeçalhos do provedor. Outros clientes usando a mesma chave não são vistos.
+    - Falha no SQLite nunca bloqueia a chamada (a LLM é chamada sem agendamento).
+
+Comunicação:
+    - Configurado por `settings.LLM_SCHEDULER_*`.
+    - Contadores `llm_scheduler_delays`, `llm_scheduler_wait_ms` e `llm_scheduler_overflows`
+      em `app.core.metrics`.
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+from app.core.config import settings, PROVIDER_RATE_LIMITS
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+WINDOW_SECONDS = 60.0
+
+# Menor espera entre tentativas (evita girar em vão no fim da janela).
+MIN_WAIT_SECONDS = 0.05
+
+# Peso da última chamada na média móvel de tokens por chamada.
+TOKENS_EWMA_ALPHA = 0.2
+
+# Reservas em aberto (chamadas sem resposta) guardadas por limiter.
+MAX_OPEN_RESERVATIONS = 256
+
+
+class UsageStore:
+    """
+    Contadores (requisições, tokens) por chave e janela de 1 minuto, em SQLite.
+
+    A reserva roda numa transação `BEGIN IMMEDIATE`: ler o uso e gravar a reserva é atômico
+    entre os processos (dois workers nunca ocupam a mesma vaga).
+    A conexão é aberta sob demanda (o módulo pode ser importado sem tocar no disco).
+    """
+    PRUNE_EVERY = 200
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # isolation_level=None: transações explícitas (BEGIN IMMEDIATE)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                "key TEXT NOT NULL, window INTEGER NOT NULL, requests INTEGER NOT NULL, "
+                "tokens INTEGER NOT NULL, PRIMARY KEY (key, window))"
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _window(now: float) -> Tuple[int, float]:
+        """(janela atual, peso da janela anterior)."""
+        window = int(now // WINDOW_SECONDS)
+        elapsed = now - window * WINDOW_SECONDS
+        return window, 1.0 - elapsed / WINDOW_SECONDS
+
+    def _read(self, conn: sqlite3.Connection, key: str, window: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        rows = dict(
+            (row[0], (row[1], row[2])) for row in conn.execute(
+                "SELECT window, requests, tokens FROM usage WHERE key = ? AND window >= ?",
+                (key, window - 1)
+            )
+        )
+        return rows.get(window, (0, 0)), rows.get(window - 1, (0, 0))
+
+    def _add(self, conn: sqlite3.Connection, key: str, window: int, requests: int, tokens: int):
+        conn.execute(
+            "INSERT INTO usage (key, window, requests, tokens) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key, window) DO UPDATE SET "
+            "requests = requests + excluded.requests, tokens = MAX(0, tokens + excluded.tokens)",
+            (key, window, requests, tokens)
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM usage WHERE window < ?", (window - 1,))
+
+    def reserve(self, key: str, rpm: int, tpm: int, tokens: int, force: bool = False, now: Optional[float] = None) -> float:
+        """
+        Reserva 1 requisição + `tokens` na janela atual.
+
+        Returns:
+            0 se reservou; senão, quantos segundos esperar antes de tentar de novo.
+            Com `force`, reserva mesmo acima do limite.
+        """
+        now = time.time() if now is None else now
+        window, previous_weight = self._window(now)
+        remaining = WINDOW_SECONDS * previous_weight
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (current_requests, current_tokens), (previous_requests, previous_tokens) = self._read(conn, key, window)
+                used_requests = current_requests + previous_requests * previous_weight
+                used_tokens = current_tokens + previous_tokens * previous_weight
+
+                waits = []
+                if rpm and used_requests + 1 > rpm:
+                    waits.append(self._decay_wait(used_requests + 1 - rpm, previous_requests, remaining))
+                # Uma chamada maior que o TPM inteiro passa sozinha (janela vazia)
+                if tpm and used_tokens + tokens > tpm and used_tokens >= 1:
+                    waits.append(self._decay_wait(used_tokens + tokens - tpm, previous_tokens, remaining))
+
+                if waits and not force:
+                    conn.execute("ROLLBACK")
+                    return max(MIN_WAIT_SECONDS, max(waits))
+
+                self._add(conn, key, window, 1, tokens)
+                conn.execute("COMMIT")
+                return 0.0
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _decay_wait(excess: float, previous: int, remaining: float) -> float:
+        """
+        Tempo até o excesso sair da janela: a janela anterior "vaza" `previous / 60` por
+        segundo. Se não bastar, espera a virada (a atual passa a ser a anterior e vaza).
+        """
+        if previous > 0:
+            wait = excess * WINDOW_SECONDS / previous
+            if wait <= remaining:
+                return wait
+        return remaining
+
+    def adjust(self, key: str, tokens: int, now: Optional[float] = None):
+        """Corrige os tokens da janela atual (consumo real - estimativa reservada)."""
+        window, _ = self._window(time.time() if now is None else now)
+        with self._lock:
+            conn = self._connect()
+            self._add(conn, key, window, 0, tokens)
+
+    def usage(self, now: Optional[float] = None) -> Dict[str, Tuple[float, float]]:
+        """Uso atual (requisições, tokens) de cada chave com atividade no último minuto."""
+        window, previous_weight = self._window(time.time() if now is None else now)
+        totals: Dict[str, Tuple[float, float]] = {}
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, window, requests, tokens FROM usage WHERE window >= ?", (window - 1,)
+            ).fetchall()
+        for key, row_window, requests, tokens in rows:
+            weight = 1.0 if row_window == window else previous_weight
+            used_requests, used_tokens = totals.get(key, (0.0, 0.0))
+            totals[key] = (used_requests + requests * weight, used_tokens + tokens * weight)
+        return totals
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ProviderRateLimiter(BaseRateLimiter):
+    """
+    Rate limiter do LangChain para um `provedor:modelo`, respaldado pelo `UsageStore`.
+    """
+    def __init__(self, store: UsageStore, key: str, rpm: int, tpm: int, max_wait: float, default_tokens: int):
+        self.store = store
+        self.key = key
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_wait = max_wait
+        self.tokens_per_call = float(default_tokens)
+        self.usage_callback = UsageCallback(self)
+        # Tokens reservados por chamada ainda sem resposta (FIFO: a ordem de término entre
+        # chamadas simultâneas pode diferir, mas as estimativas são da mesma ordem).
+        # Limitado: respostas sem `usage_metadata` nunca consomem a sua reserva.
+        self._reservations: Deque[int] = deque(maxlen=MAX_OPEN_RESERVATIONS)
+        self._reservations_lock = threading.Lock()
+
+    @property
+    def estimated_tokens(self) -> int:
+        return int(self.tokens_per_call)
+
+    def _reserve(self, force: bool = False) -> float:
+        tokens = self.estimated_tokens
+        try:
+            wait = self.store.reserve(self.key, self.rpm, self.tpm, tokens, force=force)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM scheduler indisponível ({self.key}): {e}")
+            return 0.0
+        if wait == 0:
+            with self._reservations_lock:
+                self._reservations.append(tokens)
+        return wait
+
+    def _pop_reservation(self) -> Optional[int]:
+        with self._reservations_lock:
+            return self._reservations.popleft() if self._reservations else None
+
+    def _next_wait(self, waited: float) -> Optional[float]:
+        """Espera da próxima tentativa (None = desistir de esperar e seguir)."""
+        wait = self._reserve()
+        if wait == 0:
+            return 0.0
+        if waited >= self.max_wait:
+            self._reserve(force=True)
+            metrics.increment("llm_scheduler_overflows")
+            logger.warning(f"⚠️ [LLM SCHEDULER] {self.key}: limite por minuto atingido após {waited:.1f}s de espera. Chamando mesmo assim.")
+            return None
+        return min(wait, self.max_wait - waited)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        waited = 0.0
+        while True:
+            wait = self._next_wait(waited) if blocking else self._reserve()
+            if not wait:
+                break
+            if not blocking:
+                return False
+            time.sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        waited = 0.0
+        while True:
+            wait = await asyncio.to_thread(self._next_wait, waited) if blocking else await asyncio.to_thread(self._reserve)
+            if not wait:
+                break
+            if not blocking:
+                return False
+            await asyncio.sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+        return True
+
+    def _record_wait(self, waited: float):
+        if waited:
+            metrics.increment("llm_scheduler_delays")
+            metrics.increment("llm_scheduler_wait_ms", int(waited * 1000))
+            logger.info(f"⏳ [LLM SCHEDULER] {self.key}: chamada adiada {waited:.2f}s (limite por minuto).")
+
+    def record_usage(self, total_tokens: int):
+        """
+        Troca a estimativa reservada pelo consumo real e atualiza a média.
+        Sem reserva em aberto (resposta do cache, que não passa pelo limiter) não faz nada.
+        """
+        reserved = self._pop_reservation()
+        if reserved is None:
+            return
+        self.tokens_per_call += TOKENS_EWMA_ALPHA * (total_tokens - self.tokens_per_call)
+        try:
+            self.store.adjust(self.key, total_tokens - reserved)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM scheduler: falha ao registrar consumo ({self.key}): {e}")
+
+    def release(self):
+        """Chamada que falhou: a requisição continua contada, a estimativa de tokens fica."""
+        self._pop_reservation()
+
+
+class UsageCallback(BaseCallbackHandler):
+    """
+    Lê o `usage_metadata` das respostas e repassa ao limiter do modelo.
+    Acertos do cache também chegam aqui (com os tokens da resposta original): o limiter só
+    os contabiliza se houver uma reserva em aberto, o que não acontece num acerto.
+    """
+    def __init__(self, limiter: ProviderRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response: LLMResult, **kwargs):
+        total = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    total += usage.get("total_tokens", 0)
+        if total:
+            self.limiter.record_usage(total)
+
+    def on_llm_error(self, error: BaseException, **kwargs):
+        self.limiter.release()
+
+
+class LLMScheduler:
+    """
+    Registro dos limiters por `provedor:modelo` (um por processo, mesmo store).
+    """
+    def __init__(self, store: UsageStore, limits: Dict[str, Tuple[int, int]], headroom: float, max_wait: float, default_tokens: int):
+        self.store = store
+        self.limits = limits
+        self.headroom = headroom
+        self.max_wait = max_wait
+        self.default_tokens = default_tokens
+        self._limiters: Dict[str, ProviderRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def effective_limits(self, key: str) -> Tuple[int, int]:
+        # 0 = sem limite; um limite configurado nunca vira 0 pela margem
+        rpm, tpm = self.limits.get(key, (0, 0))
+        return (
+            max(1, int(rpm * self.headroom)) if rpm else 0,
+            max(1, int(tpm * self.headroom)) if tpm else 0
+        )
+
+    def get_limiter(self, provider: str, model: str) -> Optional[ProviderRateLimiter]:
+        """Limiter do modelo (None se não houver limite configurado para ele)."""
+        key = f"{provider}:{model}"
+        if key not in self.limits:
+            return None
+        with self._lock:
+            if key not in self._limiters:
+                rpm, tpm = self.effective_limits(key)
+                self._limiters[key] = ProviderRateLimiter(
+                    self.store, key, rpm, tpm,
+                    max_wait=self.max_wait,
+                    default_tokens=self.default_tokens
+                )
+            return self._limiters[key]
+
+    def utilization(self) -> Dict[str, dict]:
+        """Uso do último minuto (todos os workers) em relação aos limites efetivos."""
+        try:
+            usage = self.store.usage()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM scheduler: falha ao ler utilização: {e}")
+            return {}
+        report = {}
+        for key in sorted(set(usage) | set(self._limiters)):
+            requests, tokens = usage.get(key, (0.0, 0.0))
+            rpm, tpm = self.effective_limits(key)
+            report[key] = {
+                "requests_per_minute": round(requests, 1),
+                "tokens_per_minute": round(tokens),
+                "rpm_limit": rpm,
+                "tpm_limit": tpm,
+                "rpm_utilization": round(requests / rpm, 4) if rpm else None,
+                "tpm_utilization": round(tokens / tpm, 4) if tpm else None,
+            }
+        return report
+
+
+def _configured_limits() -> Dict[str, Tuple[int, int]]:
+    limits = {f"{provider.value}:{model}": tuple(value) for (provider, model), value in PROVIDER_RATE_LIMITS.items()}
+    for key, value in settings.LLM_RATE_LIMITS.items():
+        limits[key] = tuple(value)
+    return limits
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_llm_scheduler() -> Optional[LLMScheduler]:
+    """
+    Agendador compartilhado pelos modelos (criado sob demanda).
+    Retorna `None` se estiver desativado nas configurações.
+    """
+    global _scheduler
+    if not settings.LLM_SCHEDULER_ENABLED or not settings.LLM_SCHEDULER_DB_PATH:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                UsageStore(settings.LLM_SCHEDULER_DB_PATH),
+                _configured_limits(),
+                headroom=settings.LLM_SCHEDULER_HEADROOM,
+                max_wait=settings.LLM_SCHEDULER_MAX_WAIT_SECONDS,
+                default_tokens=settings.LLM_SCHEDULER_DEFAULT_TOKENS
+            )
+    return _scheduler
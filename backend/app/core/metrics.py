@@ -0,0 +1,48 @@
+"""
+MÉTRICAS DE EXECUÇÃO (Contadores em Memória)
+--------------------------------------------------
+Objetivo:
+    Contabilizar o que aconteceu com as execuções do agente (concluídas, canceladas,
+    com falha) para diagnosticar desperdício de tokens e gargalos.
+
+Atuação no Sistema:
+    - Backend / Core: Contadores incrementados pelas rotas e serviços; lidos pelo endpoint de métricas.
+
+Responsabilidades:
+    1. Manter contadores nomeados (thread-safe).
+    2. Fornecer um snapshot consistente para exposição via API.
+
+Limitações:
+    - Estado local ao processo: cada worker do Uvicorn tem seus próprios contadores
+      e eles zeram ao reiniciar.
+
+Comunicação:
+    - Incrementado por `app.api.routes` (execuções), `app.core.cache` (cache de LLM)
+      e `app.services.embeddings` (cache de embeddings).
+    - Lido por `GET /api/metrics`.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    """
+    Conjunto simples de contadores nomeados.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    def increment(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+# Singleton: instância global (por processo/worker)
+metrics = Metrics()
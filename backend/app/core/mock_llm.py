@@ -0,0 +1,169 @@
+"""
+PROVEDOR MOCK DE LLM (Offline e Determinístico)
+--------------------------------------------------
+Objetivo:
+    Executar o grafo inteiro sem rede e sem chaves de API: para medir o custo do próprio
+    framework (LangGraph, caches, busca, streaming) em CI e em notebooks, e para rodar o
+    servidor localmente sem credenciais.
+
+Atuação no Sistema:
+    - Backend / Core: Criado pela `app.core.llm.get_llm` quando o provider é "mock"
+      (`LLM_PROVIDER=mock`). Para os nós é um `BaseChatModel` comum.
+
+Responsabilidades:
+    1. Simular o provedor: latência até o primeiro token e vazão de tokens configuráveis
+       (`MOCK_LLM_*`), com streaming palavra a palavra e `usage_metadata`.
+    2. Respostas roteirizadas por nó, reconhecidas por um trecho fixo do prompt:
+       idioma ("pt-br"), gateway (JSON "technical"), guard (JSON respondível) e texto
+       determinístico (hash do prompt) para os demais.
+    3. Permitir sobrescrever as respostas por configuração (`MOCK_LLM_RESPONSES`:
+       trecho do prompt -> resposta).
+
+Limitações:
+    - As respostas não dependem do conteúdo recuperado: servem para medir tempo, não
+      qualidade.
+
+Comunicação:
+    - Configurado por `settings.MOCK_LLM_*`.
+"""
+
+import json
+import time
+import random
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Vocabulário do texto gerado (respostas "livres": casual, RAG, resumo, tradução).
+FILLER_WORDS = (
+    "o", "Marcos", "trabalha", "com", "Python", "e", "projetos", "de", "IA", "usando",
+    "LangGraph", "FastAPI", "para", "construir", "agentes", "que", "respondem", "sobre",
+    "o", "portfólio", "com", "base", "em", "fatos", "recuperados", "do", "RAG",
+)
+
+
+def _last_human_line(prompt: str) -> str:
+    """Última fala do usuário no histórico formatado pelo gateway ("human: ...")."""
+    for line in reversed(prompt.splitlines()):
+        if line.startswith("human: "):
+            return line[len("human: "):].strip()
+    return ""
+
+
+def _gateway_response(prompt: str) -> str:
+    return json.dumps({
+        "rephrased_query": _last_human_line(prompt),
+        "classification": "technical",
+        "confidence": 0.9,
+        "reason": "mock"
+    }, ensure_ascii=False)
+
+
+def _guard_response(prompt: str) -> str:
+    return json.dumps({
+        "is_answerable": True,
+        "confidence": 0.9,
+        "reason": "sufficient_factual_coverage",
+        "exhausted": False
+    })
+
+
+# Trecho fixo do prompt de cada nó -> gerador da resposta.
+SCRIPTED_RESPONSES = {
+    "classificador de idiomas": lambda prompt: "pt-br",
+    "Gateway Semântico": _gateway_response,
+    "ANSWERABILITY GUARD": _guard_response,
+}
+
+
+class MockChatModel(BaseChatModel):
+    """
+    Chat model local: latência e vazão simuladas, respostas roteirizadas.
+    """
+    model: str = "mock-fast"
+    temperature: float = 0.0
+    latency_ms: float = 0.0
+    tokens_per_second: float = 0.0
+    output_tokens: int = 60
+    responses: Dict[str, str] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model, "temperature": self.temperature}
+
+    # --------------------------------------------------
+    # Conteúdo
+    # --------------------------------------------------
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        for marker, response in self.responses.items():
+            if marker in prompt:
+                return response
+        for marker, build in SCRIPTED_RESPONSES.items():
+            if marker in prompt:
+                return build(prompt)
+
+        # Texto livre: determinístico por prompt (o mesmo prompt gera sempre o mesmo texto)
+        seed = int.from_bytes(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest(), "big")
+        rng = random.Random(seed)
+        words = [rng.choice(FILLER_WORDS) for _ in range(self.output_tokens)]
+        text = " ".join(words)
+        return text[0].upper() + text[1:] + "."
+
+    def _pieces(self, text: str) -> List[str]:
+        # Um "token" por palavra (com o espaço), como os deltas de streaming dos provedores
+        words = text.split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> dict:
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        output_tokens = len(self._pieces(text))
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    # --------------------------------------------------
+    # Interface do BaseChatModel
+    # --------------------------------------------------
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        time.sleep(self.latency_ms / 1000 + self._token_delay() * len(self._pieces(text)))
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        await asyncio.sleep(self.latency_ms / 1000 + self._token_delay() * len(self._pieces(text)))
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        time.sleep(self.latency_ms / 1000)
+        pieces = self._pieces(text)
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(self._token_delay())
+            yield self._chunk(piece, messages, text if i == len(pieces) - 1 else None)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        await asyncio.sleep(self.latency_ms / 1000)
+        pieces = self._pieces(text)
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(self._token_delay())
+            yield self._chunk(piece, messages, text if i == len(pieces) - 1 else None)
+
+    def _chunk(self, piece: str, messages: List[BaseMessage], final_text: Optional[str]) -> ChatGenerationChunk:
+        # O consumo vai no último delta (como o `stream_usage` da OpenAI)
+        usage = self._usage(messages, final_text) if final_text is not None else None
+        return ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage))
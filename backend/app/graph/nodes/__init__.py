@@ -15,6 +15,7 @@ from .rag import retrieve, generate_rag
 from .casual import generate_casual
 from .guard import answerability_guard, fallback_responder
 from .gateway import semantic_gateway_node
+from .semantic_cache import semantic_cache_lookup, semantic_cache_store
 
 # Exibe para imports via 'from app.graph.nodes import *'
 __all__ = [
@@ -27,4 +28,6 @@ __all__ = [
     "answerability_guard",
     "fallback_responder",
     "semantic_gateway_node",
+    "semantic_cache_lookup",
+    "semantic_cache_store",
 ]
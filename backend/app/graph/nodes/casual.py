@@ -18,7 +18,7 @@ from app.graph.state import AgentState
 from app.core.logger import logger
 
 # --- NÓ 4: GENERATE CASUAL (Responde papo furado) ---
-def generate_casual(state: AgentState):
+async def generate_casual(state: AgentState):
     """
     Gera uma resposta social e leve.
     
@@ -71,7 +71,7 @@ def generate_casual(state: AgentState):
     
     prompt = ChatPromptTemplate.from_messages([("system", system_prompt), ("placeholder", "{messages}")])
     chain = prompt | llm_fast
-    response = chain.invoke({"messages": messages})
+    response = await chain.ainvoke({"messages": messages})
     
     # --- OBSERVABILITY UPDATE ---
     from app.core.observability import observer
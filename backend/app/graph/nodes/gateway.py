@@ -25,7 +25,7 @@ from app.graph.state import AgentState
 from app.core.logger import logger
 from app.core.observability import observer
 
-def semantic_gateway_node(state: AgentState):
+async def semantic_gateway_node(state: AgentState):
     """
     Nó Unificado (Gateway) que realiza Contextualização e Roteamento simultaneamente.
     
@@ -183,7 +183,8 @@ def semantic_gateway_node(state: AgentState):
     chain = prompt | llm_fast
     
     try:
-        response = chain.invoke({
+        response = await chain.ainvoke({
+            "current_date": current_date,
             "messages_content": messages_content,
             "context_hint": context_hint
         })
@@ -31,7 +31,7 @@ import json
 # ============================================================================
 # NÓ: ANSWERABILITY GUARD
 # ============================================================================
-def answerability_guard(state: AgentState):
+async def answerability_guard(state: AgentState):
     """
     Nó Decisório (Cognitivo Puro).
     
@@ -153,7 +153,7 @@ def answerability_guard(state: AgentState):
     chain = prompt | llm_medium_no_temp
     
     try:
-        response = chain.invoke({
+        response = await chain.ainvoke({
             "query": rephrased_query,
             "context": context_text,
             "previous_answers": previous_answers_summary or "Nenhuma resposta anterior."
@@ -194,7 +194,7 @@ def answerability_guard(state: AgentState):
 # ============================================================================
 # NÓ: FALLBACK RESPONDER
 # ============================================================================
-def fallback_responder(state: AgentState):
+async def fallback_responder(state: AgentState):
     """
     Nó de Comunicação e Resposta Negativa.
     
@@ -272,7 +272,7 @@ def fallback_responder(state: AgentState):
     # fluidez e naturalidade na conversa, já que não precisamos de output estruturado aqui.
     chain = prompt | llm_medium
     
-    response = chain.invoke({
+    response = await chain.ainvoke({
         "messages": state["messages"],
         "reason": reason,
         "exhausted": str(exhausted)
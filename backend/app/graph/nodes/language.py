@@ -20,7 +20,7 @@ from app.graph.state import AgentState
 from app.core.logger import logger
 
 # --- NÓ 0A: DETECT LANGUAGE (Identificação Automática) ---
-def detect_language_node(state: AgentState):
+async def detect_language_node(state: AgentState):
     """
     Identifica o idioma da entrada do usuário.
     
@@ -58,7 +58,7 @@ def detect_language_node(state: AgentState):
     prompt = ChatPromptTemplate.from_template(system_prompt)
     chain = prompt | llm_fast # Modelo rápido e preciso
     
-    response = chain.invoke({"text": last_message})
+    response = await chain.ainvoke({"text": last_message})
     detected_lang = response.content.strip().lower()
     
     # --- OBSERVABILITY UPDATE ---
@@ -68,7 +68,7 @@ def detect_language_node(state: AgentState):
 
 
 # --- NÓ 5: TRANSLATOR (Opcional - Apenas se não for PT-BR) ---
-def translator_node(state: AgentState):
+async def translator_node(state: AgentState):
     """
     Traduz a resposta final do bot para o idioma do usuário.
     
@@ -121,7 +121,7 @@ def translator_node(state: AgentState):
     # Usa o modelo fast para garantir a melhor nuance na tradução.
     chain = prompt | llm_fast
     
-    response = chain.invoke({})
+    response = await chain.ainvoke({})
     translated_text = response.content.strip()
     
     # --- OBSERVABILITY UPDATE ---
@@ -16,13 +16,14 @@ Responsabilidades:
 import json
 from datetime import datetime
 from langchain_core.messages import SystemMessage, RemoveMessage
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from langchain_core.prompts import ChatPromptTemplate
 from app.core.llm import llm_fast
 from app.graph.state import AgentState
 from app.core.logger import logger
 
 # --- NÓ 0B: SUMMARIZE MEMORY (Gestão de Contexto) ---
-def summarize_conversation(state: AgentState):
+async def summarize_conversation(state: AgentState):
     """
     Compacta mensagens antigas para economizar tokens e estruturar memória.
     
@@ -110,17 +111,13 @@ def summarize_conversation(state: AgentState):
     chain = prompt | llm_fast
     
     # Passamos os blocos separados para o modelo entender a hierarquia
-    response = chain.invoke({
+    response = await chain.ainvoke({
         "existing_summary": existing_summary_content if existing_summary_content else "Nenhum resumo anterior.",
         "new_messages": conversation_text
     })
     summary = response.content
     
-    # Ações:
-    # 1. Criar lista de Remoção para as mensagens antigas
-    delete_messages = [RemoveMessage(id=m.id) for m in older_messages]
-    
-    # 2. Criar a nova mensagem de sistema com o resumo
+    # Cria a nova mensagem de sistema com o resumo
     # Nota: Inserimos um HEADER DE ALERTA para o modelo não tratar isso como verdade absoluta/canônica.
     summary_message = SystemMessage(content=f"""
     [MEMÓRIA DE LONGO PRAZO SANEADA]
@@ -136,8 +133,13 @@ def summarize_conversation(state: AgentState):
     from app.core.observability import observer
     observer.log_section("MEMORY AUDIT", content=f"Summary Updated.\nLength: {len(summary)} chars")
     
-    # Retorna updates: Remove as velhas e adiciona a nova
-    return {"messages": delete_messages + [summary_message], "summary": summary}
+    # Retorna updates: Reconstrói a lista do zero (REMOVE_ALL_MESSAGES) com o resumo ANTES
+    # das mensagens recentes. Assim a última mensagem continua sendo a do usuário para os
+    # próximos nós, e essa ordem é a que fica salva entre turnos nas sessões persistentes.
+    return {
+        "messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), summary_message, *recent_messages],
+        "summary": summary
+    }
 
 
 
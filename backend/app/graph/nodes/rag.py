@@ -9,7 +9,7 @@ Atuação no Sistema:
     - Backend / Nodes: Núcleo intelectual do agente.
 
 Responsabilidades:
-    1. Retrieve: Consultar o ChromaDB usando a query reescrita.
+    1. Retrieve: Busca híbrida (vetorial + BM25) usando a query reescrita.
     2. Generate RAG: Sintetizar uma resposta usando APENAS o contexto recuperado,
        seguindo regras estritas de anti-alucinação e persona.
        
@@ -21,6 +21,8 @@ from langchain_core.prompts import ChatPromptTemplate
 from app.core.llm import llm_medium
 from app.graph.state import AgentState
 from app.services.rag_service import RagService
+from app.services.context_builder import build_context, estimate_tokens
+from app.core.config import settings
 from app.core.logger import logger
 
 # Instância do serviço de RAG (Busca Vetorial)
@@ -28,14 +30,16 @@ from app.core.logger import logger
 rag = RagService()
 
 # --- NÓ 2: RETRIEVE (Apenas para rota técnica) ---
-def retrieve(state: AgentState):
+async def retrieve(state: AgentState):
     """
     Busca documentos relevantes no banco vetorial.
     
     Lógica:
         - Utiliza `rephrased_query` (se disponível) para maximizar a precisão semântica.
-        - Recupera top-k chunks (padrão k=4).
-        - Formata o resultado em uma string única com metadados de fonte.
+        - Recupera até `RETRIEVAL_MAX_K` chunks, descartando os de baixa relevância
+          (uma pergunta com um acerto forte não leva chunks irrelevantes ao prompt).
+        - Monta o contexto: mescla chunks vizinhos (sem repetir a sobreposição do splitter),
+          remove duplicatas e respeita `CONTEXT_TOKEN_BUDGET`. Cada seção leva a fonte.
         
     Entrada: state['rephrased_query'] ou state['messages'][-1].
     Saída: state['context'] (Lista de strings prontos para o prompt).
@@ -45,31 +49,35 @@ def retrieve(state: AgentState):
     # Usa a pergunta refraseada para maior precisão na busca vetorial.
     query_text = state.get("rephrased_query") or messages[-1].content
     
-    # Busca os 4 chunks mais relevantes.
+    # Busca os chunks relevantes (versão assíncrona: não bloqueia o event loop).
     try:
-        docs = rag.query(query_text, k=4)
+        docs = await rag.aquery(query_text)
     except Exception as e:
         logger.error(f"❌ Erro crítico no RAG Retrieve: {e}")
         # Retorna lista vazia para não quebrar o fluxo, mas loga o erro.
         docs = []
     
     # Formata o contexto incluindo a fonte (nome do arquivo) para melhor rastreabilidade.
-    formatted_docs = []
-    for doc in docs:
-        source = doc.metadata.get("source", "Desconhecido").split("\\")[-1] # Pega apenas o nome do arquivo no Windows
-        formatted_docs.append(f"--- FONTE: {source} ---\n{doc.page_content}")
-        
-    context_text = "\n\n".join(formatted_docs)
+    context_text = build_context(docs, token_budget=settings.CONTEXT_TOKEN_BUDGET)
+    raw_tokens = sum(estimate_tokens(doc.page_content) for doc in docs)
     
     # --- OBSERVABILITY UPDATE ---
     from app.core.observability import observer
-    observer.log_section("RAG RETRIEVE", data={"Docs Found": len(docs)}, content=context_text)
+    observer.log_section(
+        "RAG RETRIEVE",
+        data={
+            "Docs Found": len(docs),
+            "Scores": [doc.metadata.get("relevance_score") for doc in docs],
+            "Context Tokens": f"~{estimate_tokens(context_text)} (chunks: ~{raw_tokens})"
+        },
+        content=context_text
+    )
     
     return {"context": [context_text]}
 
 
 # --- NÓ 3: GENERATE RAG (Responde com dados + ESTILO NOVO + FILTRO DE REPETIÇÃO) ---
-def generate_rag(state: AgentState):
+async def generate_rag(state: AgentState):
     """
     Gera a resposta final técnica/informativa.
     
@@ -233,7 +241,7 @@ def generate_rag(state: AgentState):
     prompt = ChatPromptTemplate.from_messages([("system", system_prompt_template), ("placeholder", "{messages}")])
     chain = prompt | llm_medium
     
-    response = chain.invoke({
+    response = await chain.ainvoke({
         "messages": messages, 
         "context": context, 
         "formatted_history": formatted_history # Injeta o histórico formatado no prompt
@@ -0,0 +1,101 @@
+"""
+MÓDULO DE CACHE SEMÂNTICO (Atalho para Respostas Conhecidas)
+--------------------------------------------------
+Objetivo:
+    Responder na hora perguntas equivalentes a outras já respondidas, sem passar por
+    retrieve, guard e geração (ou pela geração casual).
+
+Atuação no Sistema:
+    - Backend / Nodes: `semantic_cache_lookup` roda logo após o `semantic_gateway_node`;
+      `semantic_cache_store` roda no fim de todos os caminhos que geram resposta.
+
+Responsabilidades:
+    1. Lookup: Embedding da `rephrased_query` + busca no cache (mesmo idioma e classificação).
+       Em caso de acerto, devolve a resposta final pronta (já traduzida, se for o caso).
+    2. Store: Guarda a resposta final da execução para as próximas perguntas parecidas.
+
+Regras:
+    - Só a primeira pergunta da conversa participa: depois disso a resposta depende do
+      histórico (ex: regra de anti-repetição do RAG) e não é reaproveitável.
+    - Respostas negadas pelo Guard (fallback) não são guardadas.
+
+Integrações:
+    - app.services.semantic_cache: Armazenamento e busca por similaridade.
+    - app.graph.nodes.rag: Reusa o `RagService` (embeddings + versão do índice).
+"""
+
+from langchain_core.messages import AIMessage
+from app.core.config import settings
+from app.core.logger import logger
+from app.graph.state import AgentState
+from app.graph.nodes.rag import rag
+from app.services.semantic_cache import semantic_cache
+
+
+def _is_first_turn(state: AgentState) -> bool:
+    """Primeira pergunta da conversa: nenhuma resposta anterior e nenhum resumo."""
+    return not state.get("summary") and not any(
+        isinstance(m, AIMessage) for m in state["messages"][:-1]
+    )
+
+
+# --- NÓ: SEMANTIC CACHE LOOKUP ---
+async def semantic_cache_lookup(state: AgentState):
+    """
+    Procura uma resposta já dada para uma pergunta equivalente.
+
+    Entrada: state['rephrased_query'], state['language'], state['classification'].
+    Saída:
+        - Acerto: messages (+ AIMessage com a resposta) e semantic_cache_hit=True.
+        - Falha: query_embedding (reusado pelo `semantic_cache_store` no fim da execução).
+        - Inelegível / desativado: nada.
+    """
+    if not settings.SEMANTIC_CACHE_ENABLED or not _is_first_turn(state):
+        return {"semantic_cache_hit": False}
+
+    query = state.get("rephrased_query") or state["messages"][-1].content
+    language = state.get("language", "pt-br").lower()
+    classification = state.get("classification", "technical")
+
+    try:
+        embedding = await rag.embeddings.aembed_query(query)
+    except Exception as e:
+        logger.error(f"Semantic Cache Error (embedding): {e}")
+        return {"semantic_cache_hit": False}
+
+    match = semantic_cache.lookup(embedding, language, classification, rag.get_index_version())
+    if match is None:
+        return {"semantic_cache_hit": False, "query_embedding": embedding}
+
+    logger.info(f"--- SEMANTIC CACHE HIT ({match['score']:.3f}): '{query}' ~ '{match['query']}' ---")
+    return {
+        "messages": [AIMessage(content=match["answer"])],
+        "semantic_cache_hit": True
+    }
+
+
+# --- NÓ: SEMANTIC CACHE STORE ---
+async def semantic_cache_store(state: AgentState):
+    """
+    Guarda a resposta final desta execução no cache semântico.
+
+    Entrada: state['query_embedding'] (presente só quando o lookup foi elegível e falhou).
+    Saída: query_embedding=None (o vetor não precisa ficar no estado/checkpoint).
+    """
+    embedding = state.get("query_embedding")
+    if not embedding:
+        return {}
+
+    answerable = (state.get("answerability_result") or {}).get("is_answerable", True)
+    last_message = state["messages"][-1]
+    if answerable and isinstance(last_message, AIMessage) and last_message.content:
+        semantic_cache.store(
+            embedding,
+            query=state.get("rephrased_query") or "",
+            answer=last_message.content,
+            language=state.get("language", "pt-br").lower(),
+            classification=state.get("classification", "technical"),
+            index_version=rag.get_index_version()
+        )
+
+    return {"query_embedding": None}
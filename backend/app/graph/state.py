@@ -18,7 +18,7 @@ Comunicação:
     - Importado por `workflow.py` (para definição do grafo).
 """
 
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 from typing_extensions import TypedDict
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
@@ -70,4 +70,14 @@ class AgentState(TypedDict):
     # --------------------------------------------------
     # Armazena a decisão do nó `answerability_guard` (JSON parsing).
     # Contém chaves como: 'is_answerable' (bool), 'reason' (str), 'exhausted' (bool).
-    answerability_result: dict
\ No newline at end of file
+    answerability_result: dict
+
+    # --------------------------------------------------
+    # Cache Semântico de Respostas
+    # --------------------------------------------------
+    # True quando `semantic_cache_lookup` encontrou uma resposta pronta (atalho para o fim).
+    semantic_cache_hit: bool
+
+    # Embedding da `rephrased_query`, guardado entre o lookup (miss) e o `semantic_cache_store`.
+    # O store limpa o campo para o vetor não ir para o checkpoint das sessões.
+    query_embedding: Optional[List[float]]
@@ -0,0 +1,193 @@
+"""
+STREAMING DE EVENTOS DO GRAFO
+--------------------------------------------------
+Objetivo:
+    Traduzir a execução do grafo (LangGraph) em uma sequência de eventos de alto nível
+    (status, token, final), independente do transporte HTTP que vai entregá-los.
+
+Atuação no Sistema:
+    - Backend / Graph: Camada entre o grafo compilado e quem consome o resultado (rotas SSE).
+
+Responsabilidades:
+    1. Montar o estado inicial a partir do payload do frontend (histórico + mensagem).
+    2. Executar o grafo em modo streaming ("updates" + "messages" + "values").
+    3. Mapear cada nó finalizado para uma mensagem de status amigável (PT/EN).
+    4. Filtrar os tokens que pertencem à resposta final entregue ao usuário.
+    5. Entregar a resposta final junto com o estado final (usado para persistir sessões).
+    6. Medir o tempo de cada nó (diagnóstico de latência a partir do cliente).
+
+Comunicação:
+    - Consumido por `app.api.routes` (diretamente ou via `app.core.coalescing`)
+      e por `app.services.batch_service` (avaliação em lote).
+"""
+
+import time
+from typing import Dict, List, Optional
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+# Nós cujo output da LLM É a resposta final entregue ao usuário.
+# Se o idioma exigir tradução, quem produz o texto final é o `translator_node`.
+ANSWER_NODES = {"generate_rag", "generate_casual", "fallback_responder"}
+TRANSLATION_NODE = "translator_node"
+NATIVE_LANGUAGES = ["pt-br", "pt", "portuguese", "português"]
+
+
+def get_status_message(node_name: str, node_output: dict, is_pt: bool) -> str:
+    """
+    Mapeamento: Nó -> Mensagem de Status para o Usuário.
+    Retorna string vazia quando o nó não deve gerar atualização visível.
+    """
+    if node_name == "detect_language":
+        return "Lendo histórico..." if is_pt else "Reading history..."
+    elif node_name == "summarize_conversation":
+        return "Entendendo contexto..." if is_pt else "Understanding context..."
+    elif node_name == "contextualize_input":
+        return "Analisando intenção..." if is_pt else "Analyzing intent..."
+    elif node_name in ("router_node", "semantic_gateway_node"):
+        # Se o router decidiu que é técnico, avisa que vai pesquisar.
+        classification = (node_output or {}).get("classification", "technical")
+
+        if classification == "technical":
+            return "Pesquisando nas memórias..." if is_pt else "Searching memories..."
+        return "Pensando..." if is_pt else "Thinking..."
+    elif node_name == "semantic_cache_lookup":
+        if (node_output or {}).get("semantic_cache_hit"):
+            return "Lembrando de uma resposta..." if is_pt else "Recalling an answer..."
+        return ""
+    elif node_name == "retrieve":
+        return "Estudando informações..." if is_pt else "Reading data..."
+    elif node_name == "answerability_guard":
+        return "Validando resposta..." if is_pt else "Validating answer..."
+    elif node_name == "fallback_responder":
+        return "Formulando explicação..." if is_pt else "Formulating explanation..."
+    elif node_name == "generate_rag" or node_name == "generate_casual":
+        return "Finalizando..." if is_pt else "Finalizing..."
+    elif node_name == "translator_node":
+        return "Traduzindo resposta..." if is_pt else "Translating response..."
+    return ""
+
+
+def build_initial_state(message: str, history: Optional[List[dict]] = None, language: Optional[str] = None) -> dict:
+    """
+    Monta o estado de entrada do grafo a partir do formato do frontend
+    (`[{"role": "user" | "assistant", "content": "..."}]`) + a mensagem nova.
+    """
+    langchain_messages = []
+    for msg in history or []:
+        if msg.get("role") == "user":
+            langchain_messages.append(HumanMessage(content=msg.get("content", "")))
+        elif msg.get("role") == "assistant":
+            langchain_messages.append(AIMessage(content=msg.get("content", "")))
+
+    # Adiciona a mensagem atual
+    langchain_messages.append(HumanMessage(content=message))
+
+    return {
+        "messages": langchain_messages,
+        "language": language or "pt-br"
+    }
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """
+    Resumo no formato do header `Server-Timing` (ex: "retrieve;dur=812.4, total;dur=2301.0").
+    """
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
+
+
+async def stream_agent_events(graph, initial_state: dict, is_pt: bool = True, **stream_kwargs):
+    """
+    Executa o grafo e produz eventos `(tipo, dados)` na ordem em que acontecem.
+
+    Eventos:
+        - ("status", {"message": str, "node": str, "elapsed_ms": float, "total_ms": float}):
+          um nó terminou (mensagem amigável + duração do nó + tempo acumulado da execução).
+        - ("token", {"content": str}): delta da resposta final sendo gerada.
+        - ("final", {"response": str, "values": dict, "last_node": str, "timings": dict}):
+          fim da execução. `response` vem vazio se nenhum nó gerou AIMessage.
+          `timings` traz os ms de cada nó executado (na ordem) + "total".
+
+    Args:
+        graph: Grafo compilado (`agent_app` ou o grafo com checkpointer de sessões).
+        initial_state: Estado de entrada (messages + language).
+        is_pt: Idioma das mensagens de status.
+        **stream_kwargs: Repassados ao `astream` (ex: config/durability das sessões).
+    """
+    final_response_content = ""
+    final_values = {}
+    last_node = None
+    # Cronometragem: o grafo é sequencial, então a duração de um nó é o intervalo
+    # entre o fim do nó anterior (ou o início da execução) e o seu próprio fim.
+    started_at = time.perf_counter()
+    previous_mark = started_at
+    timings: Dict[str, float] = {}
+
+    # Idioma efetivo da resposta (atualizado quando o `detect_language` terminar).
+    # Decide de qual nó os tokens devem ser repassados ao cliente.
+    response_language = (initial_state.get("language") or "pt-br").lower()
+
+    # Três modos combinados:
+    # - "updates": um dict a cada nó finalizado (status + resposta final).
+    # - "messages": cada delta (token) gerado pelas LLMs dentro dos nós.
+    # - "values": o estado completo após cada passo (guardamos apenas o último).
+    stream_mode = ["updates", "messages", "values"]
+    async for mode, chunk in graph.astream(initial_state, stream_mode=stream_mode, **stream_kwargs):
+        if mode == "values":
+            final_values = chunk
+            continue
+
+        if mode == "messages":
+            message, metadata = chunk
+            # Apenas deltas (AIMessageChunk); mensagens completas chegam via "updates".
+            if not isinstance(message, AIMessageChunk) or not message.text:
+                continue
+
+            node = metadata.get("langgraph_node")
+            if response_language in NATIVE_LANGUAGES:
+                is_final_answer = node in ANSWER_NODES
+            else:
+                is_final_answer = node == TRANSLATION_NODE
+
+            if is_final_answer:
+                yield "token", {"content": message.text}
+            continue
+
+        node_name = list(chunk.keys())[0]
+        node_output = chunk[node_name]
+        last_node = node_name
+
+        now = time.perf_counter()
+        elapsed_ms = round((now - previous_mark) * 1000, 1)
+        total_ms = round((now - started_at) * 1000, 1)
+        previous_mark = now
+        # Soma se o mesmo nó rodar mais de uma vez
+        timings[node_name] = round(timings.get(node_name, 0.0) + elapsed_ms, 1)
+
+        if node_name == "detect_language" and node_output and node_output.get("language"):
+            response_language = node_output["language"].lower()
+
+        # Se houve mudança de status, envia evento ao frontend
+        status_msg = get_status_message(node_name, node_output, is_pt)
+        if status_msg:
+            yield "status", {
+                "message": status_msg,
+                "node": node_name,
+                "elapsed_ms": elapsed_ms,
+                "total_ms": total_ms
+            }
+
+        # Captura a resposta final (AIMessage) quando ela aparecer
+        if node_output and "messages" in node_output:
+            msgs = node_output["messages"]
+            # Verifica se é uma resposta da IA e não um comando de sistema
+            if msgs and isinstance(msgs[-1], AIMessage):
+                final_response_content = msgs[-1].content
+
+    timings["total"] = round((time.perf_counter() - started_at) * 1000, 1)
+
+    yield "final", {
+        "response": final_response_content,
+        "values": final_values,
+        "last_node": last_node,
+        "timings": timings
+    }
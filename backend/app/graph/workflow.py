@@ -19,16 +19,25 @@ Comunicação:
     - Importa e orquestra funções de `app.graph.nodes`.
     - Utiliza o estado definido em `app.graph.state`.
     - Exporta `agent_app` para uso no servidor (main.py ou simulador).
+    - Exporta `get_session_app` (grafo com checkpointer SQLite) para conversas com `session_id`
+      e `touch_session` (registra a atividade usada pela retenção `SESSIONS_TTL_DAYS`).
 """
 
+import time
+import asyncio
 from typing import Literal
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langgraph.graph import StateGraph, END
+from app.core.config import settings
+from app.core.logger import logger
 from app.graph.state import AgentState  # <--- IMPORTANDO DO ARQUIVO CERTO
 from app.graph.nodes import (
     semantic_gateway_node, retrieve, generate_rag, generate_casual, 
     translator_node, 
     detect_language_node, summarize_conversation,
-    answerability_guard, fallback_responder # Novos nós do Guard
+    answerability_guard, fallback_responder, # Novos nós do Guard
+    semantic_cache_lookup, semantic_cache_store
 )
 # from app.graph.nodes_guard import answerability_guard, fallback_responder # <-- REMOVIDO (agora incluído acima)
 
@@ -56,6 +65,18 @@ def decide_next_node(state: AgentState) -> Literal["retrieve", "generate_casual"
         # Isso garante que dúvidas reais nunca sejam descartadas.
         return "retrieve" 
 
+# --------------------------------------------------
+# Lógica de Decisão: Cache Semântico
+# --------------------------------------------------
+def decide_after_cache(state: AgentState) -> Literal["end", "retrieve", "generate_casual"]:
+    """
+    Após o `semantic_cache_lookup`: se achou resposta pronta, encerra;
+    senão segue o roteamento normal do gateway (technical/casual).
+    """
+    if state.get("semantic_cache_hit"):
+        return "end"
+    return decide_next_node(state)
+
 # --------------------------------------------------
 # Lógica de Decisão: Guard (Respondibilidade)
 # --------------------------------------------------
@@ -98,15 +119,21 @@ def should_translate(state: AgentState):
 # --------------------------------------------------
 # Construção do Grafo
 # --------------------------------------------------
-def create_graph():
+def create_graph(checkpointer=None):
     """
     Monta a máquina de estados finita (FSM) do agente.
+    
+    Args:
+        checkpointer: Persistência opcional do estado entre execuções (por `thread_id`).
+            Sem ele, cada requisição começa do zero com o histórico enviado pelo cliente.
     """
     # Inicializa o grafo tipado com AgentState
     workflow = StateGraph(AgentState)
 
     # 1. Registro de Nós (Nodes)
     # Cada string é um ID único para o nó no grafo.
+    # Todos os nós são corrotinas (async def): o LangGraph as executa direto no event loop
+    # durante o `astream`, sem ocupar threads do pool enquanto esperam a resposta das LLMs.
     workflow.add_node("detect_language", detect_language_node) 
     workflow.add_node("summarize_conversation", summarize_conversation) 
     workflow.add_node("semantic_gateway_node", semantic_gateway_node)
@@ -119,6 +146,10 @@ def create_graph():
     workflow.add_node("answerability_guard", answerability_guard)
     workflow.add_node("fallback_responder", fallback_responder)
 
+    # Cache Semântico (atalho para perguntas equivalentes já respondidas)
+    workflow.add_node("semantic_cache_lookup", semantic_cache_lookup)
+    workflow.add_node("semantic_cache_store", semantic_cache_store)
+
     # 2. Definição do Fluxo Linear (Sequência Obrigatória)
     # Entry Point -> Detect -> Summarize -> Contextualize -> Router
     workflow.set_entry_point("detect_language") 
@@ -126,11 +157,14 @@ def create_graph():
     workflow.add_edge("summarize_conversation", "semantic_gateway_node")
 
     # 3. Definição do Fluxo Condicional (Bifurcação)
-    # Do 'semantic_gateway_node', o fluxo se divide em dois caminhos possíveis.
+    # Depois do gateway, o cache semântico pode responder direto (END).
+    # Caso contrário, o fluxo se divide em dois caminhos possíveis.
+    workflow.add_edge("semantic_gateway_node", "semantic_cache_lookup")
     workflow.add_conditional_edges(
-        "semantic_gateway_node",      # Nó de origem
-        decide_next_node,   # Função de decisão
+        "semantic_cache_lookup",      # Nó de origem
+        decide_after_cache,   # Função de decisão
         {                   # Mapa: Retorno da Função -> Nome do Nó Destino
+            "end": END,
             "retrieve": "retrieve",
             "generate_casual": "generate_casual"
         }
@@ -154,15 +188,128 @@ def create_graph():
     # Tanto o RAG quanto o Casual convergem para a verificação de tradução.
     # Tanto o RAG, Casual e Fallback convergem para a verificação de tradução.
     # Isso evita duplicar lógica de tradução em cada braço.
-    workflow.add_conditional_edges("generate_rag", should_translate, {"end": END, "translator_node": "translator_node"})
-    workflow.add_conditional_edges("fallback_responder", should_translate, {"end": END, "translator_node": "translator_node"})
-    workflow.add_conditional_edges("generate_casual", should_translate, {"end": END, "translator_node": "translator_node"})
+    # "end" passa antes pelo `semantic_cache_store`, que guarda a resposta final.
+    workflow.add_conditional_edges("generate_rag", should_translate, {"end": "semantic_cache_store", "translator_node": "translator_node"})
+    workflow.add_conditional_edges("fallback_responder", should_translate, {"end": "semantic_cache_store", "translator_node": "translator_node"})
+    workflow.add_conditional_edges("generate_casual", should_translate, {"end": "semantic_cache_store", "translator_node": "translator_node"})
 
-    # Se passar pelo tradutor, o próximo passo é sempre o fim (END).
-    workflow.add_edge("translator_node", END)
+    # Se passar pelo tradutor, o próximo passo é guardar a resposta (já traduzida) e encerrar.
+    workflow.add_edge("translator_node", "semantic_cache_store")
+    workflow.add_edge("semantic_cache_store", END)
 
     # Compila para gerar o executável (Runnable)
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+# Instância exportada pronta para uso (modo stateless: histórico vem do cliente)
+agent_app = create_graph()
+
+# --------------------------------------------------
+# Grafo com Sessões Persistentes (Checkpointer SQLite)
+# --------------------------------------------------
+# O estado completo (mensagens já resumidas + `summary`) fica salvo por `session_id`,
+# então o cliente envia apenas a mensagem nova a cada turno.
+# A conexão aiosqlite precisa de um event loop ativo, por isso a criação é preguiçosa.
+_session_app = None
+_session_conn = None
+_session_saver = None
+_session_app_lock = asyncio.Lock()
+
+async def get_session_app():
+    """
+    Retorna o grafo compilado com checkpointer SQLite (criado na primeira chamada).
+    A criação já aplica a retenção: sessões expiradas são apagadas no startup do worker.
+    """
+    global _session_app, _session_conn, _session_saver
+    if _session_app is None:
+        async with _session_app_lock:
+            if _session_app is None:
+                _session_conn = aiosqlite.connect(settings.SESSIONS_DB_PATH)
+                _session_saver = AsyncSqliteSaver(_session_conn)
+                await _setup_session_activity(_session_saver)
+                await prune_sessions()
+                _session_app = create_graph(checkpointer=_session_saver)
+    return _session_app
 
-# Instância exportada pronta para uso
-agent_app = create_graph()
\ No newline at end of file
+# --------------------------------------------------
+# Retenção das Sessões
+# --------------------------------------------------
+# O checkpointer não guarda quando uma thread foi usada pela última vez: a tabela
+# `session_activity` registra o último turno de cada `session_id`.
+_last_prune_at = 0.0
+
+async def _setup_session_activity(saver: AsyncSqliteSaver):
+    # Cria as tabelas do checkpointer e a de atividade. Threads gravadas antes da
+    # retenção existir entram com "agora" (expiram TTL dias depois, nunca de imediato).
+    await saver.setup()
+    async with saver.lock:
+        await saver.conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        await saver.conn.execute(
+            "INSERT OR IGNORE INTO session_activity (thread_id, updated_at) "
+            "SELECT DISTINCT thread_id, ? FROM checkpoints",
+            (time.time(),)
+        )
+        await saver.conn.commit()
+
+async def touch_session(session_id: str):
+    """
+    Registra um turno da sessão (adia a expiração) e roda a limpeza periódica se já passou
+    `SESSIONS_CLEANUP_INTERVAL_SECONDS` desde a última.
+    """
+    saver = _session_saver
+    if saver is None:
+        return
+    async with saver.lock:
+        await saver.conn.execute(
+            "INSERT INTO session_activity (thread_id, updated_at) VALUES (?, ?) "
+            "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (session_id, time.time())
+        )
+        await saver.conn.commit()
+    if time.monotonic() - _last_prune_at >= settings.SESSIONS_CLEANUP_INTERVAL_SECONDS:
+        await prune_sessions()
+
+async def prune_sessions() -> int:
+    """
+    Apaga as sessões sem turnos há mais de `SESSIONS_TTL_DAYS` dias.
+
+    Returns:
+        Quantidade de sessões apagadas.
+    """
+    global _last_prune_at
+    saver = _session_saver
+    if saver is None or settings.SESSIONS_TTL_DAYS <= 0:
+        return 0
+    _last_prune_at = time.monotonic()
+    cutoff = time.time() - settings.SESSIONS_TTL_DAYS * 86400
+    try:
+        async with saver.lock:
+            async with saver.conn.execute(
+                "SELECT thread_id FROM session_activity WHERE updated_at < ?", (cutoff,)
+            ) as cursor:
+                expired = [row[0] for row in await cursor.fetchall()]
+            for table in ("checkpoints", "writes", "session_activity"):
+                await saver.conn.executemany(
+                    f"DELETE FROM {table} WHERE thread_id = ?", [(thread_id,) for thread_id in expired]
+                )
+            await saver.conn.commit()
+    except Exception as e:
+        # Retenção é manutenção: uma falha (ex: banco ocupado por outro worker) não derruba o turno
+        logger.warning(f"⚠️ [SESSIONS] Falha na limpeza de sessões expiradas: {e}")
+        return 0
+    if expired:
+        logger.info(f"🧹 [SESSIONS] {len(expired)} sessões sem atividade há mais de {settings.SESSIONS_TTL_DAYS:g} dias apagadas.")
+    return len(expired)
+
+async def close_session_app():
+    """
+    Fecha a conexão do checkpointer (chamado no shutdown do servidor).
+    A thread do aiosqlite não é daemon: sem isso o processo do worker não encerra.
+    """
+    global _session_app, _session_conn, _session_saver
+    if _session_conn is not None:
+        await _session_conn.close()
+    _session_app = None
+    _session_conn = None
+    _session_saver = None
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+SERVIÇO DE AVALIAÇÃO EM LOTE (Batch)
+--------------------------------------------------
+Objetivo:
+    Rodar muitas perguntas pelo grafo de uma vez, em paralelo, para regressões rápidas
+    (ex: a bateria do `simulate_chat.py`) sem passar por HTTP/SSE pergunta a pergunta.
+
+Atuação no Sistema:
+    - Backend / Service: Usado pelo endpoint `/api/chat/batch` e pelo script `batch_eval.py`.
+
+Responsabilidades:
+    1. Executar cada conversa no `agent_app` (stateless), com paralelismo limitado.
+    2. Coletar a resposta final, o último nó executado e o tempo de cada nó.
+    3. Isolar falhas: uma conversa com erro não derruba o lote.
+    4. Disputar as vagas do controle de admissão junto com os chats ao vivo: um lote nunca
+       soma execuções além de `MAX_CONCURRENT_RUNS` no worker (o paralelismo do lote só
+       limita quantas conversas dele ocupam vaga ou fila ao mesmo tempo).
+
+Comunicação:
+    - Usa `stream_agent_events` (app.graph.streaming) sobre o `agent_app` (app.graph.workflow).
+    - Usa `admission` (app.core.admission), o mesmo controlador das rotas de chat.
+"""
+
+import asyncio
+from typing import AsyncIterator, List, Optional
+from pydantic import BaseModel
+from app.core.admission import admission, AdmissionTicket
+from app.graph.workflow import agent_app
+from app.graph.streaming import build_initial_state, stream_agent_events
+from app.core.logger import logger
+
+
+# Com a fila de admissão cheia, intervalo até tentar reservar de novo (em vez do 503 das rotas).
+ADMISSION_RETRY_SECONDS = 0.5
+
+
+class BatchConversation(BaseModel):
+    """
+    Uma conversa do lote: a mensagem nova + o histórico anterior (mesmo formato do /chat).
+    """
+    id: Optional[str] = None # Identificador livre (ecoado no resultado)
+    message: str
+    history: Optional[List[dict]] = []
+    language: Optional[str] = "pt-br"
+
+
+async def _reserve_run() -> AdmissionTicket:
+    """Reserva uma vaga no controle de admissão, esperando a fila ter espaço."""
+    while True:
+        ticket = admission.try_reserve()
+        if ticket is not None:
+            return ticket
+        await asyncio.sleep(ADMISSION_RETRY_SECONDS)
+
+
+async def run_conversation(conversation: BatchConversation) -> dict:
+    """
+    Executa uma conversa no grafo e retorna o resultado (nunca levanta exceção).
+    A execução só começa quando o controle de admissão concede a vaga.
+    """
+    initial_state = build_initial_state(conversation.message, conversation.history, conversation.language)
+    result = {
+        "id": conversation.id,
+        "message": conversation.message,
+        "language": conversation.language,
+        "response": None,
+        "last_node": None,
+        "timings": {},
+        "error": None
+    }
+
+    ticket = await _reserve_run()
+    ticket.claimed = True
+    try:
+        async for _ in ticket.wait_turn():
+            pass
+        async for event_type, data in stream_agent_events(agent_app, initial_state):
+            if event_type == "final":
+                result["response"] = data["response"] or None
+                result["last_node"] = data["last_node"]
+                result["timings"] = data["timings"]
+        if not result["response"]:
+            result["error"] = "No response generated."
+    except Exception as e:
+        logger.error(f"Batch Error ({conversation.id or conversation.message[:30]}): {e}")
+        result["error"] = str(e)
+    finally:
+        ticket.release()
+
+    return result
+
+
+async def run_batch(conversations: List[BatchConversation], concurrency: int = 4) -> AsyncIterator[dict]:
+    """
+    Executa o lote com no máximo `concurrency` conversas simultâneas.
+    Os resultados são produzidos na ordem em que terminam (campo `index` = posição na entrada).
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(index: int, conversation: BatchConversation) -> dict:
+        async with semaphore:
+            result = await run_conversation(conversation)
+        result["index"] = index
+        return result
+
+    tasks = [asyncio.create_task(run_one(i, c)) for i, c in enumerate(conversations)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Consumidor desistiu (ex: cliente desconectou): não deixa execuções órfãs.
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,136 @@
+"""
+MONTAGEM DO CONTEXTO (Deduplicação + Empacotamento)
+--------------------------------------------------
+Objetivo:
+    Transformar os chunks recuperados no texto de CONTEXTO enviado ao guard e ao gerador,
+    sem repetir texto e sem passar de um orçamento de tokens.
+
+Atuação no Sistema:
+    - Backend / Service: Chamado pelo nó `retrieve` logo após a busca.
+
+Responsabilidades:
+    1. Remover chunks duplicados (mesmo texto).
+    2. Mesclar chunks vizinhos do mesmo arquivo: o splitter usa `chunk_overlap=200`, então
+       dois chunks adjacentes repetem até 200 caracteres. A posição vem de `start_index`
+       (gravado na ingestão); sem ela, a sobreposição é detectada pelo próprio texto.
+    3. Empacotar as seções na ordem de relevância até o orçamento (`CONTEXT_TOKEN_BUDGET`),
+       com estimativa de ~4 caracteres por token. A última seção que não cabe é cortada
+       numa quebra de linha.
+
+Comunicação:
+    - Usado por `app.graph.nodes.rag`.
+"""
+
+from typing import List, Optional
+from langchain_core.documents import Document
+
+CHARS_PER_TOKEN = 4
+
+# Sobreposição mínima (sem `start_index`) para considerar dois chunks vizinhos.
+# Evita "mesclar" textos que só coincidem numa palavra curta.
+MIN_TEXT_OVERLAP = 30
+MAX_TEXT_OVERLAP = 400
+
+# Abaixo disso não vale a pena incluir um pedaço cortado de uma seção.
+MIN_SECTION_CHARS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """Maior sufixo de `left` que é prefixo de `right` (0 se menor que o mínimo)."""
+    limit = min(len(left), len(right), MAX_TEXT_OVERLAP)
+    for size in range(limit, MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+class _Section:
+    """Trecho contínuo de um arquivo, formado por um ou mais chunks."""
+    def __init__(self, doc: Document, rank: int):
+        self.source = doc.metadata.get("source", "Desconhecido")
+        self.start: Optional[int] = doc.metadata.get("start_index")
+        self.text = doc.page_content
+        self.rank = rank
+
+    @property
+    def end(self) -> Optional[int]:
+        return None if self.start is None else self.start + len(self.text)
+
+    def try_merge(self, doc: Document) -> bool:
+        """Anexa `doc` se ele continua esta seção (sobrepõe ou encosta). Retorna se mesclou."""
+        if doc.metadata.get("source", "Desconhecido") != self.source:
+            return False
+
+        start = doc.metadata.get("start_index")
+        text = doc.page_content
+        if self.start is not None and start is not None:
+            if start < self.start or start > self.end:
+                return False
+            # Já contido na seção (ex: chunk repetido)
+            if start + len(text) <= self.end:
+                return True
+            self.text += text[self.end - start:]
+            return True
+
+        if text in self.text:
+            return True
+        # Sem posição: o chunk pode continuar a seção (depois) ou antecedê-la
+        overlap = _text_overlap(self.text, text)
+        if overlap:
+            self.text += text[overlap:]
+        else:
+            overlap = _text_overlap(text, self.text)
+            if not overlap:
+                return False
+            self.text = text + self.text[overlap:]
+        self.start = None  # posição deixa de ser confiável
+        return True
+
+
+def build_context(docs: List[Document], token_budget: int) -> str:
+    """
+    Monta o CONTEXTO a partir dos documentos (em ordem de relevância).
+
+    Returns:
+        Texto com seções "--- FONTE: arquivo ---" separadas por linha em branco.
+    """
+    # Ordem por arquivo e posição para achar os vizinhos; o rank guarda a relevância.
+    ranked = list(enumerate(docs))
+    ranked.sort(key=lambda item: (
+        item[1].metadata.get("source", ""),
+        item[1].metadata.get("start_index", -1)
+    ))
+
+    sections: List[_Section] = []
+    for rank, doc in ranked:
+        for section in sections:
+            if section.try_merge(doc):
+                section.rank = min(section.rank, rank)
+                break
+        else:
+            sections.append(_Section(doc, rank))
+
+    sections.sort(key=lambda section: section.rank)
+
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    parts = []
+    for section in sections:
+        source = section.source.split("\\")[-1]  # Pega apenas o nome do arquivo no Windows
+        header = f"--- FONTE: {source} ---\n"
+        remaining = budget_chars - sum(len(part) + 2 for part in parts) - len(header)
+        if remaining < MIN_SECTION_CHARS:
+            if parts:
+                break
+            remaining = MIN_SECTION_CHARS
+
+        text = section.text
+        if len(text) > remaining:
+            cut = text.rfind("\n", 0, remaining)
+            text = text[:cut if cut > 0 else remaining].rstrip()
+        parts.append(header + text)
+
+    return "\n\n".join(parts)
@@ -0,0 +1,254 @@
+"""
+PIPELINE ADAPTATIVO DE EMBEDDINGS (Ingestão)
+--------------------------------------------------
+Objetivo:
+    Vetorizar e gravar os chunks da ingestão em lotes grandes, na maior vazão que a cota
+    da API de Embeddings permitir, sem perder nenhum chunk no caminho.
+
+Atuação no Sistema:
+    - Backend / Service: Usado pelo `RagService.ingest_data` (roda fora do servidor, síncrono).
+
+Responsabilidades:
+    1. Token Bucket: limita a vazão em chunks/segundo (um lote de N chunks consome N fichas).
+    2. AIMD: a cada lote bem-sucedido a taxa sobe um pouco; a cada 429/ResourceExhausted
+       ela cai pela metade (aumento aditivo, redução multiplicativa).
+    3. Classificação dos erros:
+       - Transitório (429, 5xx, timeout, conexão): backoff exponencial com jitter entre
+         tentativas do mesmo lote, dentro de um orçamento total de espera.
+       - Permanente do chunk (ex.: 400 por conteúdo inválido): sem nova tentativa; o lote é
+         dividido ao meio, sem espera, para isolar o chunk problemático.
+       - Fatal (chave inválida, permissão, modelo inexistente): não depende do chunk. Nada
+         mais é enviado e todos os chunks restantes voltam como falha.
+    4. Lote que esgota as tentativas é dividido ao meio e reprocessado. Só o que falhar
+       sozinho volta como falha (nunca é descartado em silêncio). Esgotado o orçamento de
+       espera (`max_retry_seconds`), os restantes voltam como falha sem novas chamadas.
+    5. Relatório de progresso: chunks gravados, chunks/s, taxa atual e retentativas.
+
+Limitações:
+    - Falhas voltam para a dead-letter: o boot segue com o índice parcial em vez de ficar
+      preso na ingestão (`python ingest.py --retry-failed` reenvia depois).
+
+Comunicação:
+    - Recebe o vectorstore (Chroma) do `RagService`: o embedding acontece dentro de `add_documents`.
+    - Configurado por `settings.INGEST_*`.
+"""
+
+import time
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from app.core.errors import is_rate_limit_error, is_transient_error
+
+# Erros de configuração/credencial: repetir ou dividir o lote não muda o resultado.
+FATAL_ERROR_NAMES = (
+    "AuthenticationError", "PermissionDeniedError", "PermissionDenied",
+    "Unauthenticated", "NotFoundError", "NotFound",
+)
+FATAL_ERROR_MARKERS = (
+    "API key", "API_KEY_INVALID", "PERMISSION_DENIED", "UNAUTHENTICATED", "NOT_FOUND",
+)
+
+TRANSIENT, PERMANENT, FATAL = "transient", "permanent", "fatal"
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classifica o erro de um lote: TRANSIENT (vale esperar e repetir), FATAL (credencial ou
+    configuração, independe do chunk) ou PERMANENT (da requisição/conteúdo do lote).
+    """
+    if is_transient_error(error):
+        return TRANSIENT
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if type(error).__name__ in FATAL_ERROR_NAMES:
+            return FATAL
+        for attribute in ("status_code", "code"):
+            if getattr(error, attribute, None) in (401, 403, 404):
+                return FATAL
+        message = str(error)
+        if any(marker in message for marker in FATAL_ERROR_MARKERS):
+            return FATAL
+        error = error.__cause__ or error.__context__
+    return PERMANENT
+
+
+class TokenBucket:
+    """
+    Balde de fichas com taxa ajustável em tempo de execução (síncrono).
+    """
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, amount: float):
+        """Bloqueia até haver `amount` fichas (limitado à capacidade do balde)."""
+        amount = min(amount, self.capacity)
+        self._refill()
+        while self.tokens < amount:
+            self.sleep((amount - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= amount
+
+
+@dataclass
+class IngestionReport:
+    """Resultado da ingestão de um conjunto de chunks."""
+    total: int = 0
+    written: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    retry_wait_seconds: float = 0.0
+    failures: Dict[str, str] = field(default_factory=dict)  # id -> último erro
+    elapsed_seconds: float = 0.0
+
+    @property
+    def failed_ids(self) -> List[str]:
+        return list(self.failures)
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.written / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class AdaptiveEmbeddingPipeline:
+    """
+    Grava chunks no vectorstore em lotes, com taxa adaptativa e retentativas.
+    """
+    def __init__(
+        self,
+        vectorstore,
+        batch_size: int = 50,
+        initial_rate: float = 1.0,
+        min_rate: float = 0.1,
+        max_rate: float = 20.0,
+        max_retries: int = 6,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        max_retry_seconds: float = 300.0,
+        sleep: Callable[[float], None] = time.sleep,
+        log: Callable[[str], None] = print
+    ):
+        self.vectorstore = vectorstore
+        self.batch_size = max(1, batch_size)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_seconds = max_retry_seconds
+        self.sleep = sleep
+        self.log = log
+        self.bucket = TokenBucket(rate=initial_rate, capacity=self.batch_size, sleep=sleep)
+
+    # --------------------------------------------------
+    # Controle de taxa (AIMD)
+    # --------------------------------------------------
+    def _on_success(self):
+        # Aumento aditivo: ~5% da taxa máxima por lote bem-sucedido
+        self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate * 0.05)
+
+    def _on_rate_limit(self):
+        # Redução multiplicativa: metade da taxa atual
+        self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponencial com "full jitter": espalha as retentativas no tempo
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    # --------------------------------------------------
+    # Execução
+    # --------------------------------------------------
+    def run(self, ids: List[str], documents: List[Document], on_written: Optional[Callable[[List[str]], None]] = None) -> IngestionReport:
+        """
+        Grava `documents` com os respectivos `ids`. Retorna o relatório com os IDs que falharam.
+        `on_written` é chamado após cada lote gravado (checkpoint do progresso).
+        """
+        report = IngestionReport(total=len(ids))
+        start = time.monotonic()
+
+        pending = [
+            (ids[i : i + self.batch_size], documents[i : i + self.batch_size])
+            for i in range(0, len(ids), self.batch_size)
+        ]
+        while pending:
+            batch_ids, batch_docs = pending.pop(0)
+            error, kind = self._write_batch(batch_ids, batch_docs, report)
+            if error is None:
+                report.written += len(batch_ids)
+                if on_written:
+                    on_written(batch_ids)
+            elif kind == FATAL or self._retry_budget_exhausted(report):
+                # Não depende do chunk (ou acabou o tempo): nada mais é enviado
+                remaining = batch_ids + [cid for ids_, _ in pending for cid in ids_]
+                for cid in remaining:
+                    report.failures[cid] = error
+                pending.clear()
+                reason = "erro de configuração/credencial" if kind == FATAL else "orçamento de retentativas esgotado"
+                self.log(f"   🛑 Ingestão interrompida ({reason}): {len(remaining)} chunks vão para a dead-letter. {error}")
+            elif len(batch_ids) > 1:
+                # Divide para isolar o(s) chunk(s) problemático(s) e tenta as metades
+                middle = len(batch_ids) // 2
+                self.log(f"   ✂️ Dividindo lote de {len(batch_ids)} chunks para isolar a falha.")
+                pending[:0] = [
+                    (batch_ids[:middle], batch_docs[:middle]),
+                    (batch_ids[middle:], batch_docs[middle:])
+                ]
+            else:
+                report.failures[batch_ids[0]] = error
+                self.log(f"   ❌ Chunk {batch_ids[0][:12]} falhou: {error}")
+
+            report.elapsed_seconds = time.monotonic() - start
+            self.log(
+                f"   - {report.written}/{report.total} chunks | {report.chunks_per_second:.2f} chunks/s | "
+                f"taxa {self.bucket.rate:.2f}/s | retentativas {report.retries} (429: {report.rate_limited})"
+            )
+
+        report.elapsed_seconds = time.monotonic() - start
+        return report
+
+    def _retry_budget_exhausted(self, report: IngestionReport) -> bool:
+        return report.retry_wait_seconds >= self.max_retry_seconds
+
+    def _write_batch(self, batch_ids: List[str], batch_docs: List[Document], report: IngestionReport) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Tenta gravar o lote. Retorna (None, None) em caso de sucesso ou
+        (mensagem do último erro, classificação do erro).
+        Só erros transitórios são repetidos, e só enquanto houver orçamento de espera.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire(len(batch_ids))
+            try:
+                self.vectorstore.add_documents(documents=batch_docs, ids=batch_ids)
+                self._on_success()
+                return None, None
+            except Exception as e:
+                message = f"{e.__class__.__name__}: {e}"
+                kind = classify_error(e)
+                if kind != TRANSIENT:
+                    self.log(f"   ⚠️ Erro não transitório no lote de {len(batch_ids)} chunks ({kind}): {e}")
+                    return message, kind
+                if is_rate_limit_error(e):
+                    report.rate_limited += 1
+                    self._on_rate_limit()
+                if attempt == self.max_retries or self._retry_budget_exhausted(report):
+                    self.log(f"   ⚠️ Lote de {len(batch_ids)} chunks esgotou as tentativas: {e}")
+                    return message, kind
+
+                report.retries += 1
+                # A espera nunca passa do orçamento restante
+                delay = min(self._backoff(attempt), self.max_retry_seconds - report.retry_wait_seconds)
+                report.retry_wait_seconds += delay
+                self.log(f"   ⏳ Erro transitório no lote ({e.__class__.__name__}). Nova tentativa em {delay:.1f}s...")
+                self.sleep(delay)
+        return "sem tentativas", TRANSIENT
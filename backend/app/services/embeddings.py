@@ -0,0 +1,221 @@
+"""
+CACHE DE EMBEDDINGS (Consultas + Store de Documentos)
+--------------------------------------------------
+Objetivo:
+    Evitar ida à rede (Google Embeddings) para textos que já foram vetorizados.
+    Perguntas populares do portfólio chegam reescritas pelo gateway quase sempre do mesmo jeito,
+    e cada uma é vetorizada pelo cache semântico e pelo `retrieve`.
+    Na ingestão, reconstruir o índice (`FORCE_REINGEST`, `ingest.py --full`) não revetoriza
+    chunks cujo texto não mudou.
+
+Atuação no Sistema:
+    - Backend / Service: Envolve o objeto de embeddings criado no `RagService`.
+
+Responsabilidades:
+    1. Chave: modelo + tipo (consulta) + texto normalizado (espaços colapsados, Unicode NFC).
+    2. Camada 1 (memória): LRU por processo.
+    3. Camada 2 (disco, opcional): SQLite compartilhado entre workers e persistente entre restarts.
+       Vetores gravados como float32 (base64), ~4x menor que JSON.
+    4. Contabilizar acertos/falhas em `metrics` (taxa de acerto exposta em `/api/metrics`).
+    5. Store de documentos (`embed_documents`): endereçado por conteúdo (modelo + texto exato),
+       sem TTL, guardado FORA do diretório do banco vetorial; apagar o índice não apaga os vetores.
+
+Comunicação:
+    - Usado por `app.services.rag_service`.
+    - Reusa `LRUCache` e `SQLiteCacheStore` de `app.core.cache`.
+    - Configurado por `settings.EMBEDDING_CACHE_*` e `settings.EMBEDDING_STORE_*`.
+"""
+
+import asyncio
+import base64
+import hashlib
+import unicodedata
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.core.cache import LRUCache, SQLiteCacheStore
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+
+def normalize_text(text: str) -> str:
+    """Normalização conservadora: não altera o significado (nem a caixa) do texto."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def _encode_vector(vector: List[float]) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _decode_vector(raw: str) -> List[float]:
+    return np.frombuffer(base64.b64decode(raw), dtype=np.float32).tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrapper de `Embeddings` (LangChain) com cache das consultas e store de documentos.
+    Pode ser passado no lugar do objeto original (ex: `embedding_function` do Chroma).
+    Sem `memory`, as consultas passam direto; sem `document_store`, os documentos também.
+    """
+    def __init__(
+        self,
+        inner: Embeddings,
+        model_name: str,
+        memory: Optional[LRUCache] = None,
+        disk: Optional[SQLiteCacheStore] = None,
+        document_store: Optional[SQLiteCacheStore] = None
+    ):
+        self.inner = inner
+        self.model_name = model_name
+        self.memory = memory
+        self.disk = disk
+        self.document_store = document_store
+
+    def _key(self, text: str) -> str:
+        raw = f"{self.model_name}|query|{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _document_key(self, text: str) -> str:
+        # Texto exato (sem normalizar): o vetor guardado é o do conteúdo indexado
+        raw = f"{self.model_name}|document|{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # --------------------------------------------------
+    # Consultas (cacheadas)
+    # --------------------------------------------------
+    def embed_query(self, text: str) -> List[float]:
+        if self.memory is None:
+            return self.inner.embed_query(text)
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.memory is None:
+            return await self.inner.aembed_query(text)
+        key = self._key(text)
+        vector = self.memory.get(key)
+        if vector is not None:
+            metrics.increment("embedding_cache_hits_memory")
+            return vector
+
+        vector = await asyncio.to_thread(self._lookup, key)
+        if vector is None:
+            vector = await self.inner.aembed_query(text)
+            await asyncio.to_thread(self._store, key, vector)
+        return vector
+
+    # --------------------------------------------------
+    # Documentos (store endereçado por conteúdo: só na ingestão)
+    # --------------------------------------------------
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_store is None:
+            return self.inner.embed_documents(texts)
+        vectors, missing = self._lookup_documents(texts)
+        if missing:
+            fresh = self.inner.embed_documents([texts[i] for i in missing])
+            self._store_documents(texts, missing, fresh, vectors)
+        return vectors
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_store is None:
+            return await self.inner.aembed_documents(texts)
+        vectors, missing = await asyncio.to_thread(self._lookup_documents, texts)
+        if missing:
+            fresh = await self.inner.aembed_documents([texts[i] for i in missing])
+            await asyncio.to_thread(self._store_documents, texts, missing, fresh, vectors)
+        return vectors
+
+    def _lookup_documents(self, texts: List[str]):
+        """Vetores já conhecidos (None nas posições sem vetor) + índices que faltam."""
+        vectors: List[Optional[List[float]]] = []
+        missing = []
+        for i, text in enumerate(texts):
+            try:
+                raw = self.document_store.get(self._document_key(text))
+            except Exception as e:
+                logger.warning(f"Embedding store read failed: {e}")
+                raw = None
+            vectors.append(_decode_vector(raw) if raw is not None else None)
+            if raw is None:
+                missing.append(i)
+
+        metrics.increment("embedding_store_hits", len(texts) - len(missing))
+        metrics.increment("embedding_store_misses", len(missing))
+        return vectors, missing
+
+    def _store_documents(self, texts: List[str], missing: List[int], fresh: List[List[float]], vectors: list):
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+            try:
+                self.document_store.set(self._document_key(texts[i]), _encode_vector(vector))
+            except Exception as e:
+                logger.warning(f"Embedding store write failed: {e}")
+
+    # --------------------------------------------------
+    # Camadas
+    # --------------------------------------------------
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        vector = self.memory.get(key)
+        if vector is not None:
+            metrics.increment("embedding_cache_hits_memory")
+            return vector
+
+        if self.disk:
+            try:
+                raw = self.disk.get(key)
+            except Exception as e:
+                logger.warning(f"Embedding cache (disk) read failed: {e}")
+                raw = None
+            if raw is not None:
+                vector = _decode_vector(raw)
+                self.memory.set(key, vector)
+                metrics.increment("embedding_cache_hits_disk")
+                return vector
+
+        metrics.increment("embedding_cache_misses")
+        return None
+
+    def _store(self, key: str, vector: List[float]):
+        self.memory.set(key, vector)
+        if self.disk:
+            try:
+                self.disk.set(key, _encode_vector(vector))
+            except Exception as e:
+                logger.warning(f"Embedding cache (disk) write failed: {e}")
+
+
+def with_embedding_cache(embeddings: Embeddings, model_name: str) -> Embeddings:
+    """
+    Envolve o objeto de embeddings com o cache de consultas e o store de documentos
+    (cada um se ativado nas configurações).
+    """
+    memory = disk = document_store = None
+    if settings.EMBEDDING_CACHE_ENABLED:
+        memory = LRUCache(max_items=settings.EMBEDDING_CACHE_MAX_MEMORY_ITEMS)
+        if settings.EMBEDDING_CACHE_DB_PATH:
+            disk = SQLiteCacheStore(
+                settings.EMBEDDING_CACHE_DB_PATH,
+                ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+                max_entries=settings.EMBEDDING_CACHE_MAX_DISK_ENTRIES
+            )
+    if settings.EMBEDDING_STORE_PATH:
+        # Sem TTL: o vetor de um texto não muda enquanto o modelo for o mesmo
+        document_store = SQLiteCacheStore(
+            settings.EMBEDDING_STORE_PATH,
+            max_entries=settings.EMBEDDING_STORE_MAX_ENTRIES
+        )
+
+    if memory is None and document_store is None:
+        return embeddings
+    return CachedEmbeddings(
+        inner=embeddings,
+        model_name=model_name,
+        memory=memory,
+        disk=disk,
+        document_store=document_store
+    )
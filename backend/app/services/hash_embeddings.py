@@ -0,0 +1,55 @@
+"""
+EMBEDDINGS POR HASH (Offline e Determinísticos)
+--------------------------------------------------
+Objetivo:
+    Substituir o Google Embeddings quando não há rede nem chave (`EMBEDDING_PROVIDER=mock`):
+    benchmarks do grafo, CI e desenvolvimento local.
+
+Atuação no Sistema:
+    - Backend / Service: Criado pelo `RagService` no lugar do `GoogleGenerativeAIEmbeddings`.
+
+Responsabilidades:
+    1. Vetor = soma de ±1 na posição do hash de cada palavra ("hashing trick"), normalizado.
+       Textos que compartilham palavras ficam próximos no cosseno: a busca continua
+       devolvendo trechos relacionados (não apenas aleatórios).
+    2. Mesmo texto -> mesmo vetor, em qualquer processo e máquina (BLAKE2, sem sal).
+
+Limitações:
+    - Não captura sinônimos nem semântica: serve para medir tempo, não qualidade.
+    - Um índice criado com estes vetores não é compatível com o do Google (e vice-versa).
+
+Comunicação:
+    - Configurado por `settings.EMBEDDING_PROVIDER` e `settings.MOCK_EMBEDDING_DIM`.
+"""
+
+import hashlib
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.services.lexical_index import tokenize
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Embeddings determinísticos por hash das palavras.
+    """
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+            vector[digest % self.dim] += 1.0 if (digest >> 63) else -1.0
+        norm = float(np.linalg.norm(vector))
+        if norm == 0:
+            # Texto sem palavras: vetor fixo (o cosseno continua definido)
+            vector[0] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,164 @@
+"""
+ESTADO DA INGESTÃO (Manifesto + Dead-Letter)
+--------------------------------------------------
+Objetivo:
+    Tornar a ingestão retomável e auditável: saber se a última execução terminou,
+    quanto já foi gravado e quais chunks falharam de vez.
+
+Atuação no Sistema:
+    - Backend / Service: Usado pelo `RagService.ingest_data`, pelo `ingest.py --retry-failed`
+      e pelo `boot.py` (detecção de índice parcial).
+
+Responsabilidades:
+    1. Manifesto (`ingest_manifest.json`): status da execução ("running" / "complete"),
+       IDs esperados no índice e quantos já foram gravados. É salvo após cada lote
+       (checkpoint), então uma execução interrompida fica marcada como "running".
+    2. Dead-letter (`ingest_dead_letter.jsonl`): um chunk por linha (ID, conteúdo, metadados,
+       erro), suficiente para reenviá-lo sem reler os arquivos de origem.
+
+Retomada:
+    Os IDs dos chunks são o hash do conteúdo, então retomar não exige guardar posição:
+    a próxima execução compara o índice com os arquivos e só envia o que falta.
+    O manifesto diz *que* a execução anterior não terminou (e deve ser finalizada).
+
+Comunicação:
+    - Arquivos gravados dentro do diretório do índice (`settings.CHROMA_DB_DIR`).
+"""
+
+import os
+import json
+import time
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
+
+MANIFEST_FILE = "ingest_manifest.json"
+DEAD_LETTER_FILE = "ingest_dead_letter.jsonl"
+
+STATUS_RUNNING = "running"
+STATUS_COMPLETE = "complete"
+
+
+def _atomic_write(path: str, content: str):
+    # Troca atômica: um crash no meio da gravação nunca deixa o arquivo pela metade
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class IngestManifest:
+    """
+    Checkpoint da execução de ingestão.
+    """
+    def __init__(self, directory: str, data: Optional[dict] = None):
+        self.path = os.path.join(directory, MANIFEST_FILE)
+        self.data = data or {}
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["IngestManifest"]:
+        """Manifesto da última execução (None se nunca houve, ex: índice anterior a este recurso)."""
+        try:
+            with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+                return cls(directory, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def status(self) -> Optional[str]:
+        return self.data.get("status")
+
+    @property
+    def target_ids(self) -> List[str]:
+        return self.data.get("target_ids", [])
+
+    def start(self, target_ids: List[str], pending: int):
+        now = time.time()
+        self.data = {
+            "status": STATUS_RUNNING,
+            "started_at": now,
+            "updated_at": now,
+            "target_ids": target_ids,
+            "pending": pending,
+            "written": 0,
+            "failed": 0
+        }
+        self.save()
+
+    def mark_written(self, ids: List[str]):
+        self.data["written"] = self.data.get("written", 0) + len(ids)
+        self.data["updated_at"] = time.time()
+        self.save()
+
+    def finish(self, failed: int):
+        self.data["status"] = STATUS_COMPLETE
+        self.data["failed"] = failed
+        self.data["updated_at"] = time.time()
+        self.save()
+
+    def save(self):
+        _atomic_write(self.path, json.dumps(self.data))
+
+
+class DeadLetter:
+    """
+    Chunks que não entraram no índice após todas as tentativas.
+    Reescrito ao final de cada execução: reflete apenas as falhas atuais.
+    """
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, DEAD_LETTER_FILE)
+
+    def write(self, chunks: Dict[str, Document], failures: Dict[str, str]):
+        if not failures:
+            self.clear()
+            return
+        now = time.time()
+        lines = [
+            json.dumps({
+                "id": cid,
+                "page_content": chunks[cid].page_content,
+                "metadata": chunks[cid].metadata,
+                "error": error,
+                "failed_at": now
+            }, ensure_ascii=False)
+            for cid, error in failures.items()
+        ]
+        _atomic_write(self.path, "\n".join(lines) + "\n")
+
+    def read(self) -> Dict[str, Document]:
+        """IDs -> Documentos que falharam (vazio se não houver dead-letter)."""
+        chunks = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    chunks[entry["id"]] = Document(page_content=entry["page_content"], metadata=entry["metadata"])
+        except OSError:
+            pass
+        return chunks
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def inspect_index(directory: str) -> str:
+    """
+    Diagnóstico do índice sem abrir o banco (usado no boot):
+        - "missing":  diretório ausente ou vazio.
+        - "partial":  última ingestão interrompida ou com chunks na dead-letter.
+        - "complete": ingestão terminou sem falhas (ou índice anterior ao manifesto).
+    """
+    if not os.path.isdir(directory) or not os.listdir(directory):
+        return "missing"
+
+    manifest = IngestManifest.load(directory)
+    if manifest is not None and manifest.status != STATUS_COMPLETE:
+        return "partial"
+    if os.path.exists(os.path.join(directory, DEAD_LETTER_FILE)):
+        return "partial"
+    return "complete"
@@ -0,0 +1,171 @@
+"""
+ÍNDICE LÉXICO (BM25)
+--------------------------------------------------
+Objetivo:
+    Complementar a busca vetorial com busca por palavra exata. Nomes de projetos,
+    bibliotecas e siglas (ex: "LangGraph", "SSE", "RAG") costumam ficar de fora do top-k
+    semântico; o BM25 os encontra pelo termo.
+
+Atuação no Sistema:
+    - Backend / Service: Construído pelo `RagService` ao final da ingestão e combinado
+      com a busca vetorial via Reciprocal Rank Fusion (RRF).
+
+Responsabilidades:
+    1. Tokenizar (minúsculas, sem acentos, alfanumérico) e montar as listas invertidas.
+    2. Persistir o índice em JSON ao lado do índice vetorial (carrega em milissegundos:
+       a base tem poucas centenas de chunks).
+    3. Pontuar com BM25 (Okapi) e devolver os melhores chunks.
+
+Arquivos (dentro do diretório do índice):
+    - lexical_index/bm25.json: versão do índice, estatísticas, listas invertidas e chunks.
+
+Comunicação:
+    - Usado por `app.services.rag_service`.
+"""
+
+import os
+import re
+import json
+import math
+import unicodedata
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.documents import Document
+
+LEXICAL_INDEX_DIR = "lexical_index"
+BM25_FILE = "bm25.json"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Minúsculas + remoção de acentos ("programação" == "programacao")."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return TOKEN_PATTERN.findall(stripped)
+
+
+class BM25Index:
+    """
+    Índice BM25 somente leitura (reconstruído a cada ingestão).
+    """
+    def __init__(self, chunks: List[dict], postings: Dict[str, list], doc_lengths: List[int], version: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.version = version
+        self.k1 = k1
+        self.b = b
+
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        avg_length = float(self.doc_lengths.mean()) if len(doc_lengths) else 0.0
+        # Normalização de tamanho pré-calculada: k1 * (1 - b + b * |d| / avgdl)
+        self._length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / (avg_length or 1.0))
+
+        total = len(chunks)
+        self.postings = {}
+        for term, entries in postings.items():
+            docs = np.asarray([doc for doc, _ in entries], dtype=np.int32)
+            freqs = np.asarray([tf for _, tf in entries], dtype=np.float32)
+            idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.postings[term] = (docs, freqs, idf)
+
+    # --------------------------------------------------
+    # Construção e Persistência
+    # --------------------------------------------------
+    @staticmethod
+    def export(directory: str, ids: List[str], documents: List[str], metadatas: List[dict], version: Optional[str]):
+        """
+        Tokeniza os chunks e grava o índice em disco (troca atômica, como o índice NumPy).
+        """
+        postings: Dict[str, list] = {}
+        doc_lengths = []
+        for position, text in enumerate(documents):
+            # O nome do arquivo também é pesquisável (ex: "projeto_x.md")
+            source = (metadatas[position] or {}).get("source", "")
+            tokens = tokenize(f"{source} {text}")
+            doc_lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                postings.setdefault(token, []).append([position, tf])
+
+        index_dir = os.path.join(directory, LEXICAL_INDEX_DIR)
+        os.makedirs(index_dir, exist_ok=True)
+        path = os.path.join(index_dir, BM25_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": version,
+                "doc_lengths": doc_lengths,
+                "postings": postings,
+                "chunks": [
+                    {"id": chunk_id, "page_content": text, "metadata": metadata or {}}
+                    for chunk_id, text, metadata in zip(ids, documents, metadatas)
+                ]
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def stored_version(directory: str) -> Optional[str]:
+        """Versão do índice de onde a exportação saiu (None se não houver exportação)."""
+        try:
+            with open(os.path.join(directory, LEXICAL_INDEX_DIR, BM25_FILE), "r", encoding="utf-8") as f:
+                return json.load(f).get("version")
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def load(cls, directory: str) -> "BM25Index":
+        with open(os.path.join(directory, LEXICAL_INDEX_DIR, BM25_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["chunks"], data["postings"], data["doc_lengths"], version=data.get("version"))
+
+    # --------------------------------------------------
+    # Busca
+    # --------------------------------------------------
+    def search(self, query: str, k: int = 4) -> List[Document]:
+        return [doc for doc, _ in self.search_with_score(query, k=k)]
+
+    def search_with_score(self, query: str, k: int = 4) -> List[tuple]:
+        """
+        Top-k por BM25. Só retorna chunks com pelo menos um termo da pergunta.
+        """
+        if not self.chunks:
+            return []
+
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for term in set(tokenize(query)):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            docs, freqs, idf = entry
+            scores[docs] += idf * freqs * (self.k1 + 1) / (freqs + self._length_norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) == 0:
+            return []
+        k = min(k, len(matched))
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(self._document(i), float(scores[i])) for i in top]
+
+    def _document(self, i: int) -> Document:
+        chunk = self.chunks[int(i)]
+        return Document(page_content=chunk["page_content"], metadata=dict(chunk["metadata"]), id=chunk.get("id"))
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    Combina rankings diferentes (vetorial + léxico) sem precisar calibrar as pontuações:
+    score(d) = soma de 1 / (rrf_k + posição de d em cada lista).
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, doc)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
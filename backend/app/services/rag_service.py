@@ -13,9 +13,14 @@ Atuação no Sistema:
 Responsabilidades:
     1. Ler arquivos de documentação (Profile, Projetos) do disco.
     2. Quebrar textos grandes em pedaços menores (Chunks).
-    3. Gerar vetores numéricos usando Google Embeddings.
-    4. Gerenciar persistência no ChromaDB (Vector Store).
-    5. Realizar buscas por similaridade semântica.
+    3. Gerar vetores numéricos usando Google Embeddings (ou hash offline, `EMBEDDING_PROVIDER=mock`).
+    4. Gerenciar persistência no ChromaDB (Vector Store), com backend alternativo
+       em NumPy (matriz em memória) para bases pequenas.
+    5. Ingestão incremental: cada chunk tem um ID derivado do hash do conteúdo + metadados,
+       então só chunks novos/alterados são vetorizados e os removidos são apagados.
+       Retomável (manifesto de progresso) e com dead-letter para os chunks que falharem.
+    6. Realizar buscas híbridas (síncrona e assíncrona): similaridade semântica + BM25
+       (índice léxico construído na ingestão), combinadas por Reciprocal Rank Fusion.
 
 Integrações Externas:
     - Google Generative AI (Embeddings): Transforma texto em vetor.
@@ -23,15 +28,46 @@ Integrações Externas:
 """
 
 import os
+import json
 import shutil
 import time
-from typing import List
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import hashlib
+import uuid
+import asyncio
+import threading
+import numpy as np
+from typing import List, Optional, Tuple
 from langchain_chroma import Chroma
 from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from chromadb.api.shared_system_client import SharedSystemClient
 from app.core.config import settings
+from app.core.http import share_google_client
+from app.services.embeddings import with_embedding_cache
+from app.services.hash_embeddings import HashEmbeddings
+from app.services.embedding_pipeline import AdaptiveEmbeddingPipeline, IngestionReport
+from app.services.ingest_state import IngestManifest, DeadLetter, STATUS_RUNNING
+from app.services.vector_index import NumpyVectorIndex
+from app.services.lexical_index import BM25Index, reciprocal_rank_fusion
+
+# Marcador gravado dentro do diretório do índice ao final de cada ingestão.
+# Caches derivados do índice (ex: cache semântico de respostas) comparam a versão para
+# se invalidar, inclusive em outros processos (ingestão roda fora do servidor).
+INDEX_VERSION_FILE = "index_version"
+
+
+def chunk_id(chunk: Document) -> str:
+    """
+    ID determinístico de um chunk: hash do conteúdo + metadados.
+    O mesmo trecho gera sempre o mesmo ID; qualquer edição gera um ID novo.
+    """
+    raw = json.dumps(
+        {"content": chunk.page_content, "metadata": chunk.metadata},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
 
 class RagService:
     def __init__(self):
@@ -39,42 +75,188 @@ class RagService:
         Inicializa o serviço configurando o modelo de Embeddings e caminhos.
         Lê as configurações globais de `app.core.config`.
         """
-        # Inicializa o modelo de Embeddings do Google (gratuito/rápido)
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model=settings.EMBEDDING_MODEL,
-            google_api_key=settings.GOOGLE_API_KEY
-        )
+        self.embeddings = self._make_embeddings()
         self.persist_directory = os.path.join(os.getcwd(), settings.CHROMA_DB_DIR)
         self.collection_name = settings.COLLECTION_NAME
 
+        # Handle do banco vetorial reaproveitado por todas as buscas do processo.
+        # Criado sob demanda (o import do módulo não abre o banco) e protegido por lock:
+        # as buscas rodam no thread pool (ver `aquery`), então várias threads podem
+        # pedir o handle ao mesmo tempo.
+        self._vectorstore = None
+        self._vectorstore_version = None
+        self._vectorstore_lock = threading.Lock()
+        # Índice léxico (BM25): mesmo ciclo de vida do handle vetorial
+        self._lexical_index = None
+        self._lexical_version = None
+
+    @staticmethod
+    def _make_embeddings():
+        """
+        Modelo de embeddings de `settings.EMBEDDING_PROVIDER`.
+        """
+        if settings.EMBEDDING_PROVIDER.lower() == "mock":
+            # Offline: calcular o hash custa menos que consultar o cache em disco
+            return HashEmbeddings(dim=settings.MOCK_EMBEDDING_DIM)
+
+        # Modelo de Embeddings do Google (gratuito/rápido), importado só quando usado.
+        # Envolvido pelo cache de consultas (perguntas repetidas não vão à rede) e pelo
+        # store de documentos (reconstruir o índice não revetoriza texto inalterado).
+        # O cliente do Google usa o mesmo pool HTTP dos modelos Gemini (app.core.http).
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        return with_embedding_cache(
+            share_google_client(GoogleGenerativeAIEmbeddings(
+                model=settings.EMBEDDING_MODEL,
+                google_api_key=settings.GOOGLE_API_KEY
+            )),
+            model_name=settings.EMBEDDING_MODEL
+        )
+
     def get_vectorstore(self):
         """
         Retorna a conexão ativa com o banco vetorial (ChromaDB).
         
         Por que existe: Para permitir que instâncias do serviço ou callers
         possam realizar operações diretas no banco.
+
+        O handle é aberto uma única vez por processo e reaproveitado. Se o índice foi
+        reconstruído desde a abertura (versão do índice mudou, ex: `ingest.py` rodando
+        em outro processo), o handle é reaberto automaticamente.
         
         Returns:
-            Objeto Chroma configurado e pronto para busca.
+            Objeto Chroma configurado e pronto para busca (ou `NumpyVectorIndex`, com
+            `VECTOR_BACKEND = "numpy"`; ambos expõem `similarity_search[_by_vector]`).
         """
-        return Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embeddings,
-            collection_name=self.collection_name
+        version = self.get_index_version()
+        vectorstore = self._vectorstore
+        if vectorstore is not None and version == self._vectorstore_version:
+            return vectorstore
+
+        with self._vectorstore_lock:
+            if self._vectorstore is not None and version != self._vectorstore_version:
+                self._close_vectorstore()
+            if self._vectorstore is None:
+                self._vectorstore = self._open_vectorstore(version)
+                self._vectorstore_version = version
+            return self._vectorstore
+
+    def _open_vectorstore(self, version: Optional[str]):
+        """
+        Abre o backend configurado em `settings.VECTOR_BACKEND`.
+        """
+        if settings.VECTOR_BACKEND != "numpy":
+            return Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings,
+                collection_name=self.collection_name
+            )
+
+        # Índice exportado ausente ou de outra versão (ex: ingerido antes desta opção existir):
+        # exporta a partir do Chroma uma vez e segue só com a matriz.
+        if NumpyVectorIndex.stored_version(self.persist_directory) != version or version is None:
+            self.export_numpy_index()
+        return NumpyVectorIndex.load(self.persist_directory, self.embeddings)
+
+    def get_lexical_index(self) -> BM25Index:
+        """
+        Índice BM25 da versão atual do índice (carregado uma vez por processo).
+        Se a exportação estiver ausente ou desatualizada (índice anterior à busca híbrida),
+        é reconstruída a partir da coleção do Chroma.
+        """
+        version = self.get_index_version()
+        lexical = self._lexical_index
+        if lexical is not None and version == self._lexical_version:
+            return lexical
+
+        with self._vectorstore_lock:
+            if self._lexical_index is None or version != self._lexical_version:
+                if BM25Index.stored_version(self.persist_directory) != version or version is None:
+                    self.export_lexical_index()
+                self._lexical_index = BM25Index.load(self.persist_directory)
+                self._lexical_version = version
+            return self._lexical_index
+
+    def export_lexical_index(self, vectorstore: Optional[Chroma] = None):
+        """
+        Constrói o índice BM25 a partir dos textos da coleção do Chroma.
+        """
+        if vectorstore is None:
+            vectorstore = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings,
+                collection_name=self.collection_name
+            )
+        data = vectorstore.get(include=["documents", "metadatas"])
+        BM25Index.export(
+            self.persist_directory,
+            ids=data["ids"],
+            documents=data["documents"],
+            metadatas=data["metadatas"],
+            version=self.get_index_version()
         )
 
-    def ingest_data(self, data_path: str):
+    def export_numpy_index(self, vectorstore: Optional[Chroma] = None):
+        """
+        Exporta os vetores + textos da coleção do Chroma para o backend NumPy.
         """
-        Executa o pipeline completo de ingestão de dados (Indexação).
+        if vectorstore is None:
+            vectorstore = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings,
+                collection_name=self.collection_name
+            )
+        data = vectorstore.get(include=["embeddings", "documents", "metadatas"])
+        NumpyVectorIndex.export(
+            self.persist_directory,
+            vectors=data["embeddings"] if len(data["ids"]) else [],
+            documents=data["documents"],
+            metadatas=data["metadatas"],
+            version=self.get_index_version(),
+            ids=data["ids"]
+        )
+
+    def reopen(self):
+        """
+        Descarta o handle atual: a próxima busca abre o banco de novo.
+        Chamado após a ingestão (o diretório do banco é apagado e recriado).
+        """
+        with self._vectorstore_lock:
+            self._close_vectorstore()
+
+    def _close_vectorstore(self):
+        self._vectorstore = None
+        self._vectorstore_version = None
+        self._lexical_index = None
+        self._lexical_version = None
+        # O Chroma mantém um cliente por diretório em cache global: sem limpar, a próxima
+        # abertura reaproveitaria o cliente apontando para os arquivos apagados.
+        SharedSystemClient.clear_system_cache()
+
+    def ingest_data(self, data_path: str, full: bool = False):
+        """
+        Executa o pipeline de ingestão de dados (Indexação).
         
         Fluxo:
         1. Carrega arquivos .md da pasta especificada.
         2. Divide (Split) em chunks menores para caber no contexto da LLM.
-        3. Limpa o banco anterior (Full Refresh) para evitar duplicatas.
-        4. Insere os novos dados com controle rígido de taxa (Rate Limit) para evitar erro 429 da API do Google.
+        3. Calcula o ID (hash) de cada chunk e compara com os IDs já indexados:
+           apenas chunks novos/alterados são vetorizados; os que sumiram são apagados.
+           Com `full=True`, limpa o banco anterior (Full Refresh) e reindexa tudo.
+        4. Vetoriza e insere os chunks em lotes, com taxa adaptativa (Token Bucket + backoff em 429).
+        5. Grava uma nova versão do índice (invalida caches derivados, como o semântico),
+           somente se algo mudou.
+        6. Exporta a matriz de vetores para o backend NumPy.
+
+        Um manifesto (checkpoint) é gravado a cada lote; se a execução anterior foi
+        interrompida, esta a finaliza. Chunks que falharem vão para a dead-letter
+        (reenviados com `ingest.py --retry-failed`).
         
         Args:
             data_path: Caminho absoluto para a pasta contendo os arquivos .md.
+            full: Apaga o índice e revetoriza todos os chunks (comportamento antigo).
+
+        Returns:
+            `IngestionReport` (ou None se não houve dados para processar).
         """
         print(f"📂 Lendo arquivos de: {data_path}")
         
@@ -100,6 +282,13 @@ class RagService:
 
         print(f"📄 Encontrados {len(docs)} documentos.")
 
+        # Fonte relativa à pasta de dados: o hash (ID) dos chunks não pode depender de onde
+        # o projeto está no disco (máquina local vs container).
+        for doc in docs:
+            source = doc.metadata.get("source")
+            if source:
+                doc.metadata["source"] = os.path.relpath(source, data_path).replace(os.sep, "/")
+
         # --------------------------------------------------
         # 2. Split (Fragmentação)
         # --------------------------------------------------
@@ -108,74 +297,316 @@ class RagService:
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,  # Tamanho alvo de cada pedaço
             chunk_overlap=200, # Sobreposição para não perder contexto entre cortes
-            separators=["\n# ", "\n## ", "\n### ", "\n", " ", ""] # Tenta cortar em cabeçalhos primeiro
+            separators=["\n# ", "\n## ", "\n### ", "\n", " ", ""], # Tenta cortar em cabeçalhos primeiro
+            add_start_index=True # Posição no arquivo: permite mesclar chunks vizinhos no contexto
         )
         chunks = text_splitter.split_documents(docs)
         print(f"🧩 Criados {len(chunks)} chunks de informação.")
 
+        # ID por conteúdo. Chunks idênticos (mesmo texto, mesmo arquivo) viram um só.
+        chunks_by_id = {}
+        for chunk in chunks:
+            chunks_by_id.setdefault(chunk_id(chunk), chunk)
+
         # --------------------------------------------------
-        # 3. Limpeza (Full Refresh)
+        # 3. Limpeza (Full Refresh) ou Diff (Incremental)
         # --------------------------------------------------
-        # Apaga o diretório físico do banco para garantir que não haja "lixo" antigo.
-        if os.path.exists(self.persist_directory):
-            try:
-                shutil.rmtree(self.persist_directory)
-                print("🧹 Banco antigo limpo.")
-            except Exception as e:
-                print(f"⚠️ Aviso: Não foi possível apagar pasta antiga: {e}")
+        if full:
+            # Apaga o diretório físico do banco para garantir que não haja "lixo" antigo.
+            if os.path.exists(self.persist_directory):
+                try:
+                    shutil.rmtree(self.persist_directory)
+                    print("🧹 Banco antigo limpo.")
+                except Exception as e:
+                    print(f"⚠️ Aviso: Não foi possível apagar pasta antiga: {e}")
+
+            # O handle aberto (se houver) aponta para os arquivos apagados.
+            self.reopen()
+
+        vectorstore = Chroma(
+            embedding_function=self.embeddings,
+            persist_directory=self.persist_directory,
+            collection_name=self.collection_name
+        )
+
+        # IDs já indexados (sem carregar vetores nem textos).
+        # Índices criados antes do ID por hash têm IDs aleatórios: na primeira execução
+        # todos são trocados, como um Full Refresh.
+        existing_ids = set(vectorstore.get(include=[])["ids"])
+        new_ids = [cid for cid in chunks_by_id if cid not in existing_ids]
+        removed_ids = [cid for cid in existing_ids if cid not in chunks_by_id]
+        print(
+            f"🔍 Diff: {len(new_ids)} novos/alterados | {len(removed_ids)} removidos | "
+            f"{len(chunks_by_id) - len(new_ids)} inalterados."
+        )
+
+        previous = IngestManifest.load(self.persist_directory)
+        resuming = previous is not None and previous.status == STATUS_RUNNING
+        if resuming:
+            print("♻️ Ingestão anterior foi interrompida: retomando de onde parou.")
+
+        if not new_ids and not removed_ids and not resuming:
+            print("✅ Nada mudou desde a última ingestão. Índice mantido.")
+            DeadLetter(self.persist_directory).clear()
+            return IngestionReport()
+
+        # Checkpoint: a partir daqui, um crash deixa o manifesto como "running"
+        manifest = IngestManifest(self.persist_directory)
+        manifest.start(target_ids=list(chunks_by_id), pending=len(new_ids))
+
+        if removed_ids:
+            vectorstore.delete(ids=removed_ids)
+            print(f"🗑️ {len(removed_ids)} chunks removidos do índice.")
 
         # --------------------------------------------------
-        # 4. Ingestão Controlada (Throttling)
+        # 4. Ingestão Controlada (Throttling Adaptativo)
         # --------------------------------------------------
         # A API do Google Embeddings tem limites estritos de requisições por minuto (RPM).
-        # Implementamos um "Modo Tartaruga" que envia 1 chunk de cada vez com pausas.
-        print("🚀 Iniciando ingestão em lotes (Modo Seguro)...")
-        
+        # Lotes grandes + Token Bucket: a vazão sobe enquanto a API aceita e cai pela metade
+        # a cada 429, com backoff exponencial. Chunks que falham de vez são reportados
+        # (e, por não estarem no índice, entram de novo no diff da próxima ingestão).
+        print(f"🚀 Iniciando ingestão em lotes de até {settings.INGEST_BATCH_SIZE} chunks...")
+
+        report = self._make_pipeline(vectorstore).run(
+            new_ids, [chunks_by_id[cid] for cid in new_ids], on_written=manifest.mark_written
+        )
+        self._print_report(report)
+        DeadLetter(self.persist_directory).write(chunks_by_id, report.failures)
+
+        # --------------------------------------------------
+        # 5. Nova Versão do Índice
+        # --------------------------------------------------
+        self._finalize_index(vectorstore)
+        manifest.finish(failed=len(report.failures))
+
+        print("✅ Ingestão concluída! Banco salvo.")
+        return report
+
+    def retry_failed(self):
+        """
+        Reenvia os chunks da dead-letter (sem reler os arquivos de origem).
+        Chunks que não pertencem mais ao conjunto atual (arquivo editado depois da falha)
+        são descartados: a próxima ingestão normal cuida da versão nova.
+
+        Returns:
+            `IngestionReport` do reenvio.
+        """
+        dead_letter = DeadLetter(self.persist_directory)
+        failed = dead_letter.read()
+        if not failed:
+            print("✅ Dead-letter vazia: nada para reenviar.")
+            return IngestionReport()
+
+        manifest = IngestManifest.load(self.persist_directory)
+        if manifest is not None and manifest.target_ids:
+            current = set(manifest.target_ids)
+            stale = [cid for cid in failed if cid not in current]
+            for cid in stale:
+                del failed[cid]
+            if stale:
+                print(f"🧹 {len(stale)} chunks da dead-letter não existem mais nos arquivos e foram ignorados.")
+
         vectorstore = Chroma(
             embedding_function=self.embeddings,
             persist_directory=self.persist_directory,
             collection_name=self.collection_name
         )
+        # Já indexados (ex: uma ingestão normal rodou depois da falha)
+        present = set(vectorstore.get(ids=list(failed), include=[])["ids"]) if failed else set()
+        retry_ids = [cid for cid in failed if cid not in present]
+        print(f"🔁 Reenviando {len(retry_ids)} chunks da dead-letter...")
+
+        report = self._make_pipeline(vectorstore).run(retry_ids, [failed[cid] for cid in retry_ids])
+        self._print_report(report)
+        dead_letter.write(failed, report.failures)
+
+        if report.written:
+            self._finalize_index(vectorstore)
+        if manifest is not None:
+            manifest.finish(failed=len(report.failures))
+        return report
+
+    def _make_pipeline(self, vectorstore: Chroma) -> AdaptiveEmbeddingPipeline:
+        return AdaptiveEmbeddingPipeline(
+            vectorstore,
+            batch_size=settings.INGEST_BATCH_SIZE,
+            initial_rate=settings.INGEST_INITIAL_RATE,
+            min_rate=settings.INGEST_MIN_RATE,
+            max_rate=settings.INGEST_MAX_RATE,
+            max_retries=settings.INGEST_MAX_RETRIES,
+            max_retry_seconds=settings.INGEST_MAX_RETRY_SECONDS
+        )
+
+    @staticmethod
+    def _print_report(report: IngestionReport):
+        print(
+            f"📊 {report.written}/{report.total} chunks gravados em {report.elapsed_seconds:.1f}s "
+            f"({report.chunks_per_second:.2f} chunks/s) | retentativas: {report.retries} "
+            f"(429: {report.rate_limited})"
+        )
+        if report.failed_ids:
+            print(
+                f"❌ {len(report.failed_ids)} chunks NÃO foram indexados (salvos na dead-letter). "
+                "Rode `python ingest.py --retry-failed` para reenviá-los."
+            )
+
+    def _finalize_index(self, vectorstore: Chroma):
+        """
+        Publica o índice: versão nova (invalida caches derivados) + exportações NumPy e BM25.
+        """
+        self._write_index_version()
+        # Exportação para o backend NumPy (sempre: trocar de backend não exige reingestão)
+        self.export_numpy_index(vectorstore)
+        self.export_lexical_index(vectorstore)
 
-        batch_size = 1   # Envia 1 chunk por request
-        delay_seconds = 4 # Espera 4 segundos entre requests
-        total_chunks = len(chunks)
+    def _write_index_version(self):
+        """
+        Grava um identificador novo para o índice recém-construído.
+        """
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with open(os.path.join(self.persist_directory, INDEX_VERSION_FILE), "w", encoding="utf-8") as f:
+            f.write(f"{int(time.time())}-{uuid.uuid4().hex}")
+
+    def get_index_version(self) -> Optional[str]:
+        """
+        Versão atual do índice (muda a cada ingestão). None se o índice não tiver marcador.
+        """
+        try:
+            with open(os.path.join(self.persist_directory, INDEX_VERSION_FILE), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def query(self, question: str, k: Optional[int] = None) -> List[Document]:
+        """
+        Realiza a busca (semântica + léxica) no banco.
         
-        for i in range(0, total_chunks, batch_size):
-            batch = chunks[i : i + batch_size]
-            print(f"   - Processando chunk {i+1} de {total_chunks}...")
-            
-            try:
-                # Tenta adicionar o chunk
-                vectorstore.add_documents(documents=batch)
-            except Exception as e:
-                # Tratamento de erro 429 (Too Many Requests) ou outros erros de rede
-                print(f"⚠️ Erro ao processar chunk {i}: {e}")
-                print("⏳ Erro detectado. Esperando 30s para o Google esfriar a cabeça...")
-                time.sleep(30) # Backoff exponencial (manual)
-                
-                # Tenta novamente (Retry único)
-                try:
-                    vectorstore.add_documents(documents=batch)
-                    print("   ✅ Recuperado com sucesso.")
-                except:
-                    print("   ❌ Falha definitiva neste chunk. O dado será perdido.")
+        Args:
+            question: A pergunta ou frase para buscar similaridade.
+            k: Máximo de resultados (Top-K). Padrão: `settings.RETRIEVAL_MAX_K`.
             
-            # Pausa obrigatória entre iteracoes
-            time.sleep(delay_seconds)
-
-        print("✅ Ingestão concluída! Banco salvo.")
+        Returns:
+            Lista de Documentos (langchain_core.documents.Document) relevantes, com a
+            similaridade em `metadata["relevance_score"]`. Pode ter menos de k itens.
+        """
+        return self._attach_scores(self._search(question, self.embeddings.embed_query(question), k))
 
-    def query(self, question: str, k: int = 4):
+    async def aquery(self, question: str, k: Optional[int] = None) -> List[Document]:
         """
-        Realiza a busca semântica no banco.
+        Versão assíncrona de `query`, usada pelos nós do grafo.
         
+        Por que existe:
+            O embedding da pergunta é uma chamada HTTP (Google). Aqui ela é feita com
+            `aembed_query`, liberando o event loop enquanto a rede responde.
+            A abertura do índice local e a busca (ChromaDB/HNSW) são bloqueantes, então
+            rodam no thread pool padrão para não travar outras conversas.
+            
         Args:
             question: A pergunta ou frase para buscar similaridade.
-            k: Número de resultados para retornar (Top-K).
+            k: Máximo de resultados (Top-K). Padrão: `settings.RETRIEVAL_MAX_K`.
             
         Returns:
-            Lista de Documentos (langchain_core.documents.Document) mais similares.
+            Lista de Documentos relevantes, com a similaridade em `metadata["relevance_score"]`.
+        """
+        return self._attach_scores(await self.aquery_with_scores(question, k))
+
+    async def aquery_with_scores(self, question: str, k: Optional[int] = None) -> List[Tuple[Document, Optional[float]]]:
+        """
+        Como `aquery`, mas retorna [(Documento, similaridade de cosseno com a pergunta)].
+        """
+        embedding = await self.embeddings.aembed_query(question)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self._search(question, embedding, k))
+
+    def _search(self, question: str, embedding: List[float], k: Optional[int]) -> List[Tuple[Document, Optional[float]]]:
         """
-        vectorstore = self.get_vectorstore() 
-        return vectorstore.similarity_search(question, k=k)
\ No newline at end of file
+        Busca vetorial (+ BM25 com `HYBRID_SEARCH_ENABLED`) com o embedding já calculado.
+
+        1. Cada busca traz `HYBRID_CANDIDATES` candidatos; a fusão RRF ordena os `max_k` melhores.
+        2. Cada um recebe a similaridade de cosseno com a pergunta (vetores lidos do índice
+           pelo ID; vale para os dois backends e para os que vieram só do BM25).
+        3. `select_relevant` corta os fracos (limiar absoluto + margem em relação ao melhor),
+           mantendo ao menos `min_k`.
+        """
+        max_k = k or settings.RETRIEVAL_MAX_K
+        vectorstore = self.get_vectorstore()
+        candidates = max(max_k, settings.HYBRID_CANDIDATES)
+        semantic = vectorstore.similarity_search_by_vector(embedding, k=candidates)
+
+        protected = set()
+        if settings.HYBRID_SEARCH_ENABLED:
+            lexical = self.get_lexical_index().search(question, k=candidates)
+            ranked = reciprocal_rank_fusion([semantic, lexical], k=max_k, rrf_k=settings.RRF_K)
+            # Melhor acerto por termo exato: nomes próprios/siglas podem ter cosseno baixo
+            if lexical and lexical[0].id:
+                protected.add(lexical[0].id)
+        else:
+            ranked = semantic[:max_k]
+
+        scored = list(zip(ranked, self._cosine_scores(vectorstore, embedding, ranked)))
+        return select_relevant(
+            scored,
+            min_k=min(settings.RETRIEVAL_MIN_K, max_k),
+            min_score=settings.RETRIEVAL_MIN_SCORE,
+            margin=settings.RETRIEVAL_SCORE_MARGIN,
+            protected_ids=protected
+        )
+
+    @staticmethod
+    def _cosine_scores(vectorstore, embedding: List[float], docs: List[Document]) -> List[Optional[float]]:
+        """
+        Similaridade de cosseno entre a pergunta e cada documento (None se não houver vetor).
+        Uma leitura por ID no índice local: não depende da métrica configurada na coleção.
+        """
+        ids = [doc.id for doc in docs if doc.id]
+        if not ids:
+            return [None] * len(docs)
+
+        data = vectorstore.get(ids=ids, include=["embeddings"])
+        vectors = dict(zip(data["ids"], data["embeddings"]))
+        query = np.asarray(embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query) or 1.0
+
+        scores = []
+        for doc in docs:
+            vector = vectors.get(doc.id)
+            if vector is None:
+                scores.append(None)
+                continue
+            vector = np.asarray(vector, dtype=np.float32)
+            scores.append(float(vector @ query / ((np.linalg.norm(vector) or 1.0) * query_norm)))
+        return scores
+
+    @staticmethod
+    def _attach_scores(scored: List[Tuple[Document, Optional[float]]]) -> List[Document]:
+        docs = []
+        for doc, score in scored:
+            if score is not None:
+                doc.metadata["relevance_score"] = round(score, 4)
+            docs.append(doc)
+        return docs
+
+
+def select_relevant(
+    scored: List[Tuple[Document, Optional[float]]],
+    min_k: int,
+    min_score: float,
+    margin: float,
+    protected_ids: Optional[set] = None
+) -> List[Tuple[Document, Optional[float]]]:
+    """
+    Política de corte (mantém a ordem do ranking):
+        - As `min_k` primeiras posições sempre ficam (o guard decide se bastam).
+        - As demais ficam se score >= `min_score` E score >= (melhor score - `margin`).
+        - Documentos em `protected_ids` (melhor acerto léxico) e sem score conhecido ficam.
+    Uma pergunta com um único acerto forte não arrasta mais três chunks irrelevantes.
+    """
+    known = [score for _, score in scored if score is not None]
+    floor = max(min_score, max(known) - margin) if known else min_score
+    protected_ids = protected_ids or set()
+
+    selected = []
+    for position, (doc, score) in enumerate(scored):
+        if position < min_k or score is None or score >= floor or doc.id in protected_ids:
+            selected.append((doc, score))
+    return selected
@@ -0,0 +1,130 @@
+"""
+CACHE SEMÂNTICO DE RESPOSTAS
+--------------------------------------------------
+Objetivo:
+    Reaproveitar respostas finais para perguntas equivalentes escritas de formas diferentes
+    ("Quais as skills do Marcos?" / "Que tecnologias o Marcos domina?"), pulando
+    retrieve + guard + geração quando a pergunta já foi respondida.
+
+Atuação no Sistema:
+    - Backend / Service: Consultado pelo nó `semantic_cache_lookup` (logo após o gateway)
+      e alimentado pelo nó `semantic_cache_store` (fim do grafo).
+
+Responsabilidades:
+    1. Guardar (embedding normalizado da pergunta reescrita -> resposta final),
+       separado por idioma e classificação.
+    2. Encontrar a pergunta mais parecida (similaridade de cosseno) acima do limiar.
+    3. Descartar tudo quando o índice vetorial for reconstruído (versão do índice mudou),
+       já que as respostas antigas podem citar dados desatualizados.
+
+Limitações:
+    - Estado local ao processo (cada worker do Uvicorn aquece o seu).
+    - Busca linear (NumPy) sobre no máximo `max_entries` vetores: suficiente para o
+      volume de perguntas de um portfólio.
+
+Comunicação:
+    - Usado por `app.graph.nodes.semantic_cache`.
+    - Configurado por `settings.SEMANTIC_CACHE_*`.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+
+
+class SemanticAnswerCache:
+    """
+    Respostas finais indexadas pelo embedding da pergunta.
+    """
+    def __init__(self, threshold: float = 0.92, max_entries: int = 500, ttl_seconds: Optional[float] = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._index_version: Optional[str] = None
+        # (idioma, classificação) -> {query_normalizada: (vetor, query, resposta, criado_em)}
+        self._buckets: Dict[Tuple[str, str], "OrderedDict[str, tuple]"] = {}
+
+    def lookup(
+        self,
+        embedding: List[float],
+        language: str,
+        classification: str,
+        index_version: Optional[str]
+    ) -> Optional[dict]:
+        """
+        Retorna `{"query", "answer", "score"}` da pergunta mais parecida acima do limiar, ou None.
+        """
+        with self._lock:
+            self._check_version(index_version)
+            bucket = self._buckets.get((language, classification))
+            if not bucket:
+                return None
+
+            self._drop_expired(bucket)
+            if not bucket:
+                return None
+
+            keys = list(bucket.keys())
+            matrix = np.stack([bucket[k][0] for k in keys])
+            scores = matrix @ _normalize(embedding)
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold:
+                return None
+
+            bucket.move_to_end(keys[best])
+            _, query, answer, _ = bucket[keys[best]]
+            return {"query": query, "answer": answer, "score": score}
+
+    def store(
+        self,
+        embedding: List[float],
+        query: str,
+        answer: str,
+        language: str,
+        classification: str,
+        index_version: Optional[str]
+    ):
+        with self._lock:
+            self._check_version(index_version)
+            bucket = self._buckets.setdefault((language, classification), OrderedDict())
+            key = " ".join(query.casefold().split())
+            bucket[key] = (_normalize(embedding), query, answer, time.time())
+            bucket.move_to_end(key)
+            while len(bucket) > self.max_entries:
+                bucket.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def _check_version(self, index_version: Optional[str]):
+        # Índice reconstruído (ingestão): respostas antigas podem estar desatualizadas.
+        if index_version != self._index_version:
+            self._buckets.clear()
+            self._index_version = index_version
+
+    def _drop_expired(self, bucket: "OrderedDict[str, tuple]"):
+        if not self.ttl_seconds:
+            return
+        limit = time.time() - self.ttl_seconds
+        for key in [k for k, v in bucket.items() if v[3] < limit]:
+            del bucket[key]
+
+
+def _normalize(vector: List[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+# Singleton: instância global (por processo/worker)
+semantic_cache = SemanticAnswerCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,151 @@
+"""
+ÍNDICE VETORIAL EM NUMPY (Busca Exata em Memória)
+--------------------------------------------------
+Objetivo:
+    Backend alternativo ao ChromaDB para bases pequenas (algumas dezenas/centenas de chunks):
+    todos os vetores ficam numa matriz float32 contígua e o top-k sai de um único
+    produto matriz-vetor, sem cliente persistente nem HNSW.
+
+Atuação no Sistema:
+    - Backend / Service: Selecionado por `settings.VECTOR_BACKEND = "numpy"` no `RagService`.
+
+Responsabilidades:
+    1. Exportar o índice (vetores normalizados + textos/metadados) a partir da coleção do Chroma.
+    2. Carregar a matriz via memory-map (`np.load(mmap_mode="r")`): o SO compartilha as páginas
+       entre os workers e só lê do disco o que for usado.
+    3. Busca exata por similaridade de cosseno (mesma interface de busca do Chroma usada no projeto).
+
+Arquivos (dentro do diretório do índice):
+    - numpy_index/vectors.npy: matriz (N x dim) float32, linhas normalizadas.
+    - numpy_index/chunks.json: versão do índice + [{"id", "page_content", "metadata"}] na mesma ordem.
+
+Comunicação:
+    - Usado por `app.services.rag_service`.
+"""
+
+import json
+import os
+from typing import List, Optional
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+NUMPY_INDEX_DIR = "numpy_index"
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.json"
+
+
+class NumpyVectorIndex:
+    """
+    Índice exato em memória. Somente leitura: é reconstruído a cada ingestão.
+    """
+    def __init__(self, vectors: np.ndarray, chunks: List[dict], embeddings: Embeddings, version: Optional[str] = None):
+        self.vectors = vectors
+        self.chunks = chunks
+        self.embeddings = embeddings
+        self.version = version
+        self._rows = None  # id -> linha da matriz (montado sob demanda)
+
+    # --------------------------------------------------
+    # Persistência
+    # --------------------------------------------------
+    @staticmethod
+    def export(directory: str, vectors: List[List[float]], documents: List[str], metadatas: List[dict], version: Optional[str], ids: Optional[List[str]] = None):
+        """
+        Grava o índice em disco (normalizando as linhas para o cosseno virar produto interno).
+        """
+        index_dir = os.path.join(directory, NUMPY_INDEX_DIR)
+        os.makedirs(index_dir, exist_ok=True)
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.size == 0:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        # Grava em arquivos temporários e troca atomicamente: vários workers podem exportar
+        # ao mesmo tempo e nenhum leitor pode ver um arquivo pela metade.
+        # A matriz é trocada antes do JSON (que carrega a versão): o JSON novo só aparece
+        # quando a matriz correspondente já está no lugar.
+        suffix = f".{os.getpid()}.tmp"
+        vectors_path = os.path.join(index_dir, VECTORS_FILE)
+        with open(vectors_path + suffix, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix / norms))
+        os.replace(vectors_path + suffix, vectors_path)
+
+        chunks_path = os.path.join(index_dir, CHUNKS_FILE)
+        with open(chunks_path + suffix, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": version,
+                "chunks": [
+                    {"id": chunk_id, "page_content": text, "metadata": metadata or {}}
+                    for chunk_id, text, metadata in zip(ids or [None] * len(documents), documents, metadatas)
+                ]
+            }, f, ensure_ascii=False)
+        os.replace(chunks_path + suffix, chunks_path)
+
+    @staticmethod
+    def stored_version(directory: str) -> Optional[str]:
+        """Versão do índice de onde a exportação saiu (None se não houver exportação)."""
+        try:
+            with open(os.path.join(directory, NUMPY_INDEX_DIR, CHUNKS_FILE), "r", encoding="utf-8") as f:
+                return json.load(f).get("version")
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def load(cls, directory: str, embeddings: Embeddings) -> "NumpyVectorIndex":
+        index_dir = os.path.join(directory, NUMPY_INDEX_DIR)
+        vectors_path = os.path.join(index_dir, VECTORS_FILE)
+        try:
+            vectors = np.load(vectors_path, mmap_mode="r")
+        except ValueError:
+            # Índice vazio: não há dados para mapear
+            vectors = np.load(vectors_path)
+        with open(os.path.join(index_dir, CHUNKS_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(vectors, data["chunks"], embeddings, version=data.get("version"))
+
+    # --------------------------------------------------
+    # Busca (mesma assinatura usada do Chroma)
+    # --------------------------------------------------
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k)]
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[tuple]:
+        """
+        Top-k exato por cosseno. Retorna [(Document, similaridade)] do mais para o menos similar.
+        """
+        if len(self.chunks) == 0:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = self.vectors @ query
+        k = min(k, len(scores))
+        # argpartition: O(N) para achar os k melhores; só eles são ordenados.
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._document(i), float(scores[i])) for i in top]
+
+    def get(self, ids: List[str], include: Optional[List[str]] = None) -> dict:
+        """
+        Leitura por ID no mesmo formato do `Chroma.get` (apenas IDs + embeddings).
+        """
+        if self._rows is None:
+            self._rows = {chunk.get("id"): i for i, chunk in enumerate(self.chunks)}
+        found = [cid for cid in ids if cid in self._rows]
+        return {
+            "ids": found,
+            "embeddings": [self.vectors[self._rows[cid]] for cid in found]
+        }
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k=k)
+
+    def _document(self, i: int) -> Document:
+        chunk = self.chunks[int(i)]
+        return Document(page_content=chunk["page_content"], metadata=dict(chunk["metadata"]), id=chunk.get("id"))
@@ -0,0 +1,109 @@
+"""
+AVALIAÇÃO EM LOTE (CLI de Regressão)
+--------------------------------------------------
+Objetivo:
+    Rodar uma bateria de perguntas direto no grafo (in-process), em paralelo,
+    e salvar respostas + tempos por nó. Substitui o `simulate_chat.py` (HTTP, uma
+    pergunta por vez) quando o objetivo é regressão rápida.
+
+Atuação no Sistema:
+    - Scripts / QA: Não faz parte do servidor online. Usa as mesmas chaves do `.env`.
+
+Responsabilidades:
+    1. Ler as conversas de um arquivo JSON (lista ou {"conversations": [...]}) ou NDJSON.
+    2. Executá-las via `batch_service.run_batch` com paralelismo configurável.
+    3. Gravar os resultados em JSON ou NDJSON e imprimir um resumo (erros + tempo médio por nó).
+
+Formato de cada conversa:
+    {"id": "opcional", "message": "Quais as skills do Marcos?", "history": [], "language": "pt-br"}
+
+Como usar:
+    Execute via terminal na raíz do backend:
+    `python batch_eval.py perguntas.json --concurrency 8 --format ndjson --output resultados.ndjson`
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import defaultdict
+
+# Hack de Path: Adiciona o diretório atual ao sys.path para conseguir importar 'app'
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.batch_service import BatchConversation, run_batch
+
+
+def load_conversations(path: str) -> list:
+    """
+    Lê o arquivo de entrada. Aceita JSON (lista ou objeto com `conversations`) ou NDJSON.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+
+    try:
+        data = json.loads(raw)
+        if isinstance(data, dict):
+            data = data.get("conversations", [])
+    except json.JSONDecodeError:
+        # NDJSON: uma conversa por linha
+        data = [json.loads(line) for line in raw.splitlines() if line.strip()]
+
+    return [BatchConversation(**item) for item in data]
+
+
+def print_summary(results: list, wall_time: float):
+    """
+    Resumo no stderr (o stdout pode estar recebendo os resultados).
+    """
+    errors = [r for r in results if r["error"]]
+    node_times = defaultdict(list)
+    for r in results:
+        for node, ms in (r["timings"] or {}).items():
+            node_times[node].append(ms)
+
+    print(f"\n{len(results)} conversas em {wall_time:.1f}s | erros: {len(errors)}", file=sys.stderr)
+    for node, values in node_times.items():
+        print(f"  {node:<25} média {sum(values) / len(values):>9.1f} ms  ({len(values)}x)", file=sys.stderr)
+    for r in errors:
+        print(f"  ❌ [{r['index']}] {r['message'][:60]} -> {r['error']}", file=sys.stderr)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Executa uma bateria de perguntas no agente (in-process).")
+    parser.add_argument("input", help="Arquivo JSON ou NDJSON com as conversas.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Conversas simultâneas (default: 4).")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json", help="Formato da saída.")
+    parser.add_argument("--output", help="Arquivo de saída (default: stdout).")
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.input)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    start = time.time()
+    results = []
+    try:
+        async for result in run_batch(conversations, args.concurrency):
+            results.append(result)
+            # NDJSON: grava cada resultado assim que termina (acompanha o progresso)
+            if args.format == "ndjson":
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+
+        if args.format == "json":
+            results.sort(key=lambda r: r["index"])
+            json.dump(results, out, ensure_ascii=False, indent=2)
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print_summary(results, time.time() - start)
+    # Código de saída != 0 se alguma conversa falhou (útil em CI)
+    return 1 if any(r["error"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,152 @@
+"""
+BENCHMARK: OVERHEAD DO GRAFO (agent_app com Provedores Mock)
+--------------------------------------------------
+Objetivo:
+    Medir quanto o próprio framework custa por conversa (LangGraph, busca híbrida,
+    montagem de contexto, streaming) sem rede e sem chaves de API. Com latência zero
+    nos mocks, o tempo medido é só overhead; com latência, simula o provedor real.
+
+Como funciona:
+    - Configura `LLM_PROVIDER=mock` e `EMBEDDING_PROVIDER=mock` (antes de importar o `app`)
+      e indexa `data/knowledge_base` num diretório temporário com os embeddings por hash.
+    - Caches de resposta, de embeddings e semântico ficam desligados por padrão
+      (toda execução percorre o caminho completo); `--caches` os liga.
+    - Executa `agent_app` via `stream_agent_events` (mesmo caminho do SSE) para uma lista
+      de perguntas (técnicas e casuais), após execuções de aquecimento.
+    - Reporta média / p50 / p95 de cada nó e do total, e a vazão (execuções/s).
+
+Como usar:
+    Execute via terminal na raíz do backend:
+    `python benchmarks/agent_graph.py --runs 200 --concurrency 4`
+    `python benchmarks/agent_graph.py --latency-ms 300 --tokens-per-second 80`
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import tempfile
+import logging
+import argparse
+import statistics
+
+# Hack de Path: permite importar 'app' a partir da pasta benchmarks/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+QUESTIONS = [
+    "Quais são as skills do Marcos?",
+    "Quais projetos o Marcos já fez com IA?",
+    "O Marcos usa LangGraph em algum projeto?",
+    "Qual é a stack de backend preferida dele?",
+    "Oi, tudo bem?",
+    "Quais jogos o Marcos gosta?",
+    "Onde o Marcos estudou?",
+    "Valeu!",
+]
+
+
+def configure_environment(args, workdir: str):
+    """Settings lidos do ambiente: precisa rodar antes de qualquer import do `app`."""
+    caches = "true" if args.caches else "false"
+    os.environ.update({
+        "LLM_PROVIDER": "mock",
+        "EMBEDDING_PROVIDER": "mock",
+        "MOCK_LLM_LATENCY_MS": str(args.latency_ms),
+        "MOCK_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "CHROMA_DB_DIR": os.path.join(workdir, "chroma_db"),
+        "VECTOR_BACKEND": args.backend,
+        "SESSIONS_DB_PATH": os.path.join(workdir, "sessions.sqlite"),
+        "LLM_CACHE_DB_PATH": os.path.join(workdir, "llm_cache.sqlite"),
+        "EMBEDDING_CACHE_DB_PATH": os.path.join(workdir, "embedding_cache.sqlite"),
+        "EMBEDDING_STORE_PATH": "",
+        "LLM_CACHE_ENABLED": caches,
+        "EMBEDDING_CACHE_ENABLED": caches,
+        "SEMANTIC_CACHE_ENABLED": caches,
+        "LLM_SCHEDULER_ENABLED": "false",
+        "LLM_FALLBACK_PROVIDERS": "",
+        # Embeddings locais: sem limite de taxa na ingestão
+        "INGEST_INITIAL_RATE": "100000",
+        "INGEST_MAX_RATE": "100000",
+    })
+
+
+def summarize(values):
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    return statistics.mean(ordered), statistics.median(ordered), p95
+
+
+async def run(args):
+    from app.graph.workflow import agent_app
+    from app.graph.streaming import build_initial_state, stream_agent_events
+
+    async def one(question: str) -> dict:
+        async for event, data in stream_agent_events(agent_app, build_initial_state(question)):
+            if event == "final":
+                return data["timings"]
+        return {}
+
+    for question in QUESTIONS[:args.warmup]:
+        await one(question)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = []
+
+    async def guarded(i: int):
+        async with semaphore:
+            results.append(await one(QUESTIONS[i % len(QUESTIONS)]))
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(guarded(i) for i in range(args.runs)))
+    elapsed = time.perf_counter() - started_at
+
+    nodes = {}
+    for timings in results:
+        for node, ms in timings.items():
+            nodes.setdefault(node, []).append(ms)
+
+    print(f"\n{'nó':<28}{'execuções':>10}{'média':>10}{'p50':>10}{'p95':>10}")
+    for node, values in nodes.items():
+        if node == "total":
+            continue
+        mean, p50, p95 = summarize(values)
+        print(f"{node:<28}{len(values):>10}{mean:>8.1f}ms{p50:>8.1f}ms{p95:>8.1f}ms")
+    mean, p50, p95 = summarize(nodes["total"])
+    print(f"{'TOTAL':<28}{len(nodes['total']):>10}{mean:>8.1f}ms{p50:>8.1f}ms{p95:>8.1f}ms")
+    print(f"\n⚡ Vazão: {args.runs / elapsed:.1f} execuções/s (concorrência {args.concurrency})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead do agent_app com provedores mock (offline).")
+    parser.add_argument("--runs", type=int, default=100, help="Execuções medidas")
+    parser.add_argument("--concurrency", type=int, default=1, help="Execuções simultâneas")
+    parser.add_argument("--warmup", type=int, default=len(QUESTIONS), help="Execuções de aquecimento (não medidas)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência simulada até o primeiro token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Vazão simulada (0 = instantâneo)")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default="chroma", help="VECTOR_BACKEND")
+    parser.add_argument("--caches", action="store_true", help="Liga os caches de resposta/embeddings/semântico")
+    parser.add_argument("--verbose", action="store_true", help="Mantém os logs INFO dos nós (observabilidade)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="agent_graph_bench_")
+    try:
+        configure_environment(args, workdir)
+        if not args.verbose:
+            # Os logs por nó (observabilidade) dominariam a saída e o tempo medido
+            from app.core.logger import logger
+            logger.setLevel(logging.WARNING)
+
+        print(f"🧪 Indexando a base com embeddings mock em {workdir}...")
+        from app.graph.nodes.rag import rag
+        rag.ingest_data(os.path.join(BACKEND_DIR, "data", "knowledge_base"))
+
+        print(f"🧪 {args.runs} execuções | latência {args.latency_ms:.0f}ms | {args.tokens_per_second or '∞'} tokens/s | backend {args.backend} | caches {'on' if args.caches else 'off'}")
+        asyncio.run(run(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
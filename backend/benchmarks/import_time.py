@@ -0,0 +1,91 @@
+"""
+BENCHMARK: TEMPO DE IMPORT (Startup dos Workers e Scripts)
+--------------------------------------------------
+Objetivo:
+    Medir quanto custa importar os módulos de entrada do backend e quais SDKs de provedores
+    de LLM são carregados no caminho. Cada worker do Uvicorn (e cada script, como o
+    `ingest.py`) paga esse custo ao iniciar.
+
+Como funciona:
+    - Para cada módulo, roda `python -X importtime -c "import <módulo>"` num subprocesso
+      novo (sem cache de módulos) e lê o tempo acumulado do módulo.
+    - Repete N vezes e reporta a mediana.
+    - Lista os SDKs de provedores importados (só o do LLM_PROVIDER configurado deveria aparecer,
+      além do `langchain_google_genai`, usado pelos embeddings do RAG).
+    - `--max-ms`: falha (código 1) se algum módulo passar do limite, para segurar o ganho no CI.
+
+Como usar:
+    Execute via terminal na raíz do backend:
+    `python benchmarks/import_time.py --runs 5`
+    `python benchmarks/import_time.py --modules main --max-ms 2500`
+"""
+
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["app.core.llm", "app.services.rag_service", "app.graph.workflow", "main"]
+PROVIDER_SDKS = ["langchain_openai", "langchain_groq", "langchain_google_genai"]
+
+# Linha do -X importtime: "import time:  self [us] | cumulative | nome"
+LINE_PATTERN = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str):
+    """Importa `module` num processo novo. Retorna (ms acumulados, SDKs de provedor importados)."""
+    env = dict(os.environ)
+    # Nenhuma chamada externa é feita, mas o Settings exige a chave do provider padrão.
+    env.setdefault("GOOGLE_API_KEY", "benchmark")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{result.stderr[-2000:]}")
+
+    cumulative_us = None
+    providers = set()
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        if name == module:
+            cumulative_us = int(match.group(2))
+        if name in PROVIDER_SDKS:
+            providers.add(name)
+    return (cumulative_us or 0) / 1000, sorted(providers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import dos módulos de entrada do backend.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Módulos a medir.")
+    parser.add_argument("--runs", type=int, default=3, help="Execuções por módulo (reporta a mediana).")
+    parser.add_argument("--max-ms", type=float, default=None, help="Falha se algum módulo passar deste tempo.")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]} | {args.runs} execuções por módulo\n")
+    over_budget = []
+    for module in args.modules:
+        timings = []
+        providers = []
+        for _ in range(args.runs):
+            elapsed_ms, providers = measure(module)
+            timings.append(elapsed_ms)
+        median = statistics.median(timings)
+        print(f"{module:<28} mediana {median:8.1f} ms | SDKs: {', '.join(providers) or '-'}")
+        if args.max_ms is not None and median > args.max_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"\n❌ Acima de {args.max_ms:.0f} ms: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
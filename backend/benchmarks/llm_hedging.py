@@ -0,0 +1,168 @@
+"""
+BENCHMARK: FAILOVER E HEDGING ENTRE PROVEDORES (Stubs Locais)
+--------------------------------------------------
+Objetivo:
+    Medir o efeito do `RoutedChatModel` na latência de cauda (p95/p99 do primeiro token)
+    e na taxa de erro, sem chamar nenhuma API.
+
+Como funciona:
+    - Cada "provedor" é um chat model local com latência simulada: base log-normal e uma
+      fração de chamadas lentas (cauda), mais uma fração de respostas 429.
+    - Cenários com o mesmo tráfego:
+        1. Só o principal (sem roteamento).
+        2. Principal + alternativo, só failover (hedge desligado).
+        3. Principal + alternativo, failover + hedge no p95.
+    - Reporta p50 / p95 / p99 do primeiro token, erros e requisições extras disparadas.
+
+Como usar:
+    Execute via terminal na raíz do backend:
+    `python benchmarks/llm_hedging.py --calls 400 --slow-rate 0.05 --error-rate 0.03`
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from typing import Any, AsyncIterator, List, Optional
+
+# Hack de Path: permite importar 'app' a partir da pasta benchmarks/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+# Nenhuma chamada externa é feita, mas o Settings exige a chave do provider padrão.
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class StubRateLimitError(Exception):
+    """Imita o erro 429 dos SDKs (atributo `status_code`)."""
+    status_code = 429
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Provedor simulado: latência até o primeiro token = base log-normal (+ cauda lenta).
+    """
+    name: str
+    base_ms: float = 80.0
+    slow_rate: float = 0.05
+    slow_ms: float = 1500.0
+    error_rate: float = 0.0
+    seed: int = 0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat-model"
+
+    def _sample(self, rng: random.Random) -> float:
+        delay = rng.lognormvariate(0, 0.25) * self.base_ms
+        if rng.random() < self.slow_rate:
+            delay += self.slow_ms
+        return delay / 1000
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        rng = random.Random(f"{self.seed}-{self.name}-{messages[-1].content}")
+        delay = self._sample(rng)
+        if rng.random() < self.error_rate:
+            await asyncio.sleep(delay / 4)
+            raise StubRateLimitError(f"{self.name}: 429 Too Many Requests")
+        await asyncio.sleep(delay)
+        for token in ("Resposta ", "do ", self.name):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            await asyncio.sleep(0.005)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"Resposta do {self.name}"))])
+
+
+async def run_scenario(model, calls: int, concurrency: int) -> dict:
+    """Dispara `calls` perguntas distintas e mede o tempo até o primeiro token."""
+    semaphore = asyncio.Semaphore(concurrency)
+    ttft, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                async for _ in model.astream(f"pergunta {i}"):
+                    ttft.append((time.perf_counter() - started_at) * 1000)
+                    break
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    ttft.sort()
+    pick = lambda q: ttft[min(len(ttft) - 1, int(q * len(ttft)))] if ttft else float("nan")
+    return {
+        "p50": statistics.median(ttft) if ttft else float("nan"),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "errors": errors,
+    }
+
+
+def make_providers(args, seed: int):
+    primary = StubChatModel(name="primario", base_ms=args.base_ms, slow_rate=args.slow_rate, slow_ms=args.slow_ms, error_rate=args.error_rate, seed=seed)
+    alternate = StubChatModel(name="alternativo", base_ms=args.base_ms * 1.5, slow_rate=args.slow_rate, slow_ms=args.slow_ms, error_rate=args.error_rate, seed=seed + 1)
+    return primary, alternate
+
+
+async def main(args):
+    from app.core.llm_router import RoutedChatModel
+    from app.core.metrics import metrics
+
+    print(f"🧪 {args.calls} chamadas | base {args.base_ms:.0f}ms | cauda {args.slow_rate:.0%} (+{args.slow_ms:.0f}ms) | 429 {args.error_rate:.0%}\n")
+    print(f"{'cenário':<28}{'p50':>9}{'p95':>9}{'p99':>9}{'erros':>8}{'extras':>9}")
+
+    scenarios = [
+        ("só principal", None),
+        ("failover", False),
+        ("failover + hedge p95", True),
+    ]
+    for label, hedge in scenarios:
+        primary, alternate = make_providers(args, seed=args.seed)
+        if hedge is None:
+            model = primary
+        else:
+            model = RoutedChatModel(
+                models=[primary, alternate],
+                hedge_enabled=hedge,
+                hedge_min_delay=args.base_ms * 2 / 1000,
+                hedge_max_delay=args.slow_ms / 1000,
+                min_samples=20,
+            )
+            # Aquecimento: amostras para o p95 (não entram na medição)
+            await run_scenario(model, 50, args.concurrency)
+            primary.calls = alternate.calls = 0
+
+        before = metrics.snapshot()
+        result = await run_scenario(model, args.calls, args.concurrency)
+        after = metrics.snapshot()
+        extra = primary.calls + alternate.calls - args.calls
+        print(
+            f"{label:<28}{result['p50']:>7.0f}ms{result['p95']:>7.0f}ms{result['p99']:>7.0f}ms"
+            f"{result['errors']:>8}{extra:>9}"
+            + (f"   (hedges={after.get('llm_hedges', 0) - before.get('llm_hedges', 0)}, "
+               f"vitórias={after.get('llm_hedge_wins', 0) - before.get('llm_hedge_wins', 0)}, "
+               f"failovers={after.get('llm_failovers', 0) - before.get('llm_failovers', 0)})" if hedge is not None else "")
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Failover e hedging entre provedores (stubs locais).")
+    parser.add_argument("--calls", type=int, default=400, help="Chamadas por cenário")
+    parser.add_argument("--concurrency", type=int, default=20, help="Chamadas simultâneas")
+    parser.add_argument("--base-ms", type=float, default=80.0, help="Latência típica do primeiro token")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fração de chamadas lentas")
+    parser.add_argument("--slow-ms", type=float, default=1500.0, help="Atraso extra das chamadas lentas")
+    parser.add_argument("--error-rate", type=float, default=0.03, help="Fração de respostas 429")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
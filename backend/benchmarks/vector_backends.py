@@ -0,0 +1,169 @@
+"""
+BENCHMARK: BACKENDS DE BUSCA VETORIAL (Chroma vs NumPy)
+--------------------------------------------------
+Objetivo:
+    Comparar latência de busca e memória residente (RSS) entre o ChromaDB e o índice
+    NumPy (`VECTOR_BACKEND="numpy"`) para o tamanho típico da base do portfólio.
+
+Como funciona:
+    - Cria um índice temporário no Chroma com embeddings determinísticos (sem API do Google)
+      e exporta a matriz NumPy, exatamente como a ingestão faz.
+    - Cada backend roda num subprocesso próprio (RSS não contaminado pelo outro):
+      abre o índice, faz N buscas por vetor e reporta média / p50 / p95 e o RSS final.
+    - Confere se os dois backends devolvem os mesmos top-k.
+
+Como usar:
+    Execute via terminal na raíz do backend:
+    `python benchmarks/vector_backends.py --docs 60 --dim 3072 --queries 500`
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import statistics
+import subprocess
+
+# Hack de Path: permite importar 'app' a partir da pasta benchmarks/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+# Nenhuma chamada externa é feita, mas o Settings exige a chave do provider padrão.
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+
+def rss_mb() -> float:
+    """RSS atual do processo (Linux: /proc; demais: pico via resource)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def fake_embeddings(dim: int):
+    """
+    Embeddings determinísticos e normalizados (como os do Gemini em 3072 dimensões):
+    com vetores unitários, a distância L2 do Chroma e o cosseno do NumPy ordenam igual.
+    """
+    import numpy as np
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    class NormalizedFakeEmbedding(DeterministicFakeEmbedding):
+        def _get_embedding(self, seed: int):
+            vector = np.asarray(super()._get_embedding(seed=seed))
+            return (vector / np.linalg.norm(vector)).tolist()
+
+    return NormalizedFakeEmbedding(size=dim)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def worker(backend: str, directory: str, dim: int, queries: int):
+    """
+    Executado no subprocesso: mede um único backend e imprime o resultado em JSON.
+    """
+    os.environ["VECTOR_BACKEND"] = backend
+    from app.services.rag_service import RagService
+
+    baseline_rss = rss_mb()
+    rag = RagService()
+    rag.embeddings = fake_embeddings(dim)
+    rag.persist_directory = directory
+
+    # Perguntas = textos de chunks existentes (o top-1 esperado é conhecido)
+    query_vectors = [rag.embeddings.embed_query(f"Trecho {i % 20} sobre projetos e skills") for i in range(queries)]
+
+    start = time.perf_counter()
+    store = rag.get_vectorstore()
+    open_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    results = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        docs = store.similarity_search_by_vector(vector, k=4)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append([d.page_content for d in docs])
+
+    print(json.dumps({
+        "backend": backend,
+        "open_ms": open_ms,
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "rss_mb": rss_mb(),
+        "rss_delta_mb": rss_mb() - baseline_rss,
+        "top_k": results[:20]
+    }))
+
+
+def build_index(directory: str, docs: int, dim: int):
+    from langchain_core.documents import Document
+    from app.services.rag_service import RagService
+
+    rag = RagService()
+    rag.embeddings = fake_embeddings(dim)
+    rag.persist_directory = directory
+    vectorstore = rag.get_vectorstore()
+    vectorstore.add_documents([
+        Document(page_content=f"Trecho {i} sobre projetos e skills", metadata={"source": "bench.md"})
+        for i in range(docs)
+    ])
+    # Mesmo final da ingestão: versão nova + exportação NumPy
+    rag._write_index_version()
+    rag.export_numpy_index(vectorstore)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência e RSS: Chroma vs índice NumPy.")
+    parser.add_argument("--docs", type=int, default=60, help="Chunks no índice temporário.")
+    parser.add_argument("--dim", type=int, default=3072, help="Dimensão dos embeddings.")
+    parser.add_argument("--queries", type=int, default=500, help="Buscas por backend.")
+    parser.add_argument("--worker", choices=["chroma", "numpy"], help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.dir, args.dim, args.queries)
+        return
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_backends_")
+    try:
+        build_index(tmp_dir, args.docs, args.dim)
+        print(f"Índice: {args.docs} chunks | dim {args.dim} | {args.queries} buscas por backend\n")
+
+        reports = {}
+        for backend in ("chroma", "numpy"):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", backend, "--dir", tmp_dir,
+                 "--dim", str(args.dim), "--queries", str(args.queries)],
+                cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            ).stdout
+            report = json.loads(output.strip().splitlines()[-1])
+            reports[backend] = report
+            print(
+                f"{backend:<7} abrir {report['open_ms']:8.1f} ms | média {report['mean_ms']:6.3f} ms | "
+                f"p50 {report['p50_ms']:6.3f} ms | p95 {report['p95_ms']:6.3f} ms | "
+                f"RSS {report['rss_mb']:7.1f} MB (+{report['rss_delta_mb']:.1f} MB ao abrir/buscar)"
+            )
+
+        same = reports["chroma"]["top_k"] == reports["numpy"]["top_k"]
+        speedup = reports["chroma"]["mean_ms"] / reports["numpy"]["mean_ms"]
+        print(f"\nMesmos top-k nos dois backends: {'sim' if same else 'NÃO'} | NumPy {speedup:.1f}x mais rápido por busca")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+BENCHMARK: REUSO DO HANDLE DO BANCO VETORIAL
+--------------------------------------------------
+Objetivo:
+    Medir o custo por busca de construir um `Chroma(...)` novo a cada consulta (comportamento
+    antigo do `RagService.get_vectorstore`) contra reaproveitar um único handle por processo.
+
+Como funciona:
+    - Cria um índice temporário com embeddings determinísticos (sem chamadas à API do Google).
+    - Executa a mesma busca por vetor N vezes em cada modo e reporta média / p50 / p95.
+    - Mede apenas o overhead local (abertura + busca); o embedding da pergunta fica de fora.
+
+Como usar:
+    Execute via terminal na raíz do backend:
+    `python benchmarks/vectorstore_reuse.py --docs 500 --queries 200`
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import statistics
+
+# Hack de Path: permite importar 'app' a partir da pasta benchmarks/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Nenhuma chamada externa é feita, mas o Settings exige a chave do provider padrão.
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.services.rag_service import RagService
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(label, search_fn, queries):
+    timings = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        search_fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{label:<28} média {statistics.mean(timings):7.2f} ms | "
+        f"p50 {percentile(timings, 50):7.2f} ms | p95 {percentile(timings, 95):7.2f} ms"
+    )
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead por busca: Chroma novo vs handle reaproveitado.")
+    parser.add_argument("--docs", type=int, default=500, help="Chunks no índice temporário.")
+    parser.add_argument("--queries", type=int, default=200, help="Buscas por modo.")
+    parser.add_argument("--dim", type=int, default=768, help="Dimensão dos embeddings.")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_chroma_")
+    try:
+        rag = RagService()
+        rag.embeddings = DeterministicFakeEmbedding(size=args.dim)
+        rag.persist_directory = tmp_dir
+
+        docs = [Document(page_content=f"Trecho {i} sobre projetos e skills", metadata={"source": "bench.md"}) for i in range(args.docs)]
+        rag.get_vectorstore().add_documents(docs)
+        rag._write_index_version()
+        query_vector = rag.embeddings.embed_query("Quais as skills do Marcos?")
+
+        def fresh_handle():
+            # Comportamento antigo: um Chroma novo por consulta
+            Chroma(
+                persist_directory=rag.persist_directory,
+                embedding_function=rag.embeddings,
+                collection_name=rag.collection_name
+            ).similarity_search_by_vector(query_vector, k=4)
+
+        def reused_handle():
+            rag.get_vectorstore().similarity_search_by_vector(query_vector, k=4)
+
+        print(f"Índice: {args.docs} chunks | dim {args.dim} | {args.queries} buscas por modo\n")
+        before = run("Chroma novo por busca", fresh_handle, args.queries)
+        after = run("Handle reaproveitado", reused_handle, args.queries)
+        print(f"\nOverhead removido: {before - after:.2f} ms por busca ({before / after:.1f}x)")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ SCRIPT DE INICIALIZAÇÃO "AUTO-SUFICIENTE"
 Este script substitui o comando padrão do Docker.
 Ele verifica se o banco de dados vetorial existe. 
 Se não existir (ou se for forçada a recriação), ele roda a ingestão automaticamente.
+Se existir mas estiver parcial (ingestão interrompida ou com chunks na dead-letter),
+roda a ingestão incremental para completá-lo.
 """
 import os
 import subprocess
@@ -14,6 +16,7 @@ import shutil
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.config import settings
+from app.services.ingest_state import inspect_index
 
 def main():
     db_path = settings.CHROMA_DB_DIR
@@ -42,13 +45,13 @@ def main():
         except Exception as e:
             print(f"❌ Erro crítico ao limpar diretório: {e}")
 
-    # 2. Lógica Padrão: Se a pasta não existe OU está vazia, roda ingestão.
-    # Nota: os.listdir pode falhar se a pasta não existir, então checamos exists primeiro.
-    should_ingest = False
-    if not os.path.exists(db_path):
-        should_ingest = True
-    elif not os.listdir(db_path): # Pasta existe mas está vazia
-        should_ingest = True
+    # 2. Lógica Padrão: Se a pasta não existe, está vazia OU o índice ficou pela metade, roda ingestão.
+    # A ingestão é incremental: num índice parcial, só os chunks que faltam são enviados.
+    index_status = inspect_index(db_path)
+    should_ingest = index_status != "complete"
+
+    if index_status == "partial":
+        print(f"🩹  Índice parcial detectado em '{db_path}' (ingestão interrompida ou com falhas). Reparando...")
 
     if should_ingest:
         print(f"⚙️  Iniciando processo de ingestão (Criação de Memória)...")
@@ -59,7 +62,7 @@ def main():
         if result.returncode == 0:
             print("✅  Ingestão concluída com sucesso!")
         else:
-            print("❌  Falha na ingestão. O servidor iniciará com memória vazia.")
+            print("❌  Falha na ingestão (total ou parcial). O servidor iniciará com a memória que foi indexada.")
     else:
         print(f"✅  Banco vetorial já existe em '{db_path}'. Pulando ingestão.")
 
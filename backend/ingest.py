@@ -11,17 +11,24 @@ Atuação no Sistema:
 
 Responsabilidades:
     1. Localizar a pasta de conhecimento (`data/knowledge_base`).
-    2. Instanciar o `RagService` para processar os arquivos.
+    2. Instanciar o `RagService` para processar os arquivos (incremental: só chunks
+       novos/alterados são vetorizados; `--full` reconstrói o índice do zero).
     3. Executar um teste de sanidade ("Smoke Test") ao final para garantir que 
        a busca está retornando resultados.
+    4. Sair com código 1 se algum chunk não pôde ser indexado (nada é perdido em silêncio).
 
 Como usar:
     Execute via terminal na raíz do backend:
-    `python ingest.py`
+    `python ingest.py`          (incremental)
+    `python ingest.py --full`   (apaga o índice e revetoriza tudo)
+    `python ingest.py --retry-failed`   (reenvia só os chunks da dead-letter)
+
+    Uma execução interrompida é retomada automaticamente na próxima chamada.
 """
 
 import os
 import sys
+import argparse
 
 # Hack de Path: Adiciona o diretório atual ao sys.path para conseguir importar 'app'
 # Isso é necessário porque este script está na raiz, fora do pacote 'app'.
@@ -33,6 +40,17 @@ def main():
     """
     Função principal que orquestra a atualização da memória da IA.
     """
+    parser = argparse.ArgumentParser(description="Indexa a base de conhecimento no banco vetorial.")
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Apaga o índice atual e revetoriza todos os chunks (ignora o diff por hash)."
+    )
+    parser.add_argument(
+        "--retry-failed", action="store_true",
+        help="Reenvia apenas os chunks que falharam na última ingestão (dead-letter)."
+    )
+    args = parser.parse_args()
+
     # Define o caminho absoluto para a pasta de dados
     # Garante que funcione independente de onde o terminal foi aberto
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -43,7 +61,10 @@ def main():
     try:
         # Inicializa o serviço e dispara a indexação (que já tem rate limit embutido)
         rag = RagService()
-        rag.ingest_data(data_folder)
+        if args.retry_failed:
+            report = rag.retry_failed()
+        else:
+            report = rag.ingest_data(data_folder, full=args.full)
         
         # --------------------------------------------------
         # Smoke Test (Verificação de Integridade)
@@ -59,6 +80,10 @@ def main():
                 print(f"{doc.page_content[:150]}...")
         else:
             print("⚠️ O banco parece vazio após a ingestão. Verifique os arquivos na pasta data/.")
+
+        if report and report.failed_ids:
+            print(f"\n❌ {len(report.failed_ids)} chunks ficaram fora do índice. Rode `python ingest.py --retry-failed`.")
+            sys.exit(1)
             
     except Exception as e:
         print(f"\n❌ Erro Fatal durante a ingestão: {e}")
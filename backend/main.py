@@ -12,21 +12,37 @@ Responsabilidades:
     2. Configurar CORS para permitir que o Frontend (React/Vite) faça requisições.
     3. Conectar os roteadores (endpoints) da aplicação.
     4. Fornecer endpoint de Health Check para monitoramento.
+    5. Liberar recursos persistentes (conexão das sessões, pool HTTP) no shutdown.
 
 Comunicação:
     - Importa e ativa rotas definir em `app.api.routes`.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router as api_router
 from app.core.config import settings
+from app.graph.workflow import close_session_app
+from app.core.http import close_http_clients
 import uvicorn
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida do servidor: libera recursos persistentes no shutdown.
+    """
+    yield
+    # Conexão SQLite das sessões (checkpointer do LangGraph)
+    await close_session_app()
+    # Pool de conexões com os provedores de IA
+    await close_http_clients()
+
 app = FastAPI(
     title="Marcos Portfolio API",
     description="Backend com Agentes IA para o Portfólio do Marcos",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # --------------------------------------------------
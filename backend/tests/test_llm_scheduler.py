@@ -0,0 +1,64 @@
+"""
+Regressão do agendador de LLMs: acertos do cache de respostas disparam o `UsageCallback`,
+mas não passaram pelo limiter e não podem corrigir a janela nem a média de tokens.
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Settings exigem a chave do provedor padrão: o mock roda sem chave
+os.environ.setdefault("LLM_PROVIDER", "mock")
+
+from langchain_core.caches import InMemoryCache
+from app.core.llm_scheduler import ProviderRateLimiter, UsageStore
+from app.core.mock_llm import MockChatModel
+
+
+def make_model(limiter: ProviderRateLimiter) -> MockChatModel:
+    return MockChatModel(
+        model="mock-fast",
+        output_tokens=20,
+        cache=InMemoryCache(),
+        rate_limiter=limiter,
+        callbacks=[limiter.usage_callback]
+    )
+
+
+def recorded(store: UsageStore) -> tuple:
+    # Totais gravados (sem o peso da janela anterior: o teste pode cruzar a virada do minuto)
+    return store._connect().execute("SELECT SUM(requests), SUM(tokens) FROM usage").fetchone()
+
+
+def test_cache_hits_do_not_adjust_usage(tmp_path):
+    store = UsageStore(str(tmp_path / "usage.sqlite"))
+    limiter = ProviderRateLimiter(store, "mock:mock-fast", rpm=100, tpm=100_000, max_wait=1.0, default_tokens=800)
+    model = make_model(limiter)
+
+    first = model.invoke("Quais são as skills do Marcos?")
+    real_tokens = first.usage_metadata["total_tokens"]
+    after_call = recorded(store)
+    estimate_after_call = limiter.tokens_per_call
+    assert after_call == (1, real_tokens)
+
+    for _ in range(3):
+        model.invoke("Quais são as skills do Marcos?")
+
+    assert recorded(store) == after_call
+    assert limiter.tokens_per_call == estimate_after_call
+    store.close()
+
+
+def test_cache_hits_do_not_adjust_usage_async(tmp_path):
+    store = UsageStore(str(tmp_path / "usage.sqlite"))
+    limiter = ProviderRateLimiter(store, "mock:mock-fast", rpm=100, tpm=100_000, max_wait=1.0, default_tokens=800)
+    model = make_model(limiter)
+
+    first = asyncio.run(model.ainvoke("Onde o Marcos estudou?"))
+    after_call = recorded(store)
+    assert after_call == (1, first.usage_metadata["total_tokens"])
+
+    asyncio.run(model.ainvoke("Onde o Marcos estudou?"))
+    assert recorded(store) == after_call
+    store.close()
@@ -16,6 +16,12 @@ const StartMenu = ({ isOpen, onClose, isDarkMode }) => {
   const content = getStartMenuData(language);
   const menuRef = useRef(null);
   const chatEndRef = useRef(null);
+  // Server-side session: the backend keeps the history, so only the new message is sent
+  const sessionIdRef = useRef(
+    window.crypto?.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+  );
 
   const SUGGESTIONS = {
     pt: [
@@ -37,6 +43,7 @@ const StartMenu = ({ isOpen, onClose, isDarkMode }) => {
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [loadingStatus, setLoadingStatus] = useState(''); // New State for Status Text
+  const [streamingText, setStreamingText] = useState(''); // Partial answer (token events)
   const [usage, setUsage] = useState(null);
   const [showBetaBanner, setShowBetaBanner] = useState(true);
 
@@ -45,7 +52,7 @@ const StartMenu = ({ isOpen, onClose, isDarkMode }) => {
     if (chatEndRef.current) {
       chatEndRef.current.scrollIntoView({ behavior: 'smooth' });
     }
-  }, [messages, isLoading, loadingStatus]);
+  }, [messages, isLoading, loadingStatus, streamingText]);
 
   // Disable scroll when open (Robust Strategy: Fixed Body + Lenis Stop)
   useEffect(() => {
@@ -88,6 +95,7 @@ const StartMenu = ({ isOpen, onClose, isDarkMode }) => {
     setInput('');
     setIsLoading(true);
     setLoadingStatus(language === 'pt' ? 'Iniciando...' : 'Starting...');
+    setStreamingText('');
 
     try {
       const response = await fetch(`${API_BASE}/chat`, {
@@ -95,12 +103,12 @@ const StartMenu = ({ isOpen, onClose, isDarkMode }) => {
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           message: text,
-          history: messages,
+          session_id: sessionIdRef.current,
           language: language
         })
       });
 
-      if (response.status === 429) {
+      if (response.status === 429 || response.status === 503) {
          const errorData = await response.json();
          setMessages(prev => [...prev, { 
             role: 'assistant', 
@@ -145,10 +153,14 @@ const StartMenu = ({ isOpen, onClose, isDarkMode }) => {
             }
 
             if (eventType && eventData) {
-                if (eventType === 'status') {
+                if (eventType === 'status' || eventType === 'queue') {
                     setLoadingStatus(eventData.message);
+                } else if (eventType === 'token') {
+                    setStreamingText(prev => prev + eventData.content);
                 } else if (eventType === 'result') {
+                    // The final result replaces the partial (streamed) text
                     const botMsg = { role: 'assistant', content: eventData.response };
+                    setStreamingText('');
                     setMessages(prev => [...prev, botMsg]);
                     if (eventData.usage) setUsage(eventData.usage);
                 } else if (eventType === 'error') {
@@ -168,6 +180,7 @@ const StartMenu = ({ isOpen, onClose, isDarkMode }) => {
     } finally {
       setIsLoading(false);
       setLoadingStatus('');
+      setStreamingText('');
     }
   };
 
@@ -293,9 +306,22 @@ const StartMenu = ({ isOpen, onClose, isDarkMode }) => {
               {isLoading && (
                   <div className="message-row assistant">
                       <div className="message-avatar bot"><Bot size={16} /></div>
-                      <div className="message-bubble loading-status">
-                        <span className="status-text">{loadingStatus || (language === 'pt' ? 'Processando...' : 'Processing...')}</span>
-                      </div>
+                      {streamingText ? (
+                        <div className="message-bubble">
+                          <ReactMarkdown 
+                              remarkPlugins={[remarkGfm]}
+                              components={{
+                                  a: (props) => <a {...props} target="_blank" rel="noopener noreferrer" />
+                              }}
+                          >
+                              {streamingText}
+                          </ReactMarkdown>
+                        </div>
+                      ) : (
+                        <div className="message-bubble loading-status">
+                          <span className="status-text">{loadingStatus || (language === 'pt' ? 'Processando...' : 'Processing...')}</span>
+                        </div>
+                      )}
                   </div>
               )}
               <div ref={chatEndRef} />